@@ -7,12 +7,15 @@ import asyncio
 import os
 import base64
 import contextvars
+from datetime import datetime
 from pydantic import BaseModel
 
 from computer_use_demo import sampling_loop, APIProvider
+from backend.api.v1.screenshot import add_screenshot
 from backend.api.v1.stream import publish_task_event
 from backend.db import get_session, Task, Message, Event, Screenshot, Media
-from backend.utils import save_screenshot_and_return_url, compute_sha256
+from backend.services import display_pool
+from backend.utils import store_screenshot, write_variants
 
 router = APIRouter(prefix="/agent", tags=["Agent"])
 
@@ -25,6 +28,52 @@ current_task_id: contextvars.ContextVar[str | None] = contextvars.ContextVar('cu
 class MessageRequest(BaseModel):
     text: str
 
+def find_tool_use(messages: list[dict], tool_use_id: str) -> dict:
+    """
+    Find the tool_use block a result belongs to; the loop appends the assistant
+    message before running its tools.
+    """
+    for message in reversed(messages):
+        content = message.get("content")
+        if message.get("role") != "assistant" or not isinstance(content, list):
+            continue
+        for block in content:
+            if isinstance(block, dict) and block.get("id") == tool_use_id:
+                return block
+    return {}
+
+async def get_or_create_screenshot(
+    session: Session, base64_data: str, media_type: str | None, event_id: UUID
+) -> Screenshot:
+    """
+    Store a screenshot by content and return its row. Identical frames share one
+    file and one row, which keeps the event it was first seen in. Decoding, resizing
+    and writing the files run in a thread, so the event loop keeps serving streams.
+    """
+    url, sha = await asyncio.to_thread(store_screenshot, base64_data, media_type)
+    screenshot = session.exec(select(Screenshot).where(Screenshot.sha256 == sha)).first()
+    if screenshot and screenshot.url == url and screenshot.preview_url:
+        return screenshot
+
+    variants = await asyncio.to_thread(write_variants, url)
+    if screenshot:
+        # the full-size file was compacted away by retention and just written again
+        screenshot.url = url
+        screenshot.thumbnail_url = variants["thumb"]
+        screenshot.preview_url = variants["preview"]
+        screenshot.created_at = datetime.now()
+        session.add(screenshot)
+        session.commit()
+        return screenshot
+
+    return add_screenshot(session, Screenshot(
+        event_id=event_id,
+        url=url,
+        thumbnail_url=variants["thumb"],
+        preview_url=variants["preview"],
+        sha256=sha,
+    ))
+
 def generate_task_title(message_text: str, max_length: int = 60) -> str:
     """
     Generate a concise, meaningful title from a user message.
@@ -446,41 +495,45 @@ async def run_agent_loop(task_id: str):
                     session.commit()
                     print(f"Task {task_id} status updated to 'running' (computer tools used)")
                 
-                # 1. Save screenshot if exists
-                if tool_result.base64_image:
-                    url = save_screenshot_and_return_url(tool_result.base64_image)
-                    sha = compute_sha256(tool_result.base64_image)
+                tool_use = find_tool_use(messages, tool_use_id)
+
+                # 1. Save as Event
+                event = Event(
+                    task_id=UUID(task_id),
+                    kind=tool_use.get("name") or "tool_use",
+                    ordering=ordering + 1 if tool_result.base64_image else ordering,
+                    payload={
+                        "input": tool_use.get("input"),
+                        "output": tool_result.output,
+                        "tool_use_id": tool_use_id,
+                    },
+                )
+                # What the command used; GET /tasks/{id}/usage sums it per task
+                usage = getattr(tool_result, "usage", None)
+                if usage is not None:
+                    event.payload["usage"] = usage.to_dict()
+                session.add(event)
+                session.commit()
 
-                    screenshot = Screenshot(
-                        event_id=None,  # optionally tie to event_id after inserting event
-                        url=url,
-                        sha256=sha,
+                # 2. Save screenshot if exists, reusing stored content by hash
+                if tool_result.base64_image:
+                    screenshot = await get_or_create_screenshot(
+                        session, tool_result.base64_image, tool_result.media_type, event.id
                     )
-                    session.add(screenshot)
+                    event.payload = {**event.payload, "screenshot_id": str(screenshot.id)}
+                    session.add(event)
                     session.commit()
 
                     publish_task_event(task_id, {
                         "type": "screenshot",
                         "url": screenshot.url,
+                        "thumbnail_url": screenshot.thumbnail_url,
+                        "preview_url": screenshot.preview_url,
                         "sha256": screenshot.sha256,
                         "ordering": ordering,
                     })
                     ordering += 1
 
-                # 2. Save as Event
-                event = Event(
-                    task_id=UUID(task_id),
-                    kind=tool_result.name or "tool_use",
-                    ordering=ordering,
-                    payload={
-                        "input": tool_result.input,
-                        "output": tool_result.output,
-                        "tool_use_id": tool_use_id,
-                    },
-                )
-                session.add(event)
-                session.commit()
-
                 publish_task_event(task_id, {
                     "type": "event",
                     "kind": event.kind,
@@ -494,12 +547,22 @@ async def run_agent_loop(task_id: str):
                     publish_task_event(task_id, {
                         "type": "tool_result",
                         "content": tool_result.output,
+                        "tool_use_id": tool_use_id,
                         "ordering": ordering,
                     })
                     ordering += 1
             except Exception as e:
                 print(f"Error in tool_output_callback: {e}")
 
+        def tool_output_delta_callback(tool_use_id, stream, text):
+            # Live output of a running command; not stored, the result event carries all of it
+            publish_task_event(task_id, {
+                "type": "tool_output_delta",
+                "tool_use_id": tool_use_id,
+                "stream": stream,
+                "content": text,
+            })
+
         def api_response_callback(request, response, error):
             # Optional: Log or store Claude's raw responses
             if error:
@@ -527,7 +590,7 @@ async def run_agent_loop(task_id: str):
             ToolCollection._original_run = ToolCollection.run
         
         # Create a wrapper that checks stop flag using context variable
-        async def interruptible_run(self, *, name: str, tool_input: dict):
+        async def interruptible_run(self, *, name: str, tool_input: dict, **kwargs):
             # Get current task_id from context
             ctx_task_id = current_task_id.get()
             if ctx_task_id:
@@ -537,7 +600,7 @@ async def run_agent_loop(task_id: str):
                     raise InterruptedError(f"Task {ctx_task_id} was stopped by user before tool execution")
             
             # Execute the tool using original method
-            result = await ToolCollection._original_run(self, name=name, tool_input=tool_input)
+            result = await ToolCollection._original_run(self, name=name, tool_input=tool_input, **kwargs)
             
             # Check stop flag AFTER tool execution (in case it was set during execution)
             if ctx_task_id and running_tasks.get(ctx_task_id, False):
@@ -550,6 +613,9 @@ async def run_agent_loop(task_id: str):
         if ToolCollection.run == ToolCollection._original_run:
             ToolCollection.run = interruptible_run
         
+        # Each task gets a display of its own, so concurrent tasks don't share a screen
+        display_num = await display_pool.acquire(task_id)
+
         # Set context variable for this task
         token = current_task_id.set(task_id)
         
@@ -561,9 +627,11 @@ async def run_agent_loop(task_id: str):
                 messages=messages,
                 output_callback=output_callback,
                 tool_output_callback=tool_output_callback,
+                tool_output_delta_callback=tool_output_delta_callback,
                 api_response_callback=api_response_callback,
                 api_key=settings.anthropic_api_key,
                 tool_version="computer_use_20250124",
+                display_num=display_num,
             )
         except InterruptedError as e:
             print(f"Task {task_id} was interrupted: {e}")
@@ -626,6 +694,7 @@ async def run_agent_loop(task_id: str):
             "ordering": ordering if 'ordering' in locals() else 1,
         })
     finally:
+        await display_pool.release(task_id)
         # Clean up: remove task from running tasks
         if task_id in running_tasks:
             del running_tasks[task_id]
@@ -0,0 +1,102 @@
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+import asyncio
+
+from computer_use_demo.computer_use_demo.tools.grabber import (
+    get_grabber,
+    unwatch_grabber,
+    watch_grabber,
+)
+from computer_use_demo.computer_use_demo.tools.imaging import EncodingProfile, encode, resize
+from computer_use_demo.computer_use_demo.tools.screen import Frame, discard_screen, get_screen
+from computer_use_demo.computer_use_demo.tools.xlib import XError
+from backend.core.config import get_settings
+from backend.services import display_pool
+
+router = APIRouter(prefix="/preview", tags=["Preview"])
+
+PREVIEW_ENCODING = EncodingProfile.parse("jpeg:70")
+
+
+def _display_num(task_id: str | None) -> int | None:
+    """With a task id, the preview shows the display leased to that task."""
+    settings = get_settings()
+    return display_pool.display_for(task_id) if task_id else settings.display_num
+
+
+def _capture(display_num: int | None) -> Frame:
+    """
+    Read the newest frame from the ring buffer the computer tool uses if a grabber
+    is running, and capture a single frame otherwise, so fetching the latest frame
+    never starts a background capture.
+    """
+    grabber = get_grabber(display_num)
+    screen = grabber or get_screen(display_num)
+    if screen is None:
+        raise HTTPException(status_code=503, detail="Screen capture is not available")
+    try:
+        return screen.capture()
+    except XError:
+        if grabber is None:
+            discard_screen(display_num)
+        raise HTTPException(
+            status_code=503, detail="Screen capture is not available"
+        ) from None
+
+
+def _encode_preview(frame: Frame, max_width: int | None) -> bytes:
+    pixels = frame.pixels
+    if max_width and frame.width > max_width:
+        pixels = resize(
+            pixels, max_width, round(frame.height * max_width / frame.width)
+        )
+    return encode(pixels, PREVIEW_ENCODING)
+
+
+@router.get("/latest")
+async def latest_frame(max_width: int | None = None, task_id: str | None = None):
+    frame = await asyncio.to_thread(_capture, _display_num(task_id))
+    content = await asyncio.to_thread(_encode_preview, frame, max_width)
+    return Response(
+        content=content,
+        media_type=PREVIEW_ENCODING.media_type,
+        headers={"Cache-Control": "no-store"},
+    )
+
+
+@router.get("/stream")
+async def stream_frames(
+    request: Request, max_width: int | None = None, task_id: str | None = None
+):
+    """
+    Multipart JPEG (MJPEG) stream that sends each new frame from the ring buffer.
+    Live preview reads from the same grabber the computer tool uses, so watching
+    the screen never adds a second capture path. A grabber started for the stream
+    is stopped once its last viewer disconnects.
+    """
+    settings = get_settings()
+    display_num = _display_num(task_id)
+    grabber = watch_grabber(display_num, settings.preview_fps)
+    if grabber is None:
+        raise HTTPException(status_code=503, detail="Screen capture is not available")
+
+    async def frames():
+        last_timestamp = None
+        try:
+            while grabber.running and not await request.is_disconnected():
+                frame = grabber.latest()
+                if frame is not None and frame.timestamp != last_timestamp:
+                    last_timestamp = frame.timestamp
+                    content = await asyncio.to_thread(_encode_preview, frame, max_width)
+                    yield (
+                        b"--frame\r\nContent-Type: image/jpeg\r\n\r\n"
+                        + content
+                        + b"\r\n"
+                    )
+                await asyncio.sleep(1 / grabber.fps)
+        finally:
+            unwatch_grabber(display_num)
+
+    return StreamingResponse(
+        frames(), media_type="multipart/x-mixed-replace; boundary=frame"
+    )
@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+
+from backend.services import retention_service
+
+router = APIRouter(prefix="/retention", tags=["Retention"])
+
+
+@router.get("/metrics")
+def get_retention_metrics():
+    return retention_service.metrics.to_dict()
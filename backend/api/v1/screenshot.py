@@ -1,25 +1,59 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select
 from uuid import UUID
 
-from backend.db import get_session, Screenshot
+from backend.db import get_session, Event, Screenshot
 from backend.schemas import ScreenshotCreate, ScreenshotRead
 
 router = APIRouter(prefix="/screenshots", tags=["Screenshots"])
 
 
+def add_screenshot(session: Session, screenshot: Screenshot) -> Screenshot:
+    """
+    Insert a screenshot row, or return the one already stored for its content.
+    Rows are shared by hash, so a concurrent insert of the same frame may win.
+    """
+    existing = session.exec(
+        select(Screenshot).where(Screenshot.sha256 == screenshot.sha256)
+    ).first()
+    if existing:
+        return existing
+    session.add(screenshot)
+    try:
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        return session.exec(
+            select(Screenshot).where(Screenshot.sha256 == screenshot.sha256)
+        ).one()
+    session.refresh(screenshot)
+    return screenshot
+
+
 @router.post("/", response_model=ScreenshotRead)
 def create_screenshot(data: ScreenshotCreate, session: Session = Depends(get_session)):
-    sc = Screenshot(**data.dict())
-    session.add(sc)
-    session.commit()
-    session.refresh(sc)
+    sc = add_screenshot(session, Screenshot(**data.dict()))
+    # an event that shows stored content links to the shared row
+    event = session.get(Event, data.event_id) if data.event_id else None
+    if event and "screenshot_id" not in event.payload:
+        event.payload = {**event.payload, "screenshot_id": str(sc.id)}
+        session.add(event)
+        session.commit()
+        session.refresh(sc)
     return sc
 
 
 @router.get("/by-event/{event_id}", response_model=list[ScreenshotRead])
 def list_screenshots(event_id: UUID, session: Session = Depends(get_session)):
-    return session.exec(select(Screenshot).where(Screenshot.event_id == event_id)).all()
+    """The screenshots an event shows, including rows first stored for another event."""
+    event = session.get(Event, event_id)
+    linked = (event.payload or {}).get("screenshot_id") if event else None
+    condition = Screenshot.event_id == event_id
+    if linked:
+        condition = or_(condition, Screenshot.id == UUID(linked))
+    return session.exec(select(Screenshot).where(condition)).all()
 
 
 @router.get("/{screenshot_id}", response_model=ScreenshotRead)
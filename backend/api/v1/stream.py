@@ -2,6 +2,7 @@ from fastapi import APIRouter, Request
 from fastapi.responses import StreamingResponse
 import asyncio
 import json
+import time
 from typing import AsyncGenerator
 from backend.api.websockets import manager
 
@@ -10,7 +11,95 @@ router = APIRouter(prefix="/tasks", tags=["Streaming"])
 # In-memory task update queue
 task_streams: dict[str, asyncio.Queue] = {}
 
+# Live tool output is batched into one event per stream at most this often
+TOOL_OUTPUT_DELTA_INTERVAL = 0.25  # seconds
+# and each batch keeps at most this much of it
+TOOL_OUTPUT_DELTA_MAX_CHARS = 16 * 1024
+TOOL_OUTPUT_SKIPPED = "\n<live output skipped: see the tool result>\n"
+
+
+class ToolOutputThrottle:
+    """
+    Collects the `tool_output_delta` events of a task and publishes them in batches,
+    so a command that prints constantly does not flood the subscribers with events.
+    Each batch keeps at most `max_chars` of a stream's output; the rest is dropped
+    and replaced by a note, so memory stays bounded however fast output arrives.
+    """
+
+    def __init__(
+        self,
+        task_id: str,
+        interval: float = TOOL_OUTPUT_DELTA_INTERVAL,
+        max_chars: int = TOOL_OUTPUT_DELTA_MAX_CHARS,
+    ):
+        self.task_id = task_id
+        self.interval = interval
+        self.max_chars = max_chars
+        self._pending: dict[tuple[str, str], list[str]] = {}
+        self._sizes: dict[tuple[str, str], int] = {}
+        self._last_flush = 0.0
+        self._timer: asyncio.TimerHandle | None = None
+
+    def add(self, event: dict):
+        key = (event.get("tool_use_id", ""), event.get("stream", "stdout"))
+        content = event.get("content", "")
+        size = self._sizes.get(key, 0)
+        parts = self._pending.setdefault(key, [])
+        if size + len(content) > self.max_chars:
+            if size < self.max_chars:
+                parts.append(content[: self.max_chars - size])
+                parts.append(TOOL_OUTPUT_SKIPPED)
+            # anything more in this batch is dropped
+            size = self.max_chars
+        else:
+            parts.append(content)
+            size += len(content)
+        self._sizes[key] = size
+        if self._timer is not None:
+            return
+        delay = self._last_flush + self.interval - time.monotonic()
+        if delay <= 0:
+            self.flush()
+        else:
+            self._timer = asyncio.get_running_loop().call_later(delay, self.flush)
+
+    def flush(self):
+        """Publish the output collected so far."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._last_flush = time.monotonic()
+        pending, self._pending = self._pending, {}
+        self._sizes = {}
+        for (tool_use_id, stream), parts in pending.items():
+            _publish(self.task_id, {
+                "type": "tool_output_delta",
+                "tool_use_id": tool_use_id,
+                "stream": stream,
+                "content": "".join(parts),
+            })
+
+
+output_throttles: dict[str, ToolOutputThrottle] = {}
+
 def publish_task_event(task_id: str, event: dict):
+    """
+    Publish an event to the task's subscribers. `tool_output_delta` events are
+    throttled; any other event first publishes the output collected before it,
+    so subscribers see a tool's live output ahead of its result.
+    """
+    if event.get("type") == "tool_output_delta":
+        throttle = output_throttles.get(task_id)
+        if throttle is None:
+            throttle = output_throttles[task_id] = ToolOutputThrottle(task_id)
+        throttle.add(event)
+        return
+    throttle = output_throttles.pop(task_id, None)
+    if throttle is not None:
+        throttle.flush()
+    _publish(task_id, event)
+
+def _publish(task_id: str, event: dict):
     print(f"Publishing event for task {task_id}: {event}")
     try:
         if task_id in task_streams:
@@ -2,8 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import Session, select
 from uuid import UUID
 
-from backend.db import get_session, Task
-from backend.schemas import TaskCreate, TaskRead, TaskUpdate
+from backend.db import get_session, Task, Event
+from backend.schemas import TaskCreate, TaskRead, TaskUpdate, TaskUsage
 
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
 
@@ -30,6 +30,30 @@ def get_task(task_id: UUID, session: Session = Depends(get_session)):
     return task
 
 
+@router.get("/{task_id}/usage", response_model=TaskUsage)
+def get_task_usage(task_id: UUID, session: Session = Depends(get_session)):
+    """
+    Totals of the usage recorded in the task's events, counted once per tool call;
+    max_rss is the peak.
+    """
+    if not session.get(Task, task_id):
+        raise HTTPException(status_code=404, detail="Task not found")
+    usage = TaskUsage()
+    tool_calls = set()
+    for payload in session.exec(select(Event.payload).where(Event.task_id == task_id)):
+        recorded = (payload or {}).get("usage")
+        if not recorded:
+            continue
+        tool_calls.add(payload.get("tool_use_id"))
+        usage.wall_time += recorded.get("wall_time", 0.0)
+        usage.user_time += recorded.get("user_time", 0.0)
+        usage.system_time += recorded.get("system_time", 0.0)
+        usage.max_rss = max(usage.max_rss, recorded.get("max_rss", 0))
+        usage.output_bytes += recorded.get("output_bytes", 0)
+    usage.tool_calls = len(tool_calls)
+    return usage
+
+
 @router.patch("/{task_id}", response_model=TaskRead)
 def update_task(task_id: UUID, data: TaskUpdate, session: Session = Depends(get_session)):
     task = session.get(Task, task_id)
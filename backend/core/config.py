@@ -18,6 +18,24 @@ class Settings(BaseSettings):
     vnc_web_port: int = 6080
     vnc_raw_port: int = 5900
 
+    # Screen Preview Config
+    display_num: int | None = None
+    preview_fps: float = 5.0
+
+    # Display Pool Config
+    display_pool_size: int = 1
+    display_pool_first: int = 10
+    display_scripts_dir: Path = Path.home()
+    display_script_timeout: float = 90.0  # seconds
+
+    # Screenshot Retention Config
+    retention_enabled: bool = True
+    retention_full_res_days: int = 7
+    retention_orphan_grace_seconds: int = 3600
+    retention_interval_seconds: int = 300
+    retention_batch_size: int = 200
+    retention_max_deletes_per_second: float = 50.0
+
     # DB Config
     db_host: str
     db_user: str
@@ -1,13 +1,75 @@
+from sqlalchemy import text
 from sqlmodel import SQLModel, Session, create_engine
 from backend.core.config import get_settings
 
 settings = get_settings()
 engine = create_engine(settings.db_url, echo=(not settings.production))
 
+# create_all only creates missing tables, so columns and constraints added to existing
+# tables are brought in here. Each statement is a no-op on an up-to-date database.
+MIGRATIONS = [
+    "ALTER TABLE screenshot ADD COLUMN IF NOT EXISTS thumbnail_url VARCHAR",
+    "ALTER TABLE screenshot ADD COLUMN IF NOT EXISTS preview_url VARCHAR",
+    "ALTER TABLE screenshot ADD COLUMN IF NOT EXISTS created_at TIMESTAMP NOT NULL DEFAULT now()",
+    "CREATE INDEX IF NOT EXISTS ix_screenshot_created_at ON screenshot (created_at)",
+    # Screenshots used to be stored once per event. Now one row per content hash is
+    # shared by the events that show it, and linked from their payload.
+    """
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM pg_indexes
+            WHERE tablename = 'screenshot' AND indexname = 'ix_screenshot_sha256'
+                AND indexdef LIKE 'CREATE UNIQUE INDEX%'
+        ) THEN
+            RETURN;
+        END IF;
+
+        CREATE TEMPORARY TABLE screenshot_keeper ON COMMIT DROP AS
+            SELECT DISTINCT ON (sha256) sha256, id FROM screenshot
+            ORDER BY sha256, created_at, id;
+
+        -- link every event to the row kept for its screenshot's content
+        UPDATE event
+        SET payload = payload || jsonb_build_object('screenshot_id', keeper.id::text)
+        FROM screenshot JOIN screenshot_keeper AS keeper USING (sha256)
+        WHERE screenshot.event_id = event.id
+            AND NOT payload ? 'screenshot_id';
+        UPDATE event
+        SET payload = payload || jsonb_build_object('screenshot_id', keeper.id::text)
+        FROM screenshot JOIN screenshot_keeper AS keeper USING (sha256)
+        WHERE event.payload ->> 'screenshot_id' = screenshot.id::text
+            AND screenshot.id <> keeper.id;
+
+        DELETE FROM screenshot
+        USING screenshot_keeper AS keeper
+        WHERE screenshot.sha256 = keeper.sha256 AND screenshot.id <> keeper.id;
+
+        DROP INDEX IF EXISTS ix_screenshot_sha256;
+        CREATE UNIQUE INDEX ix_screenshot_sha256 ON screenshot (sha256);
+
+        -- a shared row outlives the event it was first seen in
+        ALTER TABLE screenshot ALTER COLUMN event_id DROP NOT NULL;
+        ALTER TABLE screenshot DROP CONSTRAINT IF EXISTS screenshot_event_id_fkey;
+        ALTER TABLE screenshot ADD CONSTRAINT screenshot_event_id_fkey
+            FOREIGN KEY (event_id) REFERENCES event (id) ON DELETE SET NULL;
+    END
+    $$
+    """,
+]
+
 
 def init_db():
     # SQLModel.metadata.drop_all(engine)
     SQLModel.metadata.create_all(engine)
+    migrate()
+
+
+def migrate():
+    """Bring the tables of a database created by an earlier version up to date."""
+    with engine.begin() as connection:
+        for statement in MIGRATIONS:
+            connection.execute(text(statement))
 
 
 def get_session():
@@ -15,4 +77,4 @@ def get_session():
         yield session
 
 # Used for manual sessions (e.g., background tasks)
-SessionLocal = lambda: Session(engine)
\ No newline at end of file
+SessionLocal = lambda: Session(engine)
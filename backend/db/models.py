@@ -35,16 +35,20 @@ class Event(SQLModel, table=True):
 
     task_id: UUID = Field(foreign_key="task.id", ondelete="CASCADE")
     task: Task = Relationship(back_populates="events")
-    screenshots: list["Screenshot"] = Relationship(back_populates="event", cascade_delete=True)
+    screenshots: list["Screenshot"] = Relationship(back_populates="event", passive_deletes=True)
 
 
 class Screenshot(SQLModel, table=True):
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     url: str
-    sha256: str
+    thumbnail_url: str | None = None
+    preview_url: str | None = None
+    sha256: str = Field(index=True, unique=True)
+    created_at: datetime = Field(default_factory=datetime.now, index=True)
 
-    event_id: UUID = Field(foreign_key="event.id", ondelete="CASCADE")
-    event: Event = Relationship(back_populates="screenshots")
+    # the event the screenshot was first seen in; later events reuse the row by hash
+    event_id: UUID | None = Field(default=None, foreign_key="event.id", ondelete="SET NULL")
+    event: Event | None = Relationship(back_populates="screenshots")
 
 
 class Media(SQLModel, table=True):
@@ -4,10 +4,14 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from .db.database import init_db
 from backend.api.v1 import (
-    task, message, event, screenshot, media, stream, agent
+    task, message, event, screenshot, media, stream, agent, preview, retention
 )
 from backend.api.websockets import router as websocket_router
 from backend.core.config import get_settings
+from backend.services import display_pool, retention_service
+from computer_use_demo.computer_use_demo.tools.bash import (
+    close_session_pools, get_session_pool
+)
 
 app = FastAPI()
 settings = get_settings()
@@ -31,6 +35,8 @@ app.include_router(screenshot.router)
 app.include_router(media.router)
 app.include_router(stream.router)
 app.include_router(agent.router)
+app.include_router(preview.router)
+app.include_router(retention.router)
 app.include_router(websocket_router)
 
 @app.get("/")
@@ -42,5 +48,16 @@ def health_check():
     return {"status": "healthy", "database": "connected"}
 
 @app.on_event("startup")
-def on_startup():
-    init_db()
\ No newline at end of file
+async def on_startup():
+    init_db()
+    if settings.retention_enabled:
+        retention_service.start()
+    # Start the shells the first tasks will use, so they don't wait for them
+    for display_num in display_pool.displays():
+        get_session_pool(display_num).prewarm()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await retention_service.stop()
+    await close_session_pools()
+    await display_pool.stop()
\ No newline at end of file
@@ -20,6 +20,17 @@ class TaskUpdate(SQLModel):
     status: str | None
 
 
+class TaskUsage(SQLModel):
+    """Resources used by the commands a task ran, summed over its events."""
+    # tool calls that recorded usage; one call may run several processes
+    tool_calls: int = 0
+    wall_time: float = 0.0
+    user_time: float = 0.0
+    system_time: float = 0.0
+    max_rss: int = 0
+    output_bytes: int = 0
+
+
 # ---------- Message ----------
 class MessageCreate(SQLModel):
     task_id: UUID
@@ -48,8 +59,10 @@ class EventRead(EventCreate):
 
 # ---------- Screenshot ----------
 class ScreenshotCreate(SQLModel):
-    event_id: UUID
+    event_id: UUID | None = None
     url: str
+    thumbnail_url: str | None = None
+    preview_url: str | None = None
     sha256: str
 
 
@@ -0,0 +1,2 @@
+from .retention import RetentionService, RetentionMetrics, retention_service
+from .displays import DisplayPool, display_pool
@@ -0,0 +1,172 @@
+import asyncio
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator
+
+from backend.core.config import get_settings
+from computer_use_demo.computer_use_demo.tools.computer import close_display_connections
+
+STARTUP_SCRIPT = "display_startup.sh"
+SHUTDOWN_SCRIPT = "display_shutdown.sh"
+
+
+class DisplayPool:
+    """
+    Leases an X display to each running agent task, so concurrent tasks don't share
+    a screen, mouse and keyboard.
+    - The primary display, the one VNC shows, is leased first.
+    - Up to DISPLAY_POOL_SIZE - 1 more displays are started on demand with
+      display_startup.sh, numbered from DISPLAY_POOL_FIRST.
+    - When its task finishes, a pooled display is restarted so the next task
+      gets a clean desktop. The primary display is left as it is.
+    Tasks wait for a display when every one is leased.
+    """
+    def __init__(self):
+        self._free: list[int | None] | None = None
+        self._leases: dict[str, int | None] = {}
+        self._running: set[int] = set()
+        self._available = asyncio.Condition()
+        self._startup_lock = asyncio.Lock()
+
+    @property
+    def primary(self) -> int | None:
+        settings = get_settings()
+        if settings.display_num is not None:
+            return settings.display_num
+        display_num = os.getenv("DISPLAY_NUM")
+        return int(display_num) if display_num else None
+
+    def displays(self) -> list[int | None]:
+        settings = get_settings()
+        pooled = range(
+            settings.display_pool_first,
+            settings.display_pool_first + settings.display_pool_size - 1,
+        )
+        return [self.primary, *pooled]
+
+    def display_for(self, task_id: str) -> int | None:
+        """The display a task is running on, or the primary display if it has no lease."""
+        return self._leases.get(task_id, self.primary)
+
+    def leases(self) -> dict[str, int | None]:
+        return dict(self._leases)
+
+    @asynccontextmanager
+    async def lease(self, task_id: str) -> AsyncIterator[int | None]:
+        display_num = await self.acquire(task_id)
+        try:
+            yield display_num
+        finally:
+            await self.release(task_id)
+
+    async def acquire(self, task_id: str) -> int | None:
+        """Lease a display to a task, waiting for one to be free and starting it if needed."""
+        async with self._available:
+            if self._free is None:
+                self._free = self.displays()
+            if not self._free:
+                print(f"[Displays] Task {task_id} is waiting for a free display")
+            await self._available.wait_for(lambda: bool(self._free))
+            display_num = self._free.pop(0)
+            self._leases[task_id] = display_num
+        if display_num != self.primary and display_num not in self._running:
+            try:
+                await self._start(display_num)
+            except Exception:
+                await self._give_back(task_id, display_num)
+                raise
+        print(f"[Displays] Task {task_id} leased display :{display_num}")
+        return display_num
+
+    async def release(self, task_id: str):
+        """Return a task's display to the pool, restarting it first if it is pooled."""
+        if task_id not in self._leases:
+            return
+        display_num = self._leases[task_id]
+        if display_num != self.primary:
+            try:
+                await self._stop(display_num)
+                await self._start(display_num)
+            except Exception as e:
+                # acquire() starts it again for the next task
+                print(f"[Displays] Could not recycle display :{display_num}: {e}")
+        await self._give_back(task_id, display_num)
+        print(f"[Displays] Task {task_id} released display :{display_num}")
+
+    async def stop(self):
+        """Stop every pooled display that is running."""
+        for display_num in sorted(self._running):
+            try:
+                await self._stop(display_num)
+            except Exception as e:
+                print(f"[Displays] Could not stop display :{display_num}: {e}")
+
+    async def _give_back(self, task_id: str, display_num: int | None):
+        async with self._available:
+            self._leases.pop(task_id, None)
+            if self._free is not None and display_num not in self._free:
+                self._free.append(display_num)
+            self._available.notify()
+
+    async def _start(self, display_num: int):
+        # the startup scripts share log files, so start one desktop at a time
+        async with self._startup_lock:
+            await _run_script(STARTUP_SCRIPT, display_num)
+        self._running.add(display_num)
+
+    async def _stop(self, display_num: int):
+        # Xlib exits the process when a connection it holds is lost, so close ours
+        # before the server goes away
+        await asyncio.to_thread(close_display_connections, display_num)
+        await _run_script(SHUTDOWN_SCRIPT, display_num)
+        self._running.discard(display_num)
+
+
+async def _run_script(name: str, display_num: int):
+    """
+    Run a display script and wait for it to exit.
+    The desktop processes it starts in the background inherit its output, so it
+    goes to a log file per display rather than to pipes, which would stay open
+    for as long as the desktop runs.
+    """
+    settings = get_settings()
+    script = settings.display_scripts_dir / name
+    log_path = Path(tempfile.gettempdir()) / f"display-{display_num}.log"
+    with open(log_path, "ab") as log:
+        start = log.tell()
+        process = await asyncio.create_subprocess_exec(
+            str(script),
+            str(display_num),
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=log,
+            stderr=log,
+        )
+    try:
+        async with asyncio.timeout(settings.display_script_timeout):
+            await process.wait()
+    except TimeoutError:
+        process.kill()
+        await process.wait()
+        raise RuntimeError(
+            f"{name} timed out after {settings.display_script_timeout} seconds "
+            f"for display :{display_num}, see {log_path}"
+        ) from None
+    if process.returncode:
+        raise RuntimeError(
+            f"{name} failed for display :{display_num}: {_log_tail(log_path, start)}"
+        )
+
+
+def _log_tail(path: Path, start: int, size: int = 2000) -> str:
+    """At most the last `size` bytes written to a log file since `start`."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(max(start, f.seek(0, os.SEEK_END) - size))
+            return f.read().decode(errors="replace").strip()
+    except OSError:
+        return f"see {path}"
+
+
+display_pool = DisplayPool()
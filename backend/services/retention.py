@@ -0,0 +1,234 @@
+import asyncio
+import os
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Iterator
+
+from sqlalchemy import String, cast, exists
+from sqlmodel import Session, select
+
+from backend.core.config import get_settings
+from backend.db import Event, Media, Screenshot, SessionLocal
+from backend.utils import SCREENSHOT_VARIANTS, thumbnail_url, url_to_path, write_variants
+
+UPLOADS_DIR = "uploads"
+
+
+@dataclass
+class RetentionMetrics:
+    """
+    Running totals reported by the retention service.
+    """
+    runs: int = 0
+    files_scanned: int = 0
+    files_deleted: int = 0
+    screenshots_compacted: int = 0
+    rows_deleted: int = 0
+    bytes_reclaimed: int = 0
+    errors: int = 0
+    last_run_at: datetime | None = None
+    last_run_seconds: float = 0.0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class _Batch:
+    deletions: int = 0
+    done: bool = True
+
+
+class RetentionService:
+    """
+    Keeps the uploads volume bounded. Each run works through small batches:
+    - compacts screenshots older than the full-resolution window to a thumbnail,
+    - drops Screenshot rows no event refers to any more,
+    - deletes files under uploads/ that no Screenshot or Media row refers to.
+    Deletions are rate limited, and the orphan file scan resumes where the
+    previous run stopped instead of walking the whole volume every time.
+    """
+    def __init__(self):
+        self.metrics = RetentionMetrics()
+        self._files: Iterator[os.DirEntry] | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self):
+        settings = get_settings()
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.metrics.errors += 1
+                print(f"[Retention] Run failed: {e}")
+            await asyncio.sleep(settings.retention_interval_seconds)
+
+    async def run_once(self):
+        started = time.monotonic()
+        for step in (self._compact_batch, self._orphan_rows_batch, self._orphan_files_batch):
+            while True:
+                batch = await asyncio.to_thread(step)
+                await self._throttle(batch.deletions)
+                if batch.done:
+                    break
+        self.metrics.runs += 1
+        self.metrics.last_run_at = datetime.now()
+        self.metrics.last_run_seconds = time.monotonic() - started
+        print(f"[Retention] Run finished: {self.metrics.to_dict()}")
+
+    async def _throttle(self, deletions: int):
+        rate = get_settings().retention_max_deletes_per_second
+        if deletions and rate > 0:
+            await asyncio.sleep(deletions / rate)
+
+    def _compact_batch(self) -> _Batch:
+        """
+        Replace screenshots past the full-resolution window with their thumbnail,
+        removing the original and the preview variant.
+        """
+        settings = get_settings()
+        cutoff = datetime.now() - timedelta(days=settings.retention_full_res_days)
+        batch = _Batch()
+        with SessionLocal() as session:
+            screenshots = session.exec(
+                select(Screenshot)
+                .where(Screenshot.created_at < cutoff, ~Screenshot.url.endswith(".thumb.jpg"))
+                .limit(settings.retention_batch_size)
+            ).all()
+            for screenshot in screenshots:
+                original = url_to_path(screenshot.url)
+                removed = [screenshot.url, screenshot.preview_url]
+                try:
+                    thumbnail = screenshot.thumbnail_url or thumbnail_url(screenshot.url)
+                    if not os.path.exists(url_to_path(thumbnail)):
+                        write_variants(screenshot.url, {"thumb": SCREENSHOT_VARIANTS["thumb"]})
+                    screenshot.url = thumbnail
+                    screenshot.thumbnail_url = thumbnail
+                    screenshot.preview_url = None
+                    session.add(screenshot)
+                    session.commit()
+                    for url in removed:
+                        if url and url != thumbnail:
+                            self.metrics.bytes_reclaimed += _remove(url_to_path(url))
+                    self.metrics.screenshots_compacted += 1
+                    batch.deletions += 1
+                except OSError as e:
+                    session.rollback()
+                    self.metrics.errors += 1
+                    print(f"[Retention] Could not compact {original}: {e}")
+            batch.done = len(screenshots) < settings.retention_batch_size or not batch.deletions
+        return batch
+
+    def _orphan_rows_batch(self) -> _Batch:
+        """
+        Delete Screenshot rows whose events are all gone; their files are swept as orphans.
+        """
+        settings = get_settings()
+        referenced = exists().where(
+            Event.payload["screenshot_id"].astext == cast(Screenshot.id, String)
+        )
+        with SessionLocal() as session:
+            screenshots = session.exec(
+                select(Screenshot)
+                .where(Screenshot.event_id.is_(None), ~referenced)
+                .limit(settings.retention_batch_size)
+            ).all()
+            for screenshot in screenshots:
+                session.delete(screenshot)
+            session.commit()
+        self.metrics.rows_deleted += len(screenshots)
+        return _Batch(
+            deletions=len(screenshots),
+            done=len(screenshots) < settings.retention_batch_size,
+        )
+
+    def _orphan_files_batch(self) -> _Batch:
+        """
+        Check the next batch of stored files and delete the ones nothing refers to.
+        Files younger than the grace period are kept, since the row pointing at a
+        freshly written file may not be committed yet.
+        """
+        settings = get_settings()
+        if self._files is None:
+            self._files = _walk(UPLOADS_DIR)
+        entries: list[os.DirEntry] = []
+        for entry in self._files:
+            entries.append(entry)
+            if len(entries) >= settings.retention_batch_size:
+                break
+        else:
+            self._files = None
+
+        self.metrics.files_scanned += len(entries)
+        grace_cutoff = time.time() - settings.retention_orphan_grace_seconds
+        urls = {f"/{entry.path.replace(os.sep, '/')}": entry for entry in entries}
+        with SessionLocal() as session:
+            referenced = _referenced_urls(session, list(urls))
+
+        batch = _Batch(done=self._files is None)
+        for url, entry in urls.items():
+            if url in referenced:
+                continue
+            try:
+                if entry.stat().st_mtime > grace_cutoff:
+                    continue
+                self.metrics.bytes_reclaimed += _remove(entry.path)
+                self.metrics.files_deleted += 1
+                batch.deletions += 1
+            except OSError as e:
+                self.metrics.errors += 1
+                print(f"[Retention] Could not delete {entry.path}: {e}")
+        return batch
+
+
+def _referenced_urls(session: Session, urls: list[str]) -> set[str]:
+    if not urls:
+        return set()
+    referenced = set()
+    for column in (Screenshot.url, Screenshot.thumbnail_url, Screenshot.preview_url):
+        referenced.update(session.exec(select(column).where(column.in_(urls))).all())
+    referenced.update(session.exec(select(Media.url).where(Media.url.in_(urls))).all())
+    return referenced
+
+
+def _walk(directory: str) -> Iterator[os.DirEntry]:
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from _walk(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+    except FileNotFoundError:
+        return
+
+
+def _remove(path: str) -> int:
+    """
+    Deletes a file and returns the number of bytes freed.
+    """
+    try:
+        size = os.path.getsize(path)
+        os.remove(path)
+    except FileNotFoundError:
+        return 0
+    return size
+
+
+retention_service = RetentionService()
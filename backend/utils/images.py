@@ -2,21 +2,93 @@ import os
 import uuid
 import base64
 import hashlib
+from PIL import Image
 
-def save_screenshot_and_return_url(base64_data: str) -> str:
+IMAGE_EXTENSIONS = {
+    "image/png": "png",
+    "image/webp": "webp",
+    "image/jpeg": "jpg",
+}
+
+def store_screenshot(base64_data: str, media_type: str | None = None) -> tuple[str, str]:
     """
-    Saves base64 PNG screenshot to disk and returns its public URL path.
+    Saves a base64 screenshot in the content-addressed store and returns its
+    public URL path and SHA-256. Files live at uploads/<sha[:2]>/<sha>.<ext> and
+    are only written when that content isn't stored yet.
     """
-    os.makedirs("uploads", exist_ok=True)
     image_data = base64.b64decode(base64_data)
+    sha = hashlib.sha256(image_data).hexdigest()
+    extension = IMAGE_EXTENSIONS.get(media_type or "image/png", "png")
+    relative_path = f"{sha[:2]}/{sha}.{extension}"
+    file_path = os.path.join("uploads", relative_path)
+
+    if not os.path.exists(file_path):
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        # write to a temporary name first so readers never see a partial file
+        temp_path = f"{file_path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(image_data)
+        os.replace(temp_path, file_path)
+
+    return f"/uploads/{relative_path}", sha
+
+
+def url_to_path(url: str) -> str:
+    """
+    Maps a public /uploads URL back to its path on disk.
+    """
+    return url.lstrip("/")
+
+
+# resized copies stored next to each screenshot, largest first
+SCREENSHOT_VARIANTS = {
+    "preview": (960, 600),
+    "thumb": (320, 200),
+}
 
-    file_id = str(uuid.uuid4())
-    file_path = f"uploads/{file_id}.png"
 
-    with open(file_path, "wb") as f:
-        f.write(image_data)
+def variant_url(url: str, variant: str) -> str:
+    """
+    Returns the URL of a resized variant stored next to a screenshot.
+    """
+    return f"{url.rsplit('.', 1)[0]}.{variant}.jpg"
+
 
-    return f"/uploads/{file_id}.png"
+def thumbnail_url(url: str) -> str:
+    """
+    Returns the URL of the thumbnail stored next to a screenshot.
+    """
+    return variant_url(url, "thumb")
+
+
+def write_variants(url: str, variants: dict[str, tuple[int, int]] = SCREENSHOT_VARIANTS) -> dict[str, str]:
+    """
+    Writes JPEG variants of a stored screenshot that don't exist yet and returns
+    their URLs by variant name. The image is decoded once, and each variant is
+    resized from the previous, larger one.
+    """
+    urls = {name: variant_url(url, name) for name in variants}
+    missing = [name for name in variants if not os.path.exists(url_to_path(urls[name]))]
+    if not missing:
+        return urls
+
+    with Image.open(url_to_path(url)) as source:
+        image = source.convert("RGB")
+    for name in missing:
+        image.thumbnail(variants[name], Image.Resampling.LANCZOS)
+        target_path = url_to_path(urls[name])
+        temp_path = f"{target_path}.{uuid.uuid4().hex}.tmp"
+        image.save(temp_path, format="JPEG", quality=70, optimize=True)
+        os.replace(temp_path, target_path)
+    return urls
+
+
+def save_screenshot_and_return_url(base64_data: str, media_type: str | None = None) -> str:
+    """
+    Saves base64 screenshot to disk and returns its public URL path.
+    """
+    url, _ = store_screenshot(base64_data, media_type)
+    return url
 
 
 def compute_sha256(data: bytes | str) -> str:
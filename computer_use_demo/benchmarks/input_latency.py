@@ -0,0 +1,67 @@
+"""
+Compare per-action latency of the in-process XTEST input backend with xdotool.
+
+Run inside the container, from the computer_use_demo directory:
+
+    python -m benchmarks.input_latency --iterations 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from computer_use_demo.tools.computer import BaseComputerTool, InputBackend
+from computer_use_demo.tools.xinput import get_injector
+
+ACTIONS = {
+    "mouse_move": "mousemove --sync {x} {y}",
+    "click": "mousemove --sync {x} {y} click 1",
+    "key": "key -- shift",
+    "type (10 chars)": "type --delay 12 -- 0123456789",
+}
+
+
+async def time_action(
+    backend: InputBackend, command: str, iterations: int
+) -> list[float]:
+    tool = BaseComputerTool()
+    tool._input_backend = backend
+    timings = []
+    for index in range(iterations):
+        # alternate positions so every move actually moves the pointer
+        x, y = (10, 10) if index % 2 else (20, 20)
+        start = time.perf_counter()
+        await tool.shell(
+            f"{tool.xdotool} {command.format(x=x, y=y)}", take_screenshot=False
+        )
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(label: str, timings: list[float]):
+    print(
+        f"{label:<32} median {statistics.median(timings) * 1000:8.2f} ms"
+        f"   p95 {sorted(timings)[int(len(timings) * 0.95) - 1] * 1000:8.2f} ms"
+        f"   n={len(timings)}"
+    )
+
+
+async def main(iterations: int):
+    tool = BaseComputerTool()
+    if get_injector(tool.display_num) is None:
+        print(f"XTEST is unavailable on display {tool.display_num}, xdotool only")
+        backends: list[InputBackend] = ["xdotool"]
+    else:
+        backends = ["xtest", "xdotool"]
+    for name, command in ACTIONS.items():
+        for backend in backends:
+            report(
+                f"{name} ({backend})", await time_action(backend, command, iterations)
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=50)
+    asyncio.run(main(parser.parse_args().iterations))
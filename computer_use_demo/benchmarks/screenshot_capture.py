@@ -0,0 +1,69 @@
+"""
+Compare screenshot latency of the in-process X11 capture with the shell fallback.
+
+Run inside the container, from the computer_use_demo directory:
+
+    python -m benchmarks.screenshot_capture --iterations 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from computer_use_demo.tools.computer import BaseComputerTool, CaptureBackend
+from computer_use_demo.tools.screen import get_screen
+
+
+async def time_screenshots(backend: CaptureBackend, iterations: int) -> list[float]:
+    tool = BaseComputerTool()
+    tool._capture_backend = backend
+    # warm up connections and caches before measuring
+    await tool.screenshot()
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await tool.screenshot()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def time_raw_capture(display_num: int | None, iterations: int) -> list[float]:
+    screen = get_screen(display_num)
+    if screen is None:
+        return []
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        screen.capture()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(label: str, timings: list[float]):
+    if not timings:
+        print(f"{label:<28} unavailable")
+        return
+    print(
+        f"{label:<28} median {statistics.median(timings) * 1000:8.1f} ms"
+        f"   p95 {sorted(timings)[int(len(timings) * 0.95) - 1] * 1000:8.1f} ms"
+        f"   n={len(timings)}"
+    )
+
+
+async def main(iterations: int):
+    tool = BaseComputerTool()
+    screen = get_screen(tool.display_num)
+    if screen is not None:
+        print(
+            f"display {tool.display_num}: {screen.width}x{screen.height}, MIT-SHM: {screen.uses_shm}"
+        )
+    report("raw frame (x11)", time_raw_capture(tool.display_num, iterations))
+    report("screenshot (x11)", await time_screenshots("x11", iterations))
+    report("screenshot (shell)", await time_screenshots("shell", iterations))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20)
+    asyncio.run(main(parser.parse_args().iterations))
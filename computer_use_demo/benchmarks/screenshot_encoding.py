@@ -0,0 +1,85 @@
+"""
+Compare screenshot encoding profiles by encode time, payload size and image tokens.
+
+Run inside the container, from the computer_use_demo directory, to encode the
+current screen:
+
+    python -m benchmarks.screenshot_encoding --iterations 10
+
+or pass `--image path/to/screenshot.png` to encode a saved screenshot instead.
+Image tokens depend only on the image dimensions, so they are the same for
+every profile; the payload size is what changes.
+"""
+
+import argparse
+import base64
+import statistics
+import time
+from pathlib import Path
+
+import numpy as np
+
+from computer_use_demo.tools.computer import BaseComputerTool, ScalingSource
+from computer_use_demo.tools.imaging import EncodingProfile, decode, encode, resize
+from computer_use_demo.tools.screen import get_screen
+
+PROFILES = [
+    "png:1",
+    "png:6",
+    "png:9",
+    "webp-lossless",
+    "webp:90",
+    "webp:75",
+    "jpeg:90",
+    "jpeg:75",
+]
+
+
+def estimate_tokens(width: int, height: int) -> int:
+    """Approximate image tokens, as documented for the vision API."""
+    return round(width * height / 750)
+
+
+def load_pixels(image: Path | None) -> np.ndarray:
+    tool = BaseComputerTool()
+    if image is not None:
+        pixels = decode(image.read_bytes())
+    else:
+        screen = get_screen(tool.display_num)
+        if screen is None:
+            raise SystemExit("no X display available, pass --image instead")
+        pixels = screen.capture().pixels
+    tool.width, tool.height = pixels.shape[1], pixels.shape[0]
+    width, height = tool.scale_coordinates(
+        ScalingSource.COMPUTER, tool.width, tool.height
+    )
+    return resize(pixels, width, height)
+
+
+def main(image: Path | None, iterations: int):
+    pixels = load_pixels(image)
+    height, width = pixels.shape[:2]
+    tokens = estimate_tokens(width, height)
+    print(f"{width}x{height}, ~{tokens} image tokens per screenshot")
+    for spec in PROFILES:
+        profile = EncodingProfile.parse(spec)
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            data = encode(pixels, profile)
+            timings.append(time.perf_counter() - start)
+        payload = len(base64.b64encode(data))
+        print(
+            f"{profile.name:<16} encode {statistics.median(timings) * 1000:8.1f} ms"
+            f"   {len(data) / 1024:8.1f} KiB"
+            f"   base64 {payload / 1024:8.1f} KiB"
+            f"   tokens ~{tokens}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--image", type=Path)
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+    main(args.image, args.iterations)
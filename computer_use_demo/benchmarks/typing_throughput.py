@@ -0,0 +1,52 @@
+"""
+Compare how long the `type` action takes to enter text key by key and by pasting.
+
+Focus an editable window (a text editor or terminal) inside the container, then
+run from the computer_use_demo directory:
+
+    python -m benchmarks.typing_throughput --sizes 100 1000 5000
+
+Every run enters its text into the focused window, so use a scratch document.
+"""
+
+import argparse
+import asyncio
+import time
+
+from computer_use_demo.tools.clipboard import get_clipboard
+from computer_use_demo.tools.computer import BaseComputerTool, TypingMode
+
+
+async def time_typing(mode: TypingMode, size: int) -> float:
+    tool = BaseComputerTool()
+    tool._typing_mode = mode
+    # measure text entry only, not the screenshot that follows it
+    tool._screenshots_deferred = True
+    text = ("The quick brown fox jumps over the lazy dog. " * (size // 45 + 1))[:size]
+    start = time.perf_counter()
+    await tool(action="type", text=text)
+    return time.perf_counter() - start
+
+
+async def main(sizes: list[int]):
+    tool = BaseComputerTool()
+    clipboard = get_clipboard(tool.display_num)
+    if clipboard is None:
+        print(f"The clipboard is unavailable on display {tool.display_num}")
+        modes: list[TypingMode] = ["keys"]
+    else:
+        print(f"Typing into window class {clipboard.focused_window_class()!r}")
+        modes = ["keys", "paste"]
+    for size in sizes:
+        for mode in modes:
+            elapsed = await time_typing(mode, size)
+            print(
+                f"{size:>6} chars ({mode:<5}) {elapsed * 1000:10.1f} ms"
+                f"   {size / elapsed:10.0f} chars/s"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    asyncio.run(main(parser.parse_args().sizes))
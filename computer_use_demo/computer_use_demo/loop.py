@@ -2,8 +2,9 @@
 Agentic sampling loop that calls the Anthropic API and local implementation of anthropic-defined computer use tools.
 """
 
+import inspect
 import platform
-from collections.abc import Callable
+from collections.abc import Awaitable, Callable
 from datetime import datetime
 from enum import StrEnum
 from typing import Any, cast
@@ -31,10 +32,16 @@ from anthropic.types.beta import (
 
 from .tools import (
     TOOL_GROUPS_BY_VERSION,
+    BashTool20250124,
+    ToolCall,
     ToolCollection,
     ToolResult,
     ToolVersion,
+    defer_screenshots,
+    run_tool_calls,
 )
+from .tools.base import BaseAnthropicTool
+from .tools.computer import BaseComputerTool
 from backend.api.v1.stream import publish_task_event
 
 PROMPT_CACHING_BETA_FLAG = "prompt-caching-2024-07-31"
@@ -63,8 +70,14 @@ SYSTEM_PROMPT = f"""<SYSTEM_CAPABILITY>
 * To open firefox, use the bash tool with: "DISPLAY=:1 setsid firefox-esr > /dev/null 2>&1 &" (setsid detaches from terminal). Wait a few seconds, then take a screenshot to verify it launched. Do NOT try to click on taskbar icons that may not be running.
 * Using bash tool you can start GUI applications, but you need to set DISPLAY=:1 and redirect output. For example "DISPLAY=:1 setsid xterm > /dev/null 2>&1 &". Always use setsid (or nohup) and redirect output when launching GUI apps in background. GUI apps will appear within your desktop environment, but they may take some time to appear. Take a screenshot to confirm it launched.
 * When using your bash tool with commands that are expected to output very large quantities of text, redirect into a tmp file and use str_replace_based_edit_tool or `grep -n -B <lines before> -A <lines after> <query> <filename>` to confirm output.
+* Bash tool results note a non-zero exit code and a change of working directory, so there is no need to run `echo $?` or `pwd` after a command.
 * When viewing a page it can be helpful to zoom out so that you can see everything on the page.  Either that, or make sure you scroll down to see everything before deciding something isn't available.
+* To read small text or details, use the computer tool's "zoom" action with a "region" of [x0, y0, x1, y1] in screenshot coordinates. It returns just that area at the display's full resolution.
 * When using your computer function calls, they take a while to run and send back to you.  Where possible/feasible, try to chain multiple of these calls all into one function calls request.
+* For routine sequences such as clicking a field, typing and pressing Enter, use the computer tool's "batch" action with "actions": a list of the usual action objects, each with an optional "pause" in seconds. They run in order, stop at the first failure, and return a single screenshot at the end.
+* Instead of repeating "wait" and "screenshot" while something loads, use the computer tool's "wait_for" action with a "condition": "change" (the screen changes), "stable" (it changes and then settles) or "text" (the given "text" appears). Add a "region" to watch only part of the screen and a "duration" timeout in seconds (default 10, at most 60). It returns one screenshot once the condition holds or the timeout expires.
+* Computer action results list the regions that changed since the previous screenshot as [x0, y0, x1, y1] boxes. If none are listed, or the screen is reported unchanged, the action had no visible effect.
+* When you make several computer tool calls in one turn, only the last one returns a screenshot; the earlier ones return text only. Add a "screenshot" action between them if you need to see an intermediate state.
 * The current date is {today_str}.
 </SYSTEM_CAPABILITY>
 
@@ -81,7 +94,7 @@ async def sampling_loop(
     system_prompt_suffix: str,
     messages: list[BetaMessageParam],
     output_callback: Callable[[BetaContentBlockParam], None],
-    tool_output_callback: Callable[[ToolResult, str], None],
+    tool_output_callback: Callable[[ToolResult, str], Awaitable[None] | None],
     api_response_callback: Callable[
         [httpx.Request, httpx.Response | object | None, Exception | None], None
     ],
@@ -91,105 +104,142 @@ async def sampling_loop(
     tool_version: ToolVersion,
     thinking_budget: int | None = None,
     token_efficient_tools_beta: bool = False,
+    display_num: int | None = None,
+    tool_output_delta_callback: Callable[[str, str, str], None] | None = None,
 ):
     """
     Agentic sampling loop for the assistant/tool interaction of computer use.
+    `display_num` runs the tools on that X display instead of $DISPLAY_NUM.
+    `tool_output_delta_callback` receives (tool_use_id, stream, text) as a bash
+    command produces output; the full output still goes to `tool_output_callback`.
     """
     tool_group = TOOL_GROUPS_BY_VERSION[tool_version]
-    tool_collection = ToolCollection(*(ToolCls() for ToolCls in tool_group.tools))
+    tool_collection = ToolCollection(
+        *(_make_tool(ToolCls, display_num) for ToolCls in tool_group.tools)
+    )
+    system_prompt = SYSTEM_PROMPT
+    if display_num is not None:
+        system_prompt = system_prompt.replace("DISPLAY=:1", f"DISPLAY=:{display_num}")
     system = BetaTextBlockParam(
         type="text",
-        text=f"{SYSTEM_PROMPT}{' ' + system_prompt_suffix if system_prompt_suffix else ''}",
+        text=f"{system_prompt}{' ' + system_prompt_suffix if system_prompt_suffix else ''}",
     )
 
-    while True:
-        enable_prompt_caching = False
-        betas = [tool_group.beta_flag] if tool_group.beta_flag else []
-        if token_efficient_tools_beta:
-            betas.append("token-efficient-tools-2025-02-19")
-        image_truncation_threshold = only_n_most_recent_images or 0
-        if provider == APIProvider.ANTHROPIC:
-            client = Anthropic(api_key=api_key, max_retries=4)
-            enable_prompt_caching = True
-        elif provider == APIProvider.VERTEX:
-            client = AnthropicVertex()
-        elif provider == APIProvider.BEDROCK:
-            client = AnthropicBedrock()
-
-        if enable_prompt_caching:
-            betas.append(PROMPT_CACHING_BETA_FLAG)
-            _inject_prompt_caching(messages)
-            # Because cached reads are 10% of the price, we don't think it's
-            # ever sensible to break the cache by truncating images
-            only_n_most_recent_images = 0
-            # Use type ignore to bypass TypedDict check until SDK types are updated
-            system["cache_control"] = {"type": "ephemeral"}  # type: ignore
-
-        if only_n_most_recent_images:
-            _maybe_filter_to_n_most_recent_images(
-                messages,
-                only_n_most_recent_images,
-                min_removal_threshold=image_truncation_threshold,
-            )
-        extra_body = {}
-        if thinking_budget:
-            # Ensure we only send the required fields for thinking
-            extra_body = {
-                "thinking": {"type": "enabled", "budget_tokens": thinking_budget}
-            }
-
-        # Call the API
-        # we use raw_response to provide debug information to streamlit. Your
-        # implementation may be able call the SDK directly with:
-        # `response = client.messages.create(...)` instead.
-        try:
-            raw_response = client.beta.messages.with_raw_response.create(
-                max_tokens=max_tokens,
-                messages=messages,
-                model=model,
-                system=[system],
-                tools=tool_collection.to_params(),
-                betas=betas,
-                extra_body=extra_body,
-            )
-        except (APIStatusError, APIResponseValidationError) as e:
-            api_response_callback(e.request, e.response, e)
-            return messages
-        except APIError as e:
-            api_response_callback(e.request, e.body, e)
-            return messages
-
-        api_response_callback(
-            raw_response.http_response.request, raw_response.http_response, None
-        )
-
-        response = raw_response.parse()
-
-        response_params = _response_to_params(response)
-        messages.append(
-            {
-                "role": "assistant",
-                "content": response_params,
-            }
-        )
-
-        tool_result_content: list[BetaToolResultBlockParam] = []
-        for content_block in response_params:
-            output_callback(content_block)
-            if content_block["type"] == "tool_use":
-                result = await tool_collection.run(
-                    name=content_block["name"],
-                    tool_input=cast(dict[str, Any], content_block["input"]),
+    try:
+        while True:
+            enable_prompt_caching = False
+            betas = [tool_group.beta_flag] if tool_group.beta_flag else []
+            if token_efficient_tools_beta:
+                betas.append("token-efficient-tools-2025-02-19")
+            image_truncation_threshold = only_n_most_recent_images or 0
+            if provider == APIProvider.ANTHROPIC:
+                client = Anthropic(api_key=api_key, max_retries=4)
+                enable_prompt_caching = True
+            elif provider == APIProvider.VERTEX:
+                client = AnthropicVertex()
+            elif provider == APIProvider.BEDROCK:
+                client = AnthropicBedrock()
+
+            if enable_prompt_caching:
+                betas.append(PROMPT_CACHING_BETA_FLAG)
+                _inject_prompt_caching(messages)
+                # Because cached reads are 10% of the price, we don't think it's
+                # ever sensible to break the cache by truncating images
+                only_n_most_recent_images = 0
+                # Use type ignore to bypass TypedDict check until SDK types are updated
+                system["cache_control"] = {"type": "ephemeral"}  # type: ignore
+
+            if only_n_most_recent_images:
+                _maybe_filter_to_n_most_recent_images(
+                    messages,
+                    only_n_most_recent_images,
+                    min_removal_threshold=image_truncation_threshold,
                 )
-                tool_result_content.append(
-                    _make_api_tool_result(result, content_block["id"])
+            extra_body = {}
+            if thinking_budget:
+                # Ensure we only send the required fields for thinking
+                extra_body = {
+                    "thinking": {"type": "enabled", "budget_tokens": thinking_budget}
+                }
+
+            # Call the API
+            # we use raw_response to provide debug information to streamlit. Your
+            # implementation may be able call the SDK directly with:
+            # `response = client.messages.create(...)` instead.
+            try:
+                raw_response = client.beta.messages.with_raw_response.create(
+                    max_tokens=max_tokens,
+                    messages=messages,
+                    model=model,
+                    system=[system],
+                    tools=tool_collection.to_params(),
+                    betas=betas,
+                    extra_body=extra_body,
                 )
-                tool_output_callback(result, content_block["id"])
+            except (APIStatusError, APIResponseValidationError) as e:
+                api_response_callback(e.request, e.response, e)
+                return messages
+            except APIError as e:
+                api_response_callback(e.request, e.body, e)
+                return messages
+
+            api_response_callback(
+                raw_response.http_response.request, raw_response.http_response, None
+            )
+
+            response = raw_response.parse()
 
-        if not tool_result_content:
-            return messages
+            response_params = _response_to_params(response)
+            messages.append(
+                {
+                    "role": "assistant",
+                    "content": response_params,
+                }
+            )
 
-        messages.append({"content": tool_result_content, "role": "user"})
+            tool_calls: list[ToolCall] = []
+            for content_block in response_params:
+                output_callback(content_block)
+                if content_block["type"] == "tool_use":
+                    tool_calls.append(
+                        ToolCall(
+                            id=content_block["id"],
+                            name=content_block["name"],
+                            tool_input=cast(dict[str, Any], content_block["input"]),
+                        )
+                    )
+
+            # independent calls run concurrently; results still come back in call order.
+            # only the last computer action is followed by a screenshot
+            tool_result_content: list[BetaToolResultBlockParam] = []
+            async for tool_call, result in run_tool_calls(
+                tool_collection,
+                defer_screenshots(tool_calls),
+                tool_output_delta_callback,
+            ):
+                tool_result_content.append(_make_api_tool_result(result, tool_call.id))
+                callback_result = tool_output_callback(result, tool_call.id)
+                if inspect.isawaitable(callback_result):
+                    await callback_result
+
+            if not tool_result_content:
+                return messages
+
+            messages.append({"content": tool_result_content, "role": "user"})
+    finally:
+        # shell sessions go back to their pool for the next run
+        await tool_collection.close()
+
+
+def _make_tool(
+    ToolCls: type[BaseAnthropicTool], display_num: int | None
+) -> BaseAnthropicTool:
+    """Bind the tools that use a display to the given one, if any."""
+    if display_num is not None and issubclass(
+        ToolCls, (BaseComputerTool, BashTool20250124)
+    ):
+        return ToolCls(display_num=display_num)
+    return ToolCls()
 
 
 def _maybe_filter_to_n_most_recent_images(
@@ -312,7 +362,7 @@ def _make_api_tool_result(
                     "type": "image",
                     "source": {
                         "type": "base64",
-                        "media_type": "image/png",
+                        "media_type": result.media_type or "image/png",
                         "data": result.base64_image,
                     },
                 }
@@ -4,6 +4,7 @@ from .collection import ToolCollection
 from .computer import ComputerTool20241022, ComputerTool20250124
 from .edit import EditTool20241022, EditTool20250124, EditTool20250429
 from .groups import TOOL_GROUPS_BY_VERSION, ToolVersion
+from .scheduler import ToolCall, defer_screenshots, run_tool_calls
 
 __ALL__ = [
     BashTool20241022,
@@ -14,8 +15,11 @@ __ALL__ = [
     EditTool20241022,
     EditTool20250124,
     EditTool20250429,
+    ToolCall,
     ToolCollection,
     ToolResult,
     ToolVersion,
     TOOL_GROUPS_BY_VERSION,
+    defer_screenshots,
+    run_tool_calls,
 ]
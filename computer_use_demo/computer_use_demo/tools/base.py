@@ -1,13 +1,45 @@
 from abc import ABCMeta, abstractmethod
+from collections.abc import Callable
 from dataclasses import dataclass, fields, replace
 from typing import Any
 
 from anthropic.types.beta import BetaToolUnionParam
 
+from .usage import ResourceUsage, sum_usage
+
+# claimed exclusively by tools that may change any file, and shared by tools that
+# change specific files, so the former never run alongside the latter
+FILES_RESOURCE = "files"
+
+# receives a tool's output while it runs, as (stream, text) where the stream is
+# "stdout" or "stderr"
+OutputCallback = Callable[[str, str], None]
+
+
+@dataclass(frozen=True)
+class ResourceClaim:
+    """
+    A resource a tool call uses while it runs. Two calls conflict, and must not run
+    at the same time, when they claim the same resource and either claim is exclusive.
+    """
+
+    resource: str
+    exclusive: bool = True
+
+    def conflicts_with(self, other: "ResourceClaim") -> bool:
+        return self.resource == other.resource and (self.exclusive or other.exclusive)
+
 
 class BaseAnthropicTool(metaclass=ABCMeta):
     """Abstract base class for Anthropic-defined tools."""
 
+    def resources(self, tool_input: dict[str, Any]) -> list[ResourceClaim]:
+        """
+        The resources a call with this input uses. By default a tool claims itself
+        exclusively, so its calls run one at a time.
+        """
+        return [ResourceClaim(f"tool:{self.to_params()['name']}")]
+
     @abstractmethod
     def __call__(self, **kwargs) -> Any:
         """Executes the tool with the given arguments."""
@@ -27,7 +59,10 @@ class ToolResult:
     output: str | None = None
     error: str | None = None
     base64_image: str | None = None
+    media_type: str | None = None
     system: str | None = None
+    # what the commands run for the result used, where it was measured
+    usage: ResourceUsage | None = None
 
     def __bool__(self):
         return any(getattr(self, field.name) for field in fields(self))
@@ -46,7 +81,9 @@ class ToolResult:
             output=combine_fields(self.output, other.output),
             error=combine_fields(self.error, other.error),
             base64_image=combine_fields(self.base64_image, other.base64_image, False),
+            media_type=combine_fields(self.media_type, other.media_type, False),
             system=combine_fields(self.system, other.system),
+            usage=sum_usage([self.usage, other.usage]),
         )
 
     def replace(self, **kwargs):
@@ -54,9 +91,19 @@ class ToolResult:
         return replace(self, **kwargs)
 
 
+@dataclass(kw_only=True, frozen=True)
 class CLIResult(ToolResult):
     """A ToolResult that can be rendered as a CLI output."""
 
+    exit_code: int | None = None
+    cwd: str | None = None  # working directory after the command
+    # bytes written to each stream, including any part clipped from the text above
+    output_size: int | None = None
+    error_size: int | None = None
+    # where a clipped stream was saved in full
+    output_file: str | None = None
+    error_file: str | None = None
+
 
 class ToolFailure(ToolResult):
     """A ToolResult that represents a failure."""
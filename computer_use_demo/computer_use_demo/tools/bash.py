@@ -1,8 +1,58 @@
 import asyncio
+import codecs
 import os
+import re
+import shlex
+import shutil
+import signal
+import tempfile
+from collections.abc import Sequence
 from typing import Any, Literal
 
-from .base import BaseAnthropicTool, CLIResult, ToolError, ToolResult
+from .base import (
+    FILES_RESOURCE,
+    BaseAnthropicTool,
+    CLIResult,
+    OutputCallback,
+    ResourceClaim,
+    ToolError,
+    ToolResult,
+)
+from .run import OutputCapture
+from .usage import ProcessTreeMonitor, descendants
+
+STREAMED_OUTPUT_TRUNCATED = (
+    "\n<live output truncated: the rest is only in the tool result>\n"
+)
+
+
+# numbered, as each command's stderr ends with it
+_STDERR_SENTINEL = re.compile(r"<<exit-\d+>>\n?")
+
+
+class _CappedOutput:
+    """
+    Passes at most `limit` characters of a command's output to `on_output`, then a
+    single note that the rest is left out, so a command that prints without end
+    does not flood whoever follows its output.
+    """
+
+    def __init__(self, on_output: OutputCallback, limit: int):
+        self._on_output = on_output
+        self._remaining = limit
+        self.done = False
+
+    def __call__(self, stream: str, text: str):
+        if self.done:
+            return
+        if len(text) <= self._remaining:
+            self._remaining -= len(text)
+            self._on_output(stream, text)
+            return
+        if self._remaining:
+            self._on_output(stream, text[: self._remaining])
+        self._on_output(stream, STREAMED_OUTPUT_TRUNCATED)
+        self.done = True
 
 
 class _BashSession:
@@ -12,18 +62,40 @@ class _BashSession:
     _process: asyncio.subprocess.Process
 
     command: str = "/bin/bash"
-    _output_delay: float = 0.2  # seconds
+    _read_size: int = 64 * 1024  # bytes
+    _streamed_output_limit: int = 256 * 1024  # characters per command
     _timeout: float = 120.0  # seconds
+    # how long stderr is read for after the command has finished on stdout
+    _stderr_grace: float = 0.25  # seconds
     _sentinel: str = "<<exit>>"
 
-    def __init__(self):
+    def __init__(self, display_num: int | None = None):
         self._started = False
         self._timed_out = False
+        self._display_num = display_num
+        self.used = False
+        self._spill_dir: str | None = None
+        self._shell_pid: int | None = None
+        self._commands = 0
+        # the stderr sentinel of a command whose stderr was not read to the end
+        self._stale_stderr: str | None = None
+        # bash starts where this process is
+        self._cwd = os.getcwd()
+
+    @property
+    def alive(self) -> bool:
+        """Whether the shell is running and can take another command."""
+        return (
+            self._started and self._process.returncode is None and not self._timed_out
+        )
 
     async def start(self):
         if self._started:
             return
 
+        env = None
+        if self._display_num is not None:
+            env = {**os.environ, "DISPLAY": f":{self._display_num}"}
         self._process = await asyncio.create_subprocess_shell(
             self.command,
             preexec_fn=os.setsid,
@@ -32,20 +104,120 @@ class _BashSession:
             stdin=asyncio.subprocess.PIPE,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
+            env=env,
+        )
+        # output too long to return is saved here, where later commands can search it
+        self._spill_dir = os.path.join(
+            tempfile.gettempdir(), "bash-output", str(self._process.pid)
         )
 
         self._started = True
 
+    async def _read_until_sentinel(
+        self,
+        stream: asyncio.StreamReader,
+        capture: OutputCapture,
+        on_output: _CappedOutput | None = None,
+        name: str = "stdout",
+        sentinel_text: str | None = None,
+    ) -> str | None:
+        """
+        Read a stream as data arrives into `capture` until the sentinel, or
+        `sentinel_text` if given, and return
+        the rest of the sentinel's line, or None if the stream ended first.
+        Only the bytes that could still be the start of a sentinel split across reads
+        are held back, so memory stays bounded however long the output is.
+        Anything after the sentinel's line is dropped.
+        Output is also passed to `on_output` as it is captured, labelled with the
+        stream `name`.
+        """
+        sentinel = (sentinel_text or self._sentinel).encode()
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+        def keep(data: bytes, final: bool = False):
+            capture.write(data)
+            if on_output is not None and not on_output.done:
+                text = decoder.decode(data, final=final)
+                if text:
+                    on_output(name, text)
+
+        pending = b""
+        while chunk := await stream.read(self._read_size):
+            pending += chunk
+            index = pending.find(sentinel)
+            if index != -1:
+                keep(pending[:index], final=True)
+                trailer = pending[index + len(sentinel) :]
+                while b"\n" not in trailer and (
+                    chunk := await stream.read(self._read_size)
+                ):
+                    trailer += chunk
+                return trailer.split(b"\n", 1)[0].decode(errors="replace")
+            held = len(sentinel) - 1
+            keep(pending[:-held])
+            pending = pending[-held:]
+        keep(pending, final=True)
+        return None
+
+    async def _discard_stale_stderr(self):
+        """
+        Read and drop what is left of an earlier command's stderr, up to its
+        sentinel, so it is not reported as the next command's. Gives up after the
+        grace period, e.g. when the shell's stderr is redirected and the sentinel
+        never comes; a sentinel that turns up later is stripped from the output it
+        ends up in.
+        """
+        assert self._process.stderr and self._stale_stderr
+        try:
+            async with asyncio.timeout(self._stderr_grace):
+                await self._read_until_sentinel(
+                    self._process.stderr,
+                    OutputCapture(head=0, tail=0),
+                    sentinel_text=self._stale_stderr,
+                )
+        except TimeoutError:
+            pass
+        self._stale_stderr = None
+
+    def _status_note(self, trailer: str) -> tuple[int | None, str | None, str | None]:
+        """
+        Parse the exit code and working directory that follow the stdout sentinel,
+        and describe them for the model when they are worth a mention: a failing
+        command, or a new working directory.
+        """
+        status, _, cwd = trailer.strip().partition(" ")
+        try:
+            exit_code = int(status)
+        except ValueError:
+            return None, None, None
+        notes = []
+        if exit_code != 0:
+            notes.append(f"exit code {exit_code}")
+        if cwd and cwd != self._cwd:
+            notes.append(f"working directory is now {cwd}")
+            self._cwd = cwd
+        return exit_code, cwd or None, "; ".join(notes) or None
+
     def stop(self):
         """Terminate the bash shell."""
         if not self._started:
             raise ToolError("Session has not started.")
         if self._process.returncode is not None:
             return
-        self._process.terminate()
+        # /bin/sh may run bash as a child rather than exec it, and commands may have
+        # left jobs behind, so signal the whole process group the session leads
+        try:
+            os.killpg(self._process.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        if self._spill_dir is not None:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
 
-    async def run(self, command: str):
-        """Execute a command in the bash shell."""
+    async def run(self, command: str, on_output: OutputCallback | None = None):
+        """
+        Execute a command in the bash shell. `on_output` receives the output as it
+        is produced, up to a limit; the result still carries all of it.
+        """
         if not self._started:
             raise ToolError("Session has not started.")
         if self._process.returncode is not None:
@@ -57,6 +229,7 @@ class _BashSession:
             raise ToolError(
                 f"timed out: bash has not returned in {self._timeout} seconds and must be restarted",
             )
+        self.used = True
 
         # we know these are not None because we created the process with PIPEs
         assert self._process.stdin
@@ -73,48 +246,238 @@ class _BashSession:
             if command_stripped.endswith("&"):
                 # Remove trailing &, wrap in subshell with stdin redirect, then add & back
                 cmd_without_amp = command_stripped[:-1].strip()
-                wrapped_command = f"({cmd_without_amp} < /dev/null &); echo '{self._sentinel}'"
+                wrapped_command = f"({cmd_without_amp} < /dev/null &)"
             else:
                 # & is in the middle somewhere, just wrap and redirect stdin
-                wrapped_command = f"({command} < /dev/null); echo '{self._sentinel}'"
+                wrapped_command = f"({command} < /dev/null)"
         else:
-            wrapped_command = f"{command}; echo '{self._sentinel}'"
-        
-        self._process.stdin.write(
-            wrapped_command.encode() + "\n".encode()
+            wrapped_command = command
+        if self._stale_stderr is not None:
+            await self._discard_stale_stderr()
+        # a sentinel goes to both streams, so each is known to be complete once it
+        # shows up. On stdout it is followed by the exit code and working directory.
+        # The one on stderr is numbered, so the next command can tell the rest of
+        # this one's stderr, if it arrives too late to be read, from its own
+        self._commands += 1
+        stderr_sentinel = f"<<exit-{self._commands}>>"
+        wrapped_command += (
+            f'; printf \'{self._sentinel}%s %s\\n\' "$?" "$PWD";'
+            f" echo '{stderr_sentinel}' >&2"
         )
-        await self._process.stdin.drain()
 
-        # read output from the process, until the sentinel is found
+        # read output from the process as it arrives, until the sentinel is found
+        streamed = (
+            _CappedOutput(on_output, self._streamed_output_limit)
+            if on_output is not None
+            else None
+        )
+        output_capture = OutputCapture(spill_dir=self._spill_dir, spill_name="stdout")
+        error_capture = OutputCapture(spill_dir=self._spill_dir, spill_name="stderr")
+        monitor = ProcessTreeMonitor(self._measured_pid())
+        monitor.start()
+        error_reader = asyncio.ensure_future(
+            self._read_until_sentinel(
+                self._process.stderr,
+                error_capture,
+                streamed,
+                "stderr",
+                stderr_sentinel,
+            )
+        )
         try:
+            self._process.stdin.write(
+                wrapped_command.encode() + "\n".encode()
+            )
+            await self._process.stdin.drain()
             async with asyncio.timeout(self._timeout):
-                while True:
-                    await asyncio.sleep(self._output_delay)
-                    # if we read directly from stdout/stderr, it will wait forever for
-                    # EOF. use the StreamReader buffer directly instead.
-                    output = self._process.stdout._buffer.decode()  # pyright: ignore[reportAttributeAccessIssue]
-                    if self._sentinel in output:
-                        # strip the sentinel and break
-                        output = output[: output.index(self._sentinel)]
-                        break
+                trailer = await self._read_until_sentinel(
+                    self._process.stdout, output_capture, streamed, "stdout"
+                )
+            # the command has finished, so its stderr is already in the pipe. The
+            # sentinel after it never comes if the command redirected the shell's
+            # stderr, e.g. with `exec 2>/dev/null`
+            await asyncio.wait({error_reader}, timeout=self._stderr_grace)
         except asyncio.TimeoutError:
             self._timed_out = True
             raise ToolError(
                 f"timed out: bash has not returned in {self._timeout} seconds and must be restarted",
             ) from None
+        finally:
+            if not error_reader.done():
+                self._stale_stderr = stderr_sentinel
+            error_reader.cancel()
+            await asyncio.gather(error_reader, return_exceptions=True)
+            output_capture.close()
+            error_capture.close()
+            usage = await monitor.stop(output_capture.size + error_capture.size)
 
+        output = output_capture.text()
+        error = _STDERR_SENTINEL.sub("", error_capture.text())
         if output.endswith("\n"):
             output = output[:-1]
-
-        error = self._process.stderr._buffer.decode()  # pyright: ignore[reportAttributeAccessIssue]
         if error.endswith("\n"):
             error = error[:-1]
 
-        # clear the buffers so that the next output can be read correctly
-        self._process.stdout._buffer.clear()  # pyright: ignore[reportAttributeAccessIssue]
-        self._process.stderr._buffer.clear()  # pyright: ignore[reportAttributeAccessIssue]
+        if trailer is None:
+            # the shell exited before the command finished, e.g. the command was `exit`
+            returncode = await self._process.wait()
+            return ToolResult(
+                output=output,
+                system="tool must be restarted",
+                error=f"{error}\nbash has exited with returncode {returncode}".lstrip(),
+            )
+
+        exit_code, cwd, note = self._status_note(trailer)
+        return CLIResult(
+            output=output,
+            error=error,
+            system=note,
+            exit_code=exit_code,
+            cwd=cwd,
+            output_size=output_capture.size,
+            error_size=error_capture.size,
+            output_file=output_capture.spill_path,
+            error_file=error_capture.spill_path,
+            usage=usage,
+        )
+
+    def _measured_pid(self) -> int:
+        """
+        The bash process, whose descendants are the commands. /bin/sh may run it
+        as its only child instead of exec'ing it; the shell is idle when this is
+        first called, so any child it has is bash.
+        """
+        if self._shell_pid is None:
+            children = descendants(self._process.pid)
+            self._shell_pid = children[0] if len(children) == 1 else self._process.pid
+        return self._shell_pid
 
-        return CLIResult(output=output, error=error)
+
+class BashSessionPool:
+    """
+    Keeps bash sessions for one display started and warmed up, so a task's first
+    command, and the first one after a restart, does not wait for a shell to
+    start and repeat its setup.
+    Each warm-up script is sourced in every new session, so the variables,
+    functions and activated environments it sets persist in it.
+    A released session that never ran a command goes back to the pool; one that
+    did carries its task's state (working directory, variables, jobs) and is stopped.
+    """
+
+    def __init__(
+        self,
+        display_num: int | None = None,
+        size: int = 0,
+        warmup_scripts: Sequence[str] = (),
+    ):
+        self._display_num = display_num
+        self.size = size
+        self.warmup_scripts = list(warmup_scripts)
+        self._ready: list[_BashSession] = []
+        self._filling: asyncio.Task | None = None
+
+    async def acquire(self) -> _BashSession:
+        """Take a warm session, or start one if none is ready."""
+        while self._ready:
+            session = self._ready.pop(0)
+            if session.alive:
+                break
+        else:
+            session = await self._spawn()
+        self.prewarm()
+        return session
+
+    def release(self, session: _BashSession):
+        """Return a session, keeping it for the next task if it is still clean."""
+        if session.alive and not session.used and len(self._ready) < self.size:
+            self._ready.append(session)
+        elif session.alive:
+            session.stop()
+
+    def prewarm(self):
+        """Start filling the pool in the background."""
+        if len(self._ready) >= self.size:
+            return
+        if self._filling is None or self._filling.done():
+            self._filling = asyncio.create_task(self._fill())
+
+    async def _fill(self):
+        while len(self._ready) < self.size:
+            try:
+                session = await self._spawn()
+            except (ToolError, OSError):
+                # acquire() starts a session itself and reports the failure
+                return
+            self._ready.append(session)
+
+    async def _spawn(self) -> _BashSession:
+        session = _BashSession(self._display_num)
+        await session.start()
+        try:
+            for script in self.warmup_scripts:
+                result = await session.run(f"source {shlex.quote(script)}")
+                if not session.alive:
+                    raise ToolError(f"warm-up script {script} failed: {result.error}")
+        except ToolError:
+            session.stop()
+            raise
+        session.used = False
+        return session
+
+    def _stop_idle(self) -> list[_BashSession]:
+        if self._filling is not None:
+            self._filling.cancel()
+            self._filling = None
+        stopped = [session for session in self._ready if session.alive]
+        for session in stopped:
+            session.stop()
+        self._ready.clear()
+        return stopped
+
+    async def close(self):
+        """Stop the background warm-up and every idle session, and wait for them to exit."""
+        for session in self._stop_idle():
+            await session._process.wait()
+
+
+_pools: dict[int | None, tuple[asyncio.AbstractEventLoop, BashSessionPool]] = {}
+
+
+def get_session_pool(display_num: int | None) -> BashSessionPool:
+    """
+    Return the session pool for a display, configured from $BASH_POOL_SIZE and the
+    $BASH_WARMUP_SCRIPTS search path. Sessions belong to the event loop that
+    started them, so a pool is replaced when used from a different loop.
+    """
+    loop = asyncio.get_running_loop()
+    if display_num in _pools:
+        pool_loop, pool = _pools[display_num]
+        if pool_loop is loop:
+            return pool
+        if not pool_loop.is_closed():
+            pool._stop_idle()
+    pool = BashSessionPool(
+        display_num,
+        size=int(os.getenv("BASH_POOL_SIZE") or 0),
+        warmup_scripts=[
+            script
+            for script in (os.getenv("BASH_WARMUP_SCRIPTS") or "").split(os.pathsep)
+            if script
+        ],
+    )
+    _pools[display_num] = (loop, pool)
+    return pool
+
+
+async def close_session_pools():
+    """Stop the idle sessions of every pool."""
+    loop = asyncio.get_running_loop()
+    for pool_loop, pool in _pools.values():
+        if pool_loop is loop:
+            await pool.close()
+        elif not pool_loop.is_closed():
+            pool._stop_idle()
+    _pools.clear()
 
 
 class BashTool20250124(BaseAnthropicTool):
@@ -128,8 +491,10 @@ class BashTool20250124(BaseAnthropicTool):
     api_type: Literal["bash_20250124"] = "bash_20250124"
     name: Literal["bash"] = "bash"
 
-    def __init__(self):
+    def __init__(self, display_num: int | None = None):
+        """`display_num` sets DISPLAY for commands; they inherit it from the environment otherwise."""
         self._session = None
+        self._display_num = display_num
         super().__init__()
 
     def to_params(self) -> Any:
@@ -138,26 +503,47 @@ class BashTool20250124(BaseAnthropicTool):
             "name": self.name,
         }
 
+    def resources(self, tool_input: dict[str, Any]) -> list[ResourceClaim]:
+        # commands share one shell session, and may touch any file. They may also
+        # start or drive GUI apps, so they keep their turn's order with computer actions
+        display_num = self._display_num
+        if display_num is None and (env_display := os.getenv("DISPLAY_NUM")):
+            display_num = int(env_display)
+        return [
+            ResourceClaim(f"bash:{id(self)}"),
+            ResourceClaim(FILES_RESOURCE),
+            ResourceClaim(f"display:{display_num}"),
+        ]
+
     async def __call__(
-        self, command: str | None = None, restart: bool = False, **kwargs
+        self,
+        command: str | None = None,
+        restart: bool = False,
+        on_output: OutputCallback | None = None,
+        **kwargs,
     ):
+        pool = get_session_pool(self._display_num)
         if restart:
             if self._session:
-                self._session.stop()
-            self._session = _BashSession()
-            await self._session.start()
+                pool.release(self._session)
+            self._session = await pool.acquire()
 
             return ToolResult(system="tool has been restarted.")
 
         if self._session is None:
-            self._session = _BashSession()
-            await self._session.start()
+            self._session = await pool.acquire()
 
         if command is not None:
-            return await self._session.run(command)
+            return await self._session.run(command, on_output)
 
         raise ToolError("no command provided.")
 
+    async def close(self):
+        """Give the session back to its pool."""
+        if self._session is not None:
+            get_session_pool(self._display_num).release(self._session)
+            self._session = None
+
 
 class BashTool20241022(BashTool20250124):
     api_type: Literal["bash_20250124"] = "bash_20250124"  # pyright: ignore[reportIncompatibleVariableOverride]
@@ -0,0 +1,254 @@
+"""In-process ownership of the X clipboard and primary selection, used to paste text."""
+
+import ctypes
+import select
+import threading
+import time
+
+from . import xlib
+
+# how long to wait before retrying a display that could not be opened
+RETRY_INTERVAL = 30.0  # seconds
+
+# how often the serving thread wakes up to check whether it should stop
+POLL_INTERVAL = 0.1  # seconds
+
+NONE = 0
+CURRENT_TIME = 0
+POINTER_ROOT = 1
+XA_ATOM = 4
+XA_STRING = 31
+PROP_MODE_REPLACE = 0
+SELECTION_REQUEST = 30
+SELECTION_NOTIFY = 31
+
+# targets that are answered with the text itself
+TEXT_TARGETS = ("UTF8_STRING", "STRING", "TEXT", "text/plain;charset=utf-8")
+
+
+class X11Clipboard:
+    """
+    Owns PRIMARY and CLIPBOARD from a hidden window and serves their text to
+    other clients. A background thread answers selection requests for as long
+    as the text is owned, so a paste keystroke in any application inserts it.
+    """
+
+    def __init__(self, display_num: int | None):
+        self._x11 = xlib.library("x11")
+        self._display = xlib.open_display(display_num)
+        self._lock = threading.Lock()
+        root = self._x11.XRootWindow(
+            self._display, self._x11.XDefaultScreen(self._display)
+        )
+        self._window = self._x11.XCreateSimpleWindow(
+            self._display, root, 0, 0, 1, 1, 0, 0, 0
+        )
+        self._atoms = {
+            name: self._x11.XInternAtom(self._display, name.encode(), 0)
+            for name in ("CLIPBOARD", "TARGETS", *TEXT_TARGETS)
+        }
+        self._atoms["PRIMARY"] = 1
+        self._selections = (self._atoms["PRIMARY"], self._atoms["CLIPBOARD"])
+        # properties are written in a single request, which the server caps in size
+        self.max_bytes = self._x11.XMaxRequestSize(self._display) * 4 - 1024
+        self._data = b""
+        self._served = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._serve, name="x11-clipboard", daemon=True
+        )
+        self._thread.start()
+
+    def set_text(self, text: str):
+        """Take ownership of both selections with `text` as their contents."""
+        data = text.encode()
+        if len(data) > self.max_bytes:
+            raise ValueError(
+                f"text of {len(data)} bytes exceeds the {self.max_bytes} byte selection limit"
+            )
+        with self._lock:
+            if self._display is None:
+                raise xlib.XError("display connection is closed")
+            self._data = data
+            self._served.clear()
+            for selection in self._selections:
+                self._x11.XSetSelectionOwner(
+                    self._display, selection, self._window, CURRENT_TIME
+                )
+            self._x11.XSync(self._display, 0)
+            owner = self._x11.XGetSelectionOwner(
+                self._display, self._atoms["CLIPBOARD"]
+            )
+        if owner != self._window:
+            raise xlib.XError("could not take ownership of the clipboard")
+
+    def wait_served(self, timeout: float) -> bool:
+        """Wait until a client has read the text set last, and report whether one did."""
+        return self._served.wait(timeout)
+
+    def focused_window_class(self) -> str | None:
+        """
+        The WM_CLASS class of the top-level window with the input focus, or None if
+        focus is not on a client window.
+        """
+        with self._lock:
+            if self._display is None:
+                raise xlib.XError("display connection is closed")
+            window = ctypes.c_ulong()
+            revert_to = ctypes.c_int()
+            self._x11.XGetInputFocus(
+                self._display, ctypes.byref(window), ctypes.byref(revert_to)
+            )
+            current = window.value
+            # focus is often on a child of the window that carries WM_CLASS
+            while current not in (NONE, POINTER_ROOT):
+                hint = xlib.XClassHint()
+                if self._x11.XGetClassHint(self._display, current, ctypes.byref(hint)):
+                    try:
+                        if hint.res_class:
+                            return ctypes.string_at(hint.res_class).decode(
+                                errors="replace"
+                            )
+                    finally:
+                        self._x11.XFree(hint.res_name)
+                        self._x11.XFree(hint.res_class)
+                current = self._parent(current)
+            return None
+
+    def _parent(self, window: int) -> int:
+        root, parent = ctypes.c_ulong(), ctypes.c_ulong()
+        children = ctypes.POINTER(ctypes.c_ulong)()
+        count = ctypes.c_uint()
+        if not self._x11.XQueryTree(
+            self._display,
+            window,
+            ctypes.byref(root),
+            ctypes.byref(parent),
+            ctypes.byref(children),
+            ctypes.byref(count),
+        ):
+            return NONE
+        if children:
+            self._x11.XFree(children)
+        return NONE if parent.value == root.value else parent.value
+
+    def _serve(self):
+        with self._lock:
+            if self._display is None:
+                return
+            fd = self._x11.XConnectionNumber(self._display)
+        while not self._stopped.is_set():
+            with self._lock:
+                if self._display is None:
+                    return
+                while self._x11.XPending(self._display):
+                    event = xlib.XEvent()
+                    self._x11.XNextEvent(self._display, ctypes.byref(event))
+                    if event.type == SELECTION_REQUEST:
+                        self._answer(event.xselectionrequest)
+            select.select([fd], [], [], POLL_INTERVAL)
+
+    def _answer(self, request: xlib.XSelectionRequestEvent):
+        """Reply to a selection request; called with the lock held."""
+        # obsolete clients leave the property unset and expect the target to be used
+        target_property = request.property or request.target
+        text_atoms = [self._atoms[name] for name in TEXT_TARGETS]
+        if request.target == self._atoms["TARGETS"]:
+            targets = (ctypes.c_ulong * (len(text_atoms) + 1))(
+                self._atoms["TARGETS"], *text_atoms
+            )
+            self._x11.XChangeProperty(
+                self._display,
+                request.requestor,
+                target_property,
+                XA_ATOM,
+                32,
+                PROP_MODE_REPLACE,
+                targets,
+                len(targets),
+            )
+        elif request.target in text_atoms:
+            kind = (
+                XA_STRING
+                if request.target == self._atoms["STRING"]
+                else self._atoms["UTF8_STRING"]
+            )
+            data = self._data
+            if kind == XA_STRING:
+                data = data.decode().encode("latin-1", errors="replace")
+            self._x11.XChangeProperty(
+                self._display,
+                request.requestor,
+                target_property,
+                kind,
+                8,
+                PROP_MODE_REPLACE,
+                data,
+                len(data),
+            )
+            self._served.set()
+        else:
+            target_property = NONE
+
+        notify = xlib.XEvent()
+        notify.xselection.type = SELECTION_NOTIFY
+        notify.xselection.display = self._display
+        notify.xselection.requestor = request.requestor
+        notify.xselection.selection = request.selection
+        notify.xselection.target = request.target
+        notify.xselection.property = target_property
+        notify.xselection.time = request.time
+        self._x11.XSendEvent(
+            self._display, request.requestor, 0, 0, ctypes.byref(notify)
+        )
+        self._x11.XSync(self._display, 0)
+
+    def close(self):
+        self._stopped.set()
+        self._thread.join(timeout=1)
+        with self._lock:
+            if self._display is not None:
+                self._x11.XDestroyWindow(self._display, self._window)
+                self._x11.XCloseDisplay(self._display)
+                self._display = None
+
+
+_clipboards: dict[int | None, X11Clipboard] = {}
+_failures: dict[int | None, float] = {}
+_clipboards_lock = threading.Lock()
+
+
+def get_clipboard(display_num: int | None) -> X11Clipboard | None:
+    """
+    Return the shared clipboard owner for a display, or None if it is unavailable
+    (no libX11, display not reachable, ...).
+    """
+    with _clipboards_lock:
+        if display_num in _clipboards:
+            return _clipboards[display_num]
+        failed_at = _failures.get(display_num)
+        if failed_at is not None and time.monotonic() - failed_at < RETRY_INTERVAL:
+            return None
+        try:
+            clipboard = X11Clipboard(display_num)
+        except xlib.XError:
+            _failures[display_num] = time.monotonic()
+            return None
+        _clipboards[display_num] = clipboard
+        return clipboard
+
+
+def discard_clipboard(display_num: int | None, retry_later: bool = True):
+    """
+    Close and forget the shared clipboard owner for a display after a failure.
+    Without `retry_later`, the next request reconnects at once, e.g. after the
+    display was restarted on purpose.
+    """
+    with _clipboards_lock:
+        clipboard = _clipboards.pop(display_num, None)
+        if retry_later:
+            _failures[display_num] = time.monotonic()
+        else:
+            _failures.pop(display_num, None)
+    if clipboard is not None:
+        clipboard.close()
@@ -6,10 +6,14 @@ from anthropic.types.beta import BetaToolUnionParam
 
 from .base import (
     BaseAnthropicTool,
+    OutputCallback,
+    ResourceClaim,
     ToolError,
     ToolFailure,
     ToolResult,
 )
+from .bash import BashTool20250124
+from .computer import BaseComputerTool
 
 
 class ToolCollection:
@@ -24,11 +28,42 @@ class ToolCollection:
     ) -> list[BetaToolUnionParam]:
         return [tool.to_params() for tool in self.tools]
 
-    async def run(self, *, name: str, tool_input: dict[str, Any]) -> ToolResult:
+    def resources(
+        self, *, name: str, tool_input: dict[str, Any]
+    ) -> list[ResourceClaim]:
+        """The resources a call uses; an invalid tool fails at once and claims none."""
+        tool = self.tool_map.get(name)
+        if not tool:
+            return []
+        return tool.resources(tool_input)
+
+    async def run(
+        self,
+        *,
+        name: str,
+        tool_input: dict[str, Any],
+        take_screenshot: bool = True,
+        on_output: OutputCallback | None = None,
+    ) -> ToolResult:
+        """
+        Run a tool. Without `take_screenshot`, a computer action skips the
+        screenshot it would otherwise return after acting. `on_output` receives
+        the output of a bash command as it is produced.
+        """
         tool = self.tool_map.get(name)
         if not tool:
             return ToolFailure(error=f"Tool {name} is invalid")
         try:
+            if not take_screenshot and isinstance(tool, BaseComputerTool):
+                return await tool.without_screenshot(**tool_input)
+            if on_output is not None and isinstance(tool, BashTool20250124):
+                return await tool(**tool_input, on_output=on_output)
             return await tool(**tool_input)
         except ToolError as e:
             return ToolFailure(error=e.message)
+
+    async def close(self):
+        """Release what the tools hold, such as shell sessions."""
+        for tool in self.tools:
+            if isinstance(tool, BashTool20250124):
+                await tool.close()
@@ -3,21 +3,62 @@ import base64
 import os
 import shlex
 import shutil
+import time
 from enum import StrEnum
 from pathlib import Path
-from typing import Literal, TypedDict, cast, get_args
+from typing import Any, Literal, TypedDict, cast, get_args
 from uuid import uuid4
 
+import numpy as np
 from anthropic.types.beta import BetaToolComputerUse20241022Param, BetaToolUnionParam
 
-from .base import BaseAnthropicTool, ToolError, ToolResult
-from .run import run
+from .base import BaseAnthropicTool, ResourceClaim, ToolError, ToolResult
+from .clipboard import discard_clipboard, get_clipboard
+from .grabber import FrameGrabber, FreshFrames, get_grabber, stop_grabber
+from .imaging import EncodingProfile, decode, encode, resize
+from .ocr import contains_text, ocr_available
+from .run import run, run_capped
+from .screen import (
+    UNCHANGED_SCREEN_NOTE,
+    Frame,
+    FrameCache,
+    FrameSource,
+    changed_regions,
+    discard_screen,
+    get_screen,
+    wait_until_stable,
+)
+from .usage import ResourceUsage, sum_usage
+from .xinput import discard_injector, get_injector, parse_xdotool
+from .xlib import XError
 
 OUTPUT_DIR = "/tmp/outputs"
 
 TYPING_DELAY_MS = 12
 TYPING_GROUP_SIZE = 50
 
+# in "auto" typing mode, text at least this long is pasted instead of typed
+PASTE_THRESHOLD = 100
+# text is pasted in pieces so each fits in a single selection transfer
+PASTE_CHUNK_SIZE = 16000
+# how long a paste keystroke has for the focused application to read the clipboard
+PASTE_TIMEOUT = 2.0  # seconds
+# window classes that paste with shift+Insert rather than ctrl+v
+TERMINAL_CLASSES = {
+    "xterm",
+    "uxterm",
+    "gnome-terminal",
+    "gnome-terminal-server",
+    "konsole",
+    "xfce4-terminal",
+    "lxterminal",
+    "urxvt",
+    "terminator",
+    "tilix",
+    "alacritty",
+    "kitty",
+}
+
 Action_20241022 = Literal[
     "key",
     "type",
@@ -40,11 +81,42 @@ Action_20250124 = (
         "hold_key",
         "wait",
         "triple_click",
+        "zoom",
+        "batch",
+        "wait_for",
     ]
 )
 
+# actions a batch may contain: those that act on the screen without returning an image
+BATCH_ACTIONS = frozenset(
+    action for literal in get_args(Action_20250124) for action in get_args(literal)
+) - {"screenshot", "zoom", "batch", "wait_for"}
+MAX_BATCH_ACTIONS = 20
+MAX_BATCH_PAUSE = 10.0  # seconds
+
+# at most this many changed regions are listed in an action result, largest first
+MAX_CHANGED_REGIONS = 8
+
+# wait_for returns once the watched region changes, settles after changing, or
+# shows a piece of text
+WaitCondition = Literal["change", "stable", "text"]
+DEFAULT_WAIT_FOR_TIMEOUT = 10.0  # seconds
+MAX_WAIT_FOR_TIMEOUT = 60.0  # seconds
+WAIT_FOR_INTERVAL = 0.1  # seconds
+# recognizing text takes far longer than comparing frames, so it is polled less often
+WAIT_FOR_TEXT_INTERVAL = 0.5  # seconds
+
 ScrollDirection = Literal["up", "down", "left", "right"]
 
+# "x11" captures in-process and falls back to "shell" (gnome-screenshot/scrot)
+CaptureBackend = Literal["x11", "shell"]
+
+# "xtest" injects input in-process and falls back to running "xdotool"
+InputBackend = Literal["xtest", "xdotool"]
+
+# "auto" pastes long text through the clipboard and types short text key by key
+TypingMode = Literal["auto", "keys", "paste"]
+
 
 class Resolution(TypedDict):
     width: int
@@ -83,6 +155,18 @@ def chunks(s: str, chunk_size: int) -> list[str]:
     return [s[i : i + chunk_size] for i in range(0, len(s), chunk_size)]
 
 
+def close_display_connections(display_num: int | None):
+    """
+    Close the in-process capture, input, clipboard and grabber connections to a
+    display before its X server is stopped; Xlib exits the whole process when a
+    connection it holds is lost. The next action on the display reconnects.
+    """
+    stop_grabber(display_num)
+    discard_screen(display_num, retry_later=False)
+    discard_injector(display_num, retry_later=False)
+    discard_clipboard(display_num, retry_later=False)
+
+
 class BaseComputerTool:
     """
     A tool that allows the agent to interact with the screen, keyboard, and mouse of the current computer.
@@ -97,6 +181,20 @@ class BaseComputerTool:
     _screenshot_delay = 2.0
     _scaling_enabled = True
 
+    # list the areas that changed since the previous screenshot in action results
+    _report_changed_regions = True
+
+    # set while a batch, or an action that needs no screenshot, runs so its
+    # actions skip their own screenshots
+    _screenshots_deferred = False
+
+    # adaptive settle: after an action, capture once the screen has been unchanged
+    # for the quiet period, waiting between the minimum and maximum delay
+    _settle_min_delay = 0.1
+    _settle_max_delay = 2.0
+    _settle_quiet_period = 0.3
+    _settle_interval = 0.05
+
     @property
     def options(self) -> ComputerToolOptions:
         width, height = self.scale_coordinates(
@@ -108,20 +206,53 @@ class BaseComputerTool:
             "display_number": self.display_num,
         }
 
-    def __init__(self):
+    def resources(self, tool_input: dict[str, Any]) -> list[ResourceClaim]:
+        # actions on one display must not interleave
+        return [ResourceClaim(f"display:{self.display_num}")]
+
+    def __init__(self, display_num: int | None = None):
+        """`display_num` selects the X display; it defaults to $DISPLAY_NUM."""
         super().__init__()
 
         self.width = int(os.getenv("WIDTH") or 0)
         self.height = int(os.getenv("HEIGHT") or 0)
         assert self.width and self.height, "WIDTH, HEIGHT must be set"
-        if (display_num := os.getenv("DISPLAY_NUM")) is not None:
-            self.display_num = int(display_num)
+        if display_num is None and (env_display := os.getenv("DISPLAY_NUM")):
+            display_num = int(env_display)
+        if display_num is not None:
+            self.display_num = display_num
             self._display_prefix = f"DISPLAY=:{self.display_num} "
         else:
             self.display_num = None
             self._display_prefix = ""
 
         self.xdotool = f"{self._display_prefix}xdotool"
+        self._capture_backend = cast(
+            CaptureBackend, os.getenv("SCREENSHOT_BACKEND") or "x11"
+        )
+        self._settle_min_delay = float(
+            os.getenv("SCREENSHOT_SETTLE_MIN") or self._settle_min_delay
+        )
+        self._settle_max_delay = float(
+            os.getenv("SCREENSHOT_SETTLE_MAX") or self._settle_max_delay
+        )
+        self._encoding = EncodingProfile.parse(
+            os.getenv("SCREENSHOT_ENCODING") or "png"
+        )
+        self._grabber_fps = float(os.getenv("SCREENSHOT_GRABBER_FPS") or 0)
+        self._input_backend = cast(
+            InputBackend, os.getenv("COMPUTER_INPUT_BACKEND") or "xtest"
+        )
+        self._typing_mode = cast(
+            TypingMode, os.getenv("COMPUTER_TYPING_MODE") or "auto"
+        )
+        self._paste_threshold = int(
+            os.getenv("COMPUTER_PASTE_THRESHOLD") or PASTE_THRESHOLD
+        )
+        self._frame_cache = FrameCache()
+        self._last_frame: Frame | None = None
+        # when input last reached the display, as the wall-clock time frames carry
+        self._last_input_at = 0.0
 
     async def __call__(
         self,
@@ -161,6 +292,8 @@ class BaseComputerTool:
                 command_parts = [self.xdotool, f"key -- {text}"]
                 return await self.shell(" ".join(command_parts))
             elif action == "type":
+                if (pasted := await self.paste(text)) is not None:
+                    return pasted
                 results: list[ToolResult] = []
                 for chunk in chunks(text, TYPING_GROUP_SIZE):
                     command_parts = [
@@ -170,11 +303,13 @@ class BaseComputerTool:
                     results.append(
                         await self.shell(" ".join(command_parts), take_screenshot=False)
                     )
-                screenshot_base64 = (await self.screenshot()).base64_image
-                return ToolResult(
-                    output="".join(result.output or "" for result in results),
-                    error="".join(result.error or "" for result in results),
-                    base64_image=screenshot_base64,
+                return await self._with_screenshot(
+                    ToolResult(
+                        output="".join(result.output or "" for result in results),
+                        error="".join(result.error or "" for result in results),
+                        usage=sum_usage(result.usage for result in results),
+                    ),
+                    settle=False,
                 )
 
         if action in (
@@ -191,7 +326,8 @@ class BaseComputerTool:
                 raise ToolError(f"coordinate is not accepted for {action}")
 
             if action == "screenshot":
-                return await self.screenshot()
+                # the model may no longer have the previous image in its context
+                return await self.screenshot(always_image=True)
             elif action == "cursor_position":
                 command_parts = [self.xdotool, "getmouselocation --shell"]
                 result = await self.shell(
@@ -211,6 +347,88 @@ class BaseComputerTool:
 
         raise ToolError(f"Invalid action: {action}")
 
+    async def without_screenshot(self, **kwargs) -> ToolResult:
+        """
+        Run an action without the screenshot and settle wait that usually follow it,
+        for actions whose resulting screen the model won't look at. Actions that
+        exist to return an image, like screenshot and zoom, still return it.
+        """
+        deferred = self._screenshots_deferred
+        self._screenshots_deferred = True
+        try:
+            return await self(**kwargs)
+        finally:
+            self._screenshots_deferred = deferred
+
+    async def paste(self, text: str) -> ToolResult | None:
+        """
+        Enter text by pasting it from the clipboard, which is much faster than typing
+        long text key by key. Returns None when the text should be typed instead:
+        it is short, nothing has the focus, or the clipboard or the focused
+        application didn't take the paste.
+        Trailing newlines are pressed as Return after the paste: a shell with
+        bracketed paste, the default in bash 5.1, would not run a pasted command.
+        """
+        if self._typing_mode == "keys":
+            return None
+        if self._typing_mode == "auto" and len(text) < self._paste_threshold:
+            return None
+        clipboard = get_clipboard(self.display_num)
+        if clipboard is None:
+            return None
+        try:
+            window_class = await asyncio.to_thread(clipboard.focused_window_class)
+        except XError:
+            discard_clipboard(self.display_num)
+            return None
+        if window_class is None and self._typing_mode == "auto":
+            return None
+        body = text.rstrip("\n")
+        if not body:
+            return None
+        returns = len(text) - len(body)
+        paste_key = (
+            "shift+Insert"
+            if (window_class or "").lower() in TERMINAL_CLASSES
+            else "ctrl+v"
+        )
+        results: list[ToolResult] = []
+        for index, chunk in enumerate(chunks(body, PASTE_CHUNK_SIZE)):
+            try:
+                await asyncio.to_thread(clipboard.set_text, chunk)
+            except (ValueError, XError) as e:
+                discard_clipboard(self.display_num)
+                if index == 0:
+                    return None
+                raise ToolError(
+                    f"Pasting stopped after {index * PASTE_CHUNK_SIZE} of"
+                    f" {len(text)} characters: {e}"
+                ) from None
+            results.append(
+                await self._run_command(f"{self.xdotool} key -- {paste_key}")
+            )
+            if not await asyncio.to_thread(clipboard.wait_served, PASTE_TIMEOUT):
+                if index == 0:
+                    # the application ignored the paste, so nothing was inserted
+                    return None
+                raise ToolError(
+                    f"Pasting stopped after {index * PASTE_CHUNK_SIZE} of"
+                    f" {len(text)} characters: the application stopped reading"
+                    " the clipboard"
+                )
+        if returns:
+            results.append(
+                await self._run_command(
+                    f"{self.xdotool} key -- {' '.join(['Return'] * returns)}"
+                )
+            )
+        return await self._with_screenshot(
+            ToolResult(
+                error="".join(result.error or "" for result in results),
+                usage=sum_usage(result.usage for result in results),
+            )
+        )
+
     def validate_and_get_coordinates(self, coordinate: tuple[int, int] | None = None):
         if not isinstance(coordinate, list) or len(coordinate) != 2:
             raise ToolError(f"{coordinate} must be a tuple of length 2")
@@ -219,8 +437,53 @@ class BaseComputerTool:
 
         return self.scale_coordinates(ScalingSource.API, coordinate[0], coordinate[1])
 
-    async def screenshot(self):
-        """Take a screenshot of the current screen and return the base64 encoded image."""
+    async def screenshot(self, frame: Frame | None = None, always_image=False):
+        """
+        Take a screenshot of the current screen and return the base64 encoded image.
+        A frame that was already captured, e.g. while waiting for the screen to
+        settle, is encoded instead of capturing a new one. An unchanged screen is
+        reported with a note instead, unless `always_image` is set.
+        """
+        if frame is None and self._capture_backend == "x11":
+            frame = await self._capture_frame()
+        if frame is None:
+            frame = await self._shell_capture()
+        return await asyncio.to_thread(self._frame_result, frame, always_image)
+
+    def _grabber(self) -> FrameGrabber | None:
+        """
+        The background grabber for this display, started if SCREENSHOT_GRABBER_FPS
+        is set. Without it, a grabber started for something else, such as the live
+        preview, is not used either.
+        """
+        if self._capture_backend != "x11" or not self._grabber_fps:
+            return None
+        return get_grabber(self.display_num, self._grabber_fps)
+
+    async def _capture_frame(self) -> Frame | None:
+        """
+        Grab the screen over the shared X connection, or None if that is unavailable.
+        The newest frame of a running background grabber is used without a capture,
+        unless it was taken before the last input.
+        """
+        grabber = self._grabber()
+        if (
+            grabber is not None
+            and (frame := grabber.latest()) is not None
+            and frame.timestamp > self._last_input_at
+        ):
+            return frame
+        screen = get_screen(self.display_num)
+        if screen is None:
+            return None
+        try:
+            return await asyncio.to_thread(screen.capture)
+        except XError:
+            discard_screen(self.display_num)
+            return None
+
+    async def _shell_capture(self) -> Frame:
+        """Take a screenshot with gnome-screenshot or scrot and load it into memory."""
         output_dir = Path(OUTPUT_DIR)
         output_dir.mkdir(parents=True, exist_ok=True)
         path = output_dir / f"screenshot_{uuid4().hex}.png"
@@ -232,32 +495,217 @@ class BaseComputerTool:
             # Fall back to scrot if gnome-screenshot isn't available
             screenshot_cmd = f"{self._display_prefix}scrot -p {path}"
 
-        result = await self.shell(screenshot_cmd, take_screenshot=False)
-        if self._scaling_enabled:
-            x, y = self.scale_coordinates(
-                ScalingSource.COMPUTER, self.width, self.height
-            )
-            await self.shell(
-                f"convert {path} -resize {x}x{y}! {path}", take_screenshot=False
+        _, _, stderr = await run(screenshot_cmd)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            raise ToolError(f"Failed to take screenshot: {stderr}") from None
+        finally:
+            path.unlink(missing_ok=True)
+        return Frame(
+            pixels=await asyncio.to_thread(decode, data), timestamp=time.time()
+        )
+
+    @staticmethod
+    def _validate_region(region: Any) -> tuple[int, int, int, int]:
+        if (
+            not isinstance(region, list)
+            or len(region) != 4
+            or not all(isinstance(i, int) and i >= 0 for i in region)
+        ):
+            raise ToolError(f"{region=} must be a list of 4 non-negative ints")
+        return cast(tuple[int, int, int, int], tuple(region))
+
+    def _native_region(
+        self, region: tuple[int, int, int, int]
+    ) -> tuple[int, int, int, int]:
+        """Convert a region in API coordinates to (left, top, right, bottom) on the screen."""
+        x0, y0, x1, y1 = region
+        left, top = self.scale_coordinates(ScalingSource.API, x0, y0)
+        right, bottom = self.scale_coordinates(ScalingSource.API, x1, y1)
+        right, bottom = min(right, self.width), min(bottom, self.height)
+        if right <= left or bottom <= top:
+            raise ToolError(f"{region=} is empty")
+        return left, top, right, bottom
+
+    async def zoom(self, region: tuple[int, int, int, int]) -> ToolResult:
+        """
+        Return a region of the screen, given in API coordinates, at native resolution.
+        Only the region is read from the X server when capturing in-process; otherwise
+        a full screenshot is taken and cropped.
+        """
+        left, top, right, bottom = self._native_region(region)
+
+        frame = await self._capture_region(left, top, right - left, bottom - top)
+        if frame is None:
+            if self._capture_backend == "x11":
+                frame = await self._capture_frame()
+            if frame is None:
+                frame = await self._shell_capture()
+            frame = Frame(
+                pixels=frame.pixels[top:bottom, left:right], timestamp=frame.timestamp
             )
+        data = await asyncio.to_thread(encode, frame.pixels, self._encoding)
+        return ToolResult(
+            base64_image=base64.b64encode(data).decode(),
+            media_type=self._encoding.media_type,
+        )
 
-        if path.exists():
-            return result.replace(
-                base64_image=base64.b64encode(path.read_bytes()).decode()
+    async def _capture_region(
+        self, x: int, y: int, width: int, height: int
+    ) -> Frame | None:
+        """Grab part of the screen over the shared X connection, if available."""
+        if self._capture_backend != "x11":
+            return None
+        screen = get_screen(self.display_num)
+        if screen is None:
+            return None
+        try:
+            return await asyncio.to_thread(screen.capture_region, x, y, width, height)
+        except XError:
+            discard_screen(self.display_num)
+            return None
+
+    def _frame_result(self, frame: Frame, always_image=False) -> ToolResult:
+        """Encode a frame for the API, or report that the screen has not changed."""
+        self._last_frame = frame
+        digest = FrameCache.digest(frame.pixels)
+        if digest == self._frame_cache.latest and not always_image:
+            return ToolResult(output=UNCHANGED_SCREEN_NOTE)
+        base64_image = self._frame_cache.get(digest) or self._encode_frame(frame)
+        self._frame_cache.remember(digest, base64_image)
+        return ToolResult(
+            base64_image=base64_image, media_type=self._encoding.media_type
+        )
+
+    def _encode_frame(self, frame: Frame) -> str:
+        """Scale a captured frame to the API resolution and return it base64 encoded."""
+        pixels = frame.pixels
+        if self._scaling_enabled:
+            width, height = self.scale_coordinates(
+                ScalingSource.COMPUTER, self.width, self.height
             )
-        raise ToolError(f"Failed to take screenshot: {result.error}")
+            pixels = resize(pixels, width, height)
+        return base64.b64encode(encode(pixels, self._encoding)).decode()
 
     async def shell(self, command: str, take_screenshot=True) -> ToolResult:
         """Run a shell command and return the output, error, and optionally a screenshot."""
-        _, stdout, stderr = await run(command)
-        base64_image = None
+        result = await self._run_command(command)
 
         if take_screenshot:
-            # delay to let things settle before taking a screenshot
-            await asyncio.sleep(self._screenshot_delay)
-            base64_image = (await self.screenshot()).base64_image
+            result = await self._with_screenshot(result)
+
+        return result
+
+    async def _with_screenshot(self, result: ToolResult, settle=True) -> ToolResult:
+        """
+        Add a screenshot of the screen after an action to its result, optionally once
+        the screen has settled. Does nothing while a batch defers screenshots.
+        """
+        if self._screenshots_deferred:
+            return result
+        previous = self._last_frame
+        frame = await self._wait_for_settle() if settle else None
+        screenshot = await self.screenshot(frame)
+        result = self._attach_screenshot(result, screenshot)
+        if (
+            self._report_changed_regions
+            and previous is not None
+            and self._last_frame is not None
+            and screenshot.base64_image
+        ):
+            changes = await asyncio.to_thread(
+                self._describe_changes, previous, self._last_frame
+            )
+            if changes:
+                output = "\n".join(part for part in (result.output, changes) if part)
+                result = result.replace(output=output)
+        return result
+
+    def _describe_changes(self, previous: Frame, current: Frame) -> str | None:
+        """List the areas that changed between two frames, in API coordinates."""
+        if previous.pixels.shape != current.pixels.shape:
+            return None
+        boxes = changed_regions(previous.pixels, current.pixels)
+        if not boxes:
+            return None
+        shown = []
+        for left, top, right, bottom in boxes[:MAX_CHANGED_REGIONS]:
+            x0, y0 = self.scale_coordinates(ScalingSource.COMPUTER, left, top)
+            x1, y1 = self.scale_coordinates(ScalingSource.COMPUTER, right, bottom)
+            shown.append(f"[{x0}, {y0}, {x1}, {y1}]")
+        description = (
+            "Changed regions since the previous screenshot [x0, y0, x1, y1]: "
+            + ", ".join(shown)
+        )
+        if len(boxes) > MAX_CHANGED_REGIONS:
+            description += f" and {len(boxes) - MAX_CHANGED_REGIONS} smaller ones"
+        return description
+
+    async def _run_command(self, command: str) -> ToolResult:
+        """
+        Run a command, injecting xdotool commands in-process over XTEST when possible.
+        Commands the XTEST backend doesn't understand are run with xdotool instead,
+        and their result carries what the subprocess used.
+        """
+        prefix = f"{self.xdotool} "
+        try:
+            if self._input_backend == "xtest" and command.startswith(prefix):
+                injector = get_injector(self.display_num)
+                if injector is not None:
+                    try:
+                        steps = parse_xdotool(command.removeprefix(prefix))
+                        output = await asyncio.to_thread(injector.run, steps)
+                        return ToolResult(output=output, error="")
+                    except ValueError:
+                        pass
+                    except XError as e:
+                        discard_injector(self.display_num)
+                        return ToolResult(
+                            output="", error=f"Input injection failed: {e}"
+                        )
+            result = await run_capped(command)
+        finally:
+            # frames captured before now may not show the input's effect
+            self._last_input_at = time.time()
+        return ToolResult(output=result.stdout, error=result.stderr, usage=result.usage)
+
+    @staticmethod
+    def _attach_screenshot(result: ToolResult, screenshot: ToolResult) -> ToolResult:
+        """Add a screenshot, or the note that replaces an unchanged one, to a result."""
+        output = "\n".join(part for part in (result.output, screenshot.output) if part)
+        return result.replace(
+            output=output or result.output,
+            base64_image=screenshot.base64_image,
+            media_type=screenshot.media_type,
+        )
 
-        return ToolResult(output=stdout, error=stderr, base64_image=base64_image)
+    async def _wait_for_settle(self) -> Frame | None:
+        """
+        Wait for the screen to stop changing after an action.
+        Returns the last sampled frame, or None if the screen can't be sampled
+        in-process and the fixed delay was used instead.
+        """
+        if self._capture_backend == "x11":
+            screen: FrameSource | None = get_screen(self.display_num)
+            grabber = self._grabber()
+            if grabber is not None and screen is not None:
+                screen = FreshFrames(grabber, screen, after=self._last_input_at)
+            if screen is not None:
+                try:
+                    return await wait_until_stable(
+                        screen,
+                        min_delay=self._settle_min_delay,
+                        max_delay=self._settle_max_delay,
+                        quiet_period=self._settle_quiet_period,
+                        interval=self._settle_interval,
+                    )
+                except XError:
+                    discard_screen(self.display_num)
+
+        # delay to let things settle before taking a screenshot
+        await asyncio.sleep(self._screenshot_delay)
+        return None
 
     def scale_coordinates(self, source: ScalingSource, x: int, y: int):
         """Scale coordinates to a target maximum resolution."""
@@ -311,8 +759,45 @@ class ComputerTool20250124(BaseComputerTool, BaseAnthropicTool):
         scroll_amount: int | None = None,
         duration: int | float | None = None,
         key: str | None = None,
+        region: tuple[int, int, int, int] | None = None,
+        actions: list[dict[str, Any]] | None = None,
+        condition: str | None = None,
         **kwargs,
     ):
+        if action == "batch":
+            if text is not None or coordinate is not None:
+                raise ToolError(f"only actions is accepted for {action=}.")
+            return await self.batch(actions)
+        if action == "zoom":
+            if text is not None or coordinate is not None:
+                raise ToolError(f"only region is accepted for {action=}.")
+            return await self.zoom(self._validate_region(region))
+        if action == "wait_for":
+            if coordinate is not None:
+                raise ToolError(f"coordinate is not accepted for {action=}.")
+            if condition not in get_args(WaitCondition):
+                raise ToolError(
+                    f"{condition=} must be one of {list(get_args(WaitCondition))}"
+                )
+            if condition == "text":
+                if not text or not isinstance(text, str):
+                    raise ToolError(f"text is required for {condition=}")
+            elif text is not None:
+                raise ToolError(f"text is not accepted for {condition=}")
+            if duration is None:
+                duration = DEFAULT_WAIT_FOR_TIMEOUT
+            if not isinstance(duration, (int, float)) or not (
+                0 < duration <= MAX_WAIT_FOR_TIMEOUT
+            ):
+                raise ToolError(
+                    f"{duration=} must be a timeout of at most {MAX_WAIT_FOR_TIMEOUT} seconds"
+                )
+            return await self.wait_for(
+                cast(WaitCondition, condition),
+                region=None if region is None else self._validate_region(region),
+                text=text,
+                timeout=duration,
+            )
         if action in ("left_mouse_down", "left_mouse_up"):
             if coordinate is not None:
                 raise ToolError(f"coordinate is not accepted for {action=}.")
@@ -372,7 +857,7 @@ class ComputerTool20250124(BaseComputerTool, BaseAnthropicTool):
 
             if action == "wait":
                 await asyncio.sleep(duration)
-                return await self.screenshot()
+                return await self._with_screenshot(ToolResult(), settle=False)
 
         if action in (
             "left_click",
@@ -400,3 +885,121 @@ class ComputerTool20250124(BaseComputerTool, BaseAnthropicTool):
         return await super().__call__(
             action=action, text=text, coordinate=coordinate, key=key, **kwargs
         )
+
+    async def wait_for(
+        self,
+        condition: WaitCondition,
+        *,
+        region: tuple[int, int, int, int] | None = None,
+        text: str | None = None,
+        timeout: float = DEFAULT_WAIT_FOR_TIMEOUT,
+    ) -> ToolResult:
+        """
+        Watch the screen, or a region of it in API coordinates, until a condition
+        holds or the timeout expires, and return a screenshot of the last frame.
+        - change: the region differs from when the wait started.
+        - stable: the region changed and then stayed the same for the quiet period.
+        - text: the region shows the text, as recognized by tesseract.
+        """
+        if condition == "text" and not ocr_available():
+            raise ToolError(
+                "waiting for text requires tesseract, which is not installed"
+            )
+        left, top, right, bottom = (
+            self._native_region(region) if region else (0, 0, self.width, self.height)
+        )
+        interval = WAIT_FOR_TEXT_INTERVAL if condition == "text" else WAIT_FOR_INTERVAL
+
+        start = time.monotonic()
+        frame = await self._sample_frame()
+        baseline = frame.pixels[top:bottom, left:right]
+        read: np.ndarray | None = None
+        changed_at = None
+        met = False
+        while True:
+            current = frame.pixels[top:bottom, left:right]
+            if condition == "change":
+                met = not np.array_equal(current, baseline)
+            elif condition == "stable":
+                if not np.array_equal(current, baseline):
+                    baseline = current
+                    changed_at = time.monotonic()
+                elif changed_at is not None:
+                    met = time.monotonic() - changed_at >= self._settle_quiet_period
+            elif read is None or not np.array_equal(current, read):
+                # only read the region again once it has changed
+                read = current
+                met = await contains_text(current, text or "")
+            if met or time.monotonic() - start >= timeout:
+                break
+            await asyncio.sleep(interval)
+            frame = await self._sample_frame()
+
+        elapsed = time.monotonic() - start
+        if met:
+            output = f"Condition {condition!r} met after {elapsed:.1f}s."
+        else:
+            output = f"Timed out after {elapsed:.1f}s waiting for {condition!r}."
+        return self._attach_screenshot(
+            ToolResult(output=output), await self.screenshot(frame)
+        )
+
+    async def _sample_frame(self) -> Frame:
+        """Capture the screen in-process when possible, with the shell tools otherwise."""
+        frame = None
+        if self._capture_backend == "x11":
+            frame = await self._capture_frame()
+        return frame or await self._shell_capture()
+
+    async def batch(self, actions: list[dict[str, Any]] | None) -> ToolResult:
+        """
+        Run a list of actions back to back and return a single screenshot at the end.
+        Each entry takes the same parameters as the action itself, plus an optional
+        `pause` in seconds to wait after it. Stops at the first action that fails.
+        """
+        if not isinstance(actions, list) or not actions:
+            raise ToolError(f"{actions=} must be a non-empty list of actions")
+        if len(actions) > MAX_BATCH_ACTIONS:
+            raise ToolError(f"a batch can have at most {MAX_BATCH_ACTIONS} actions")
+        for index, step in enumerate(actions, start=1):
+            if not isinstance(step, dict) or step.get("action") not in BATCH_ACTIONS:
+                raise ToolError(
+                    f"action {index} must be an object with an action from {sorted(BATCH_ACTIONS)}"
+                )
+            pause = step.get("pause", 0)
+            if not isinstance(pause, (int, float)) or not 0 <= pause <= MAX_BATCH_PAUSE:
+                raise ToolError(
+                    f"pause of action {index} must be between 0 and {MAX_BATCH_PAUSE} seconds"
+                )
+
+        outputs: list[str] = []
+        usages: list[ResourceUsage | None] = []
+        error = None
+        deferred = self._screenshots_deferred
+        self._screenshots_deferred = True
+        try:
+            for index, step in enumerate(actions, start=1):
+                step = dict(step)
+                pause = step.pop("pause", 0)
+                try:
+                    result = await self(**step)
+                except ToolError as e:
+                    result = ToolResult(error=e.message)
+                usages.append(result.usage)
+                if result.output:
+                    outputs.append(result.output)
+                if result.error:
+                    error = f"Action {index} ({step['action']}) failed: {result.error}"
+                    break
+                if pause:
+                    await asyncio.sleep(pause)
+        finally:
+            self._screenshots_deferred = deferred
+
+        return await self._with_screenshot(
+            ToolResult(
+                output="\n".join(outputs) or None,
+                error=error,
+                usage=sum_usage(usages),
+            )
+        )
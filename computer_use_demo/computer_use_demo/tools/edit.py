@@ -2,8 +2,15 @@ from collections import defaultdict
 from pathlib import Path
 from typing import Any, Literal, get_args
 
-from .base import BaseAnthropicTool, CLIResult, ToolError, ToolResult
-from .run import maybe_truncate, run
+from .base import (
+    FILES_RESOURCE,
+    BaseAnthropicTool,
+    CLIResult,
+    ResourceClaim,
+    ToolError,
+    ToolResult,
+)
+from .run import maybe_truncate, run_capped
 
 Command_20250124 = Literal[
     "view",
@@ -22,6 +29,14 @@ Command_20250429 = Literal[
 SNIPPET_LINES: int = 4
 
 
+def _path_resources(tool_input: dict[str, Any]) -> list[ResourceClaim]:
+    """Views of a path may run together; anything else holds the path exclusively."""
+    path = f"path:{Path(str(tool_input.get('path', '')))}"
+    if tool_input.get("command") == "view":
+        return [ResourceClaim(path, exclusive=False)]
+    return [ResourceClaim(path), ResourceClaim(FILES_RESOURCE, exclusive=False)]
+
+
 class EditTool20250124(BaseAnthropicTool):
     """
     An filesystem editor tool that allows the agent to view, create, and edit files.
@@ -43,6 +58,9 @@ class EditTool20250124(BaseAnthropicTool):
             "type": self.api_type,
         }
 
+    def resources(self, tool_input: dict[str, Any]) -> list[ResourceClaim]:
+        return _path_resources(tool_input)
+
     async def __call__(
         self,
         *,
@@ -119,12 +137,11 @@ class EditTool20250124(BaseAnthropicTool):
                     "The `view_range` parameter is not allowed when `path` points to a directory."
                 )
 
-            _, stdout, stderr = await run(
-                rf"find {path} -maxdepth 2 -not -path '*/\.*'"
-            )
+            result = await run_capped(rf"find {path} -maxdepth 2 -not -path '*/\.*'")
+            stdout, stderr = result.stdout, result.stderr
             if not stderr:
                 stdout = f"Here's the files and directories up to 2 levels deep in {path}, excluding hidden items:\n{stdout}\n"
-            return CLIResult(output=stdout, error=stderr)
+            return CLIResult(output=stdout, error=stderr, usage=result.usage)
 
         file_content = self.read_file(path)
         init_line = 1
@@ -316,6 +333,9 @@ class EditTool20250429(BaseAnthropicTool):
             "type": self.api_type,
         }
 
+    def resources(self, tool_input: dict[str, Any]) -> list[ResourceClaim]:
+        return _path_resources(tool_input)
+
     async def __call__(
         self,
         *,
@@ -391,12 +411,11 @@ class EditTool20250429(BaseAnthropicTool):
                     "The `view_range` parameter is not allowed when `path` points to a directory."
                 )
 
-            _, stdout, stderr = await run(
-                rf"find {path} -maxdepth 2 -not -path '*/\.*'"
-            )
+            result = await run_capped(rf"find {path} -maxdepth 2 -not -path '*/\.*'")
+            stdout, stderr = result.stdout, result.stderr
             if not stderr:
                 stdout = f"Here's the files and directories up to 2 levels deep in {path}, excluding hidden items:\n{stdout}\n"
-            return CLIResult(output=stdout, error=stderr)
+            return CLIResult(output=stdout, error=stderr, usage=result.usage)
 
         file_content = self.read_file(path)
         init_line = 1
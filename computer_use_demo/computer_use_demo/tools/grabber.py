@@ -0,0 +1,179 @@
+"""Background capture of a display into a preallocated in-memory ring buffer."""
+
+import threading
+import time
+
+import numpy as np
+
+from .screen import Frame, X11Screen, get_screen
+from .xlib import XError
+
+DEFAULT_CAPACITY = 8
+
+
+class FrameGrabber:
+    """
+    Captures a display on a background thread at a fixed rate and keeps the
+    last `capacity` frames in a ring buffer allocated once up front.
+    Readers get a copy of the newest frame without a round-trip to the X server.
+    """
+
+    def __init__(self, screen: X11Screen, fps: float, capacity: int = DEFAULT_CAPACITY):
+        if capacity < 2:
+            raise ValueError("capacity must be at least 2")
+        self.fps = fps
+        self._screen = screen
+        self._interval = 1 / fps
+        self._frames = np.empty(
+            (capacity, screen.height, screen.width, 3), dtype=np.uint8
+        )
+        self._timestamps = np.zeros(capacity, dtype=np.float64)
+        # total number of frames written; the newest is at (count - 1) % capacity
+        self._count = 0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="frame-grabber", daemon=True
+        )
+
+    @property
+    def capacity(self) -> int:
+        return len(self._frames)
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive() and not self._stopped.is_set()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            started = time.monotonic()
+            # the writer only touches the oldest slot, which readers never copy
+            slot = self._count % self.capacity
+            try:
+                frame = self._screen.capture(out=self._frames[slot])
+            except XError:
+                self._stopped.set()
+                break
+            with self._lock:
+                self._timestamps[slot] = frame.timestamp
+                self._count += 1
+            self._stopped.wait(max(0.0, self._interval - (time.monotonic() - started)))
+
+    def latest(self) -> Frame | None:
+        """Return a copy of the newest frame, or None before the first capture."""
+        with self._lock:
+            if self._count == 0:
+                return None
+            slot = (self._count - 1) % self.capacity
+            return Frame(
+                pixels=self._frames[slot].copy(),
+                timestamp=float(self._timestamps[slot]),
+            )
+
+    def capture(self) -> Frame:
+        """
+        Return the newest frame, waiting for the first one if needed.
+        Lets the grabber stand in for an X11Screen, e.g. in `wait_until_stable`.
+        """
+        while (frame := self.latest()) is None:
+            if not self.running:
+                raise XError("frame grabber stopped")
+            time.sleep(self._interval / 2)
+        return frame
+
+
+class FreshFrames:
+    """
+    Frames for sampling the screen after an action, e.g. in `wait_until_stable`.
+    Each comes from the grabber when its newest frame was captured after `after`
+    and after the previous one returned, and straight from the screen otherwise,
+    so a slow grabber never hands out a frame from before the action or the same
+    frame twice.
+    """
+
+    def __init__(self, grabber: FrameGrabber, screen: X11Screen, after: float):
+        self._grabber = grabber
+        self._screen = screen
+        self._after = after
+
+    def capture(self) -> Frame:
+        frame = self._grabber.latest()
+        if frame is None or frame.timestamp <= self._after:
+            frame = self._screen.capture()
+        self._after = frame.timestamp
+        return frame
+
+
+_grabbers: dict[int | None, FrameGrabber] = {}
+_grabbers_lock = threading.Lock()
+# viewers of each display, and the displays whose grabber they started
+_watchers: dict[int | None, int] = {}
+_started_for_watchers: set[int | None] = set()
+_watchers_lock = threading.Lock()
+
+
+def get_grabber(
+    display_num: int | None, fps: float | None = None
+) -> FrameGrabber | None:
+    """
+    Return the running grabber for a display. When none is running and `fps` is
+    given, start one at that rate; returns None if the display can't be captured.
+    """
+    with _grabbers_lock:
+        grabber = _grabbers.get(display_num)
+        if grabber is not None and grabber.running:
+            return grabber
+        _grabbers.pop(display_num, None)
+        if not fps:
+            return None
+        screen = get_screen(display_num)
+        if screen is None:
+            return None
+        grabber = FrameGrabber(screen, fps)
+        grabber.start()
+        _grabbers[display_num] = grabber
+        return grabber
+
+
+def stop_grabber(display_num: int | None):
+    """Stop the background capture for a display, if one is running."""
+    with _grabbers_lock:
+        grabber = _grabbers.pop(display_num, None)
+    if grabber is not None:
+        grabber.stop()
+
+
+def watch_grabber(display_num: int | None, fps: float) -> FrameGrabber | None:
+    """
+    Return the running grabber for a viewer of a display, such as the live preview,
+    starting one at `fps` if needed. Call `unwatch_grabber` once the viewer has
+    left: a grabber started for viewers is stopped when the last of them leaves.
+    """
+    with _watchers_lock:
+        running = get_grabber(display_num)
+        grabber = running or get_grabber(display_num, fps)
+        if grabber is None:
+            return None
+        if running is None:
+            _started_for_watchers.add(display_num)
+        _watchers[display_num] = _watchers.get(display_num, 0) + 1
+        return grabber
+
+
+def unwatch_grabber(display_num: int | None):
+    """Release a grabber returned by `watch_grabber`."""
+    with _watchers_lock:
+        watchers = _watchers.pop(display_num, 0) - 1
+        if watchers > 0:
+            _watchers[display_num] = watchers
+        elif display_num in _started_for_watchers:
+            _started_for_watchers.discard(display_num)
+            stop_grabber(display_num)
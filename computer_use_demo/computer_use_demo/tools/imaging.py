@@ -0,0 +1,156 @@
+"""In-memory resampling and encoding of screen frames."""
+
+import io
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Literal
+
+import numpy as np
+from PIL import Image
+
+# output rows/columns resampled per matrix product; keeps the weight blocks small
+RESAMPLE_TILE = 64
+
+ImageFormat = Literal["png", "webp", "jpeg"]
+
+MEDIA_TYPES: dict[ImageFormat, str] = {
+    "png": "image/png",
+    "webp": "image/webp",
+    "jpeg": "image/jpeg",
+}
+
+DEFAULT_PNG_LEVEL = 6
+DEFAULT_QUALITY = 85
+
+
+@dataclass(frozen=True)
+class EncodingProfile:
+    """
+    How screenshots are encoded: the image format plus its compression settings.
+    `level` is the zlib level for PNG; `quality` applies to lossy WebP and JPEG.
+    """
+
+    format: ImageFormat = "png"
+    level: int = DEFAULT_PNG_LEVEL
+    quality: int = DEFAULT_QUALITY
+    lossless: bool = True
+
+    @property
+    def media_type(self) -> str:
+        return MEDIA_TYPES[self.format]
+
+    @property
+    def name(self) -> str:
+        if self.format == "png":
+            return f"png:{self.level}"
+        if self.format == "webp" and self.lossless:
+            return "webp-lossless"
+        return f"{self.format}:{self.quality}"
+
+    @classmethod
+    def parse(cls, spec: str) -> "EncodingProfile":
+        """
+        Parse a profile name: `png`, `png:<level 0-9>`, `webp-lossless`,
+        `webp:<quality 1-100>` or `jpeg:<quality 1-100>`.
+        """
+        name, _, value = spec.strip().lower().partition(":")
+        try:
+            if name == "png":
+                level = int(value) if value else DEFAULT_PNG_LEVEL
+                if 0 <= level <= 9:
+                    return cls(format="png", level=level)
+            elif name == "webp-lossless" and not value:
+                return cls(format="webp", lossless=True)
+            elif name in ("webp", "jpeg", "jpg"):
+                quality = int(value) if value else DEFAULT_QUALITY
+                if 1 <= quality <= 100:
+                    return cls(
+                        format="jpeg" if name == "jpg" else name,
+                        quality=quality,
+                        lossless=False,
+                    )
+        except ValueError:
+            pass
+        raise ValueError(f"Unknown screenshot encoding profile: {spec!r}")
+
+
+PNG = EncodingProfile()
+
+
+def resize(pixels: np.ndarray, width: int, height: int) -> np.ndarray:
+    """
+    Resize an (height, width, channels) uint8 array by area averaging.
+    Each output pixel is the exact mean of the source area it covers, which keeps
+    thin UI lines and text legible when downscaling screenshots.
+    """
+    source_height, source_width, channels = pixels.shape
+    if (source_width, source_height) == (width, height):
+        return pixels
+
+    planes = pixels.transpose(2, 0, 1).astype(np.float32, order="C")
+
+    columns = np.empty((channels, source_height, width), dtype=np.float32)
+    weights = _area_weights(source_width, width)
+    rows_in = planes.reshape(channels * source_height, source_width)
+    rows_out = columns.reshape(channels * source_height, width)
+    for out_start, out_end, in_start, in_end in _tiles(source_width, width):
+        rows_out[:, out_start:out_end] = (
+            rows_in[:, in_start:in_end] @ weights[out_start:out_end, in_start:in_end].T
+        )
+
+    resized = np.empty((channels, height, width), dtype=np.float32)
+    weights = _area_weights(source_height, height)
+    for out_start, out_end, in_start, in_end in _tiles(source_height, height):
+        resized[:, out_start:out_end] = (
+            weights[out_start:out_end, in_start:in_end] @ columns[:, in_start:in_end]
+        )
+
+    np.rint(resized, out=resized)
+    np.clip(resized, 0, 255, out=resized)
+    return np.ascontiguousarray(resized.astype(np.uint8).transpose(1, 2, 0))
+
+
+@lru_cache(maxsize=8)
+def _area_weights(length: int, size: int) -> np.ndarray:
+    """The (size, length) matrix of source coverage for each output sample."""
+    scale = length / size
+    edges = np.arange(size + 1) * scale
+    source = np.arange(length)
+    overlap = np.minimum(source + 1, edges[1:, None]) - np.maximum(
+        source, edges[:-1, None]
+    )
+    return (np.clip(overlap, 0, None) / scale).astype(np.float32)
+
+
+def _tiles(length: int, size: int):
+    """Yield output spans with the source span that contributes to them."""
+    scale = length / size
+    for out_start in range(0, size, RESAMPLE_TILE):
+        out_end = min(out_start + RESAMPLE_TILE, size)
+        yield (
+            out_start,
+            out_end,
+            int(out_start * scale),
+            min(length, int(np.ceil(out_end * scale))),
+        )
+
+
+def encode(pixels: np.ndarray, profile: EncodingProfile = PNG) -> bytes:
+    """Encode an RGB array with the given profile straight into memory."""
+    buffer = io.BytesIO()
+    image = Image.fromarray(pixels)
+    if profile.format == "png":
+        image.save(buffer, format="PNG", compress_level=profile.level)
+    elif profile.format == "webp" and profile.lossless:
+        image.save(buffer, format="WEBP", lossless=True, method=4)
+    elif profile.format == "webp":
+        image.save(buffer, format="WEBP", quality=profile.quality, method=4)
+    else:
+        image.save(buffer, format="JPEG", quality=profile.quality, optimize=True)
+    return buffer.getvalue()
+
+
+def decode(data: bytes) -> np.ndarray:
+    """Decode an encoded image into an RGB array."""
+    with Image.open(io.BytesIO(data)) as image:
+        return np.asarray(image.convert("RGB"))
@@ -0,0 +1,46 @@
+"""Optional text recognition on screen frames with the tesseract command-line tool."""
+
+import asyncio
+import re
+import shutil
+
+import numpy as np
+
+from .imaging import encode
+
+OCR_TIMEOUT = 10.0  # seconds
+
+
+def ocr_available() -> bool:
+    return shutil.which("tesseract") is not None
+
+
+async def recognize(pixels: np.ndarray) -> str:
+    """Return the text tesseract reads in an RGB array, or "" if it fails."""
+    data = await asyncio.to_thread(encode, pixels)
+    process = await asyncio.create_subprocess_exec(
+        "tesseract",
+        "stdin",
+        "stdout",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    try:
+        stdout, _ = await asyncio.wait_for(
+            process.communicate(data), timeout=OCR_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        return ""
+    return stdout.decode(errors="replace")
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().casefold()
+
+
+async def contains_text(pixels: np.ndarray, text: str) -> bool:
+    """Whether the text appears in the frame, ignoring case and line breaks."""
+    return _normalize(text) in _normalize(await recognize(pixels))
@@ -1,9 +1,22 @@
 """Utility to run shell commands asynchronously with a timeout."""
 
 import asyncio
+import codecs
+import os
+import resource
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import BinaryIO
+
+from .usage import ResourceUsage, RssSampler
 
 TRUNCATED_MESSAGE: str = "<response clipped><NOTE>To save on context only part of this file has been shown to you. You should retry this tool after you have searched inside the file with `grep -n` in order to find the line numbers of what you are looking for.</NOTE>"
 MAX_RESPONSE_LEN: int = 16000
+READ_SIZE: int = 64 * 1024  # bytes
 
 
 def maybe_truncate(content: str, truncate_after: int | None = MAX_RESPONSE_LEN):
@@ -15,28 +28,250 @@ def maybe_truncate(content: str, truncate_after: int | None = MAX_RESPONSE_LEN):
     )
 
 
-async def run(
+class OutputCapture:
+    """
+    Collects a stream of command output in bounded memory.
+    Output that fits in `head` + `tail` bytes is kept whole. Past that, only its
+    first `head` and last `tail` bytes are kept, and if `spill_dir` is given, all
+    of it is also written to a file there, so nothing is lost.
+    """
+
+    def __init__(
+        self,
+        head: int = MAX_RESPONSE_LEN // 2,
+        tail: int = MAX_RESPONSE_LEN // 2,
+        spill_dir: str | None = None,
+        spill_name: str = "output",
+    ):
+        self._head_limit = head
+        self._tail_limit = tail
+        self._spill_dir = spill_dir
+        self._spill_name = spill_name
+        self._spill: BinaryIO | None = None
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.size = 0
+        self.spill_path: str | None = None
+
+    @property
+    def clipped(self) -> bool:
+        return self.size > self._head_limit + self._tail_limit
+
+    def write(self, data: bytes):
+        was_clipped = self.clipped
+        self.size += len(data)
+        if not self.clipped:
+            self.head += data
+        elif not was_clipped:
+            # the output just outgrew memory: split what is kept and start the spill file
+            whole = self.head + data
+            self._spill_write(whole)
+            self.head = whole[: self._head_limit]
+            self.tail = whole[-self._tail_limit :] if self._tail_limit else bytearray()
+        else:
+            self._spill_write(data)
+            if self._tail_limit:
+                self.tail = (self.tail + data)[-self._tail_limit :]
+
+    def _spill_write(self, data: bytes | bytearray):
+        if self._spill_dir is None:
+            return
+        if self._spill is None:
+            os.makedirs(self._spill_dir, exist_ok=True)
+            fd, self.spill_path = tempfile.mkstemp(
+                prefix=f"{self._spill_name}-", suffix=".log", dir=self._spill_dir
+            )
+            self._spill = os.fdopen(fd, "wb")
+        self._spill.write(data)
+
+    def close(self):
+        """Finish the spill file, if any."""
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+    def text(self) -> str:
+        """The output, with a note in place of the part that was not kept."""
+        if not self.clipped:
+            return self.head.decode(errors="replace")
+        # a character split at either edge of the gap is dropped rather than garbled
+        head = codecs.getincrementaldecoder("utf-8")(errors="replace").decode(
+            bytes(self.head)
+        )
+        tail = bytes(self.tail)
+        start = 0
+        while start < min(len(tail), 3) and tail[start] & 0xC0 == 0x80:
+            start += 1
+        omitted = self.size - len(self.head) - len(self.tail)
+        note = (
+            f"<response clipped: {omitted} of {self.size} bytes in the middle"
+            " are not shown."
+        )
+        if self.spill_path is not None:
+            note += (
+                f" The full output is saved in {self.spill_path}; search it with"
+                " `grep -n` or print line ranges with `sed -n` instead of running"
+                " the command again."
+            )
+        return f"{head}\n{note}>\n{tail[start:].decode(errors='replace')}"
+
+
+@dataclass(frozen=True)
+class CommandResult:
+    """The outcome of a command run with `run_capped`."""
+
+    returncode: int
+    stdout: str
+    stderr: str
+    # bytes the command wrote to each stream, including any past the cap
+    stdout_size: int
+    stderr_size: int
+    # from start until exit with both pipes drained
+    usage: ResourceUsage
+
+    @property
+    def duration(self) -> float:
+        return self.usage.wall_time
+
+
+async def run_capped(
     cmd: str,
     timeout: float | None = 120.0,  # seconds
-    truncate_after: int | None = MAX_RESPONSE_LEN,
-):
-    """Run a shell command asynchronously with a timeout."""
-    process = await asyncio.create_subprocess_shell(
-        cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    max_bytes: int | None = MAX_RESPONSE_LEN,
+) -> CommandResult:
+    """
+    Run a shell command asynchronously with a timeout, reading both pipes as the
+    output arrives. At most `max_bytes` of each stream are kept; the rest is read
+    and counted but not stored, so a chatty command can neither block on a full
+    pipe nor grow memory without bound.
+    The command is reaped with `os.wait4`, so its CPU time covers it and everything
+    it waited for. Its peak memory is sampled from /proc while it runs.
+    """
+    start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    # in a session of its own, so a timeout kills whatever the command started too.
+    # Popen only forks here, as asyncio's own subprocess transport does
+    process = subprocess.Popen(  # noqa: ASYNC220
+        cmd,
+        shell=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=True,
     )
+    # reaped here rather than by asyncio's child watcher, which drops the rusage
+    exited = asyncio.ensure_future(_reap(process.pid))
+    # Popen returns once the child has exec'd, so the parent's memory it started
+    # with is not sampled
+    sampler = RssSampler(process.pid, include_root=True)
+    sampler.start()
 
+    limit = sys.maxsize if max_bytes is None else max_bytes
+    stdout = OutputCapture(head=limit, tail=0)
+    stderr = OutputCapture(head=limit, tail=0)
+    transports = []
     try:
-        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
-        return (
-            process.returncode or 0,
-            maybe_truncate(stdout.decode(), truncate_after=truncate_after),
-            maybe_truncate(stderr.decode(), truncate_after=truncate_after),
-        )
-    except asyncio.TimeoutError as exc:
+        readers = []
+        for pipe in (process.stdout, process.stderr):
+            reader = asyncio.StreamReader(limit=READ_SIZE)
+            transport, _ = await loop.connect_read_pipe(
+                lambda reader=reader: asyncio.StreamReaderProtocol(reader), pipe
+            )
+            transports.append(transport)
+            readers.append(reader)
+        async with asyncio.timeout(timeout):
+            await asyncio.gather(
+                _drain(readers[0], stdout),
+                _drain(readers[1], stderr),
+                asyncio.shield(exited),
+            )
+    except BaseException as exc:
+        # timed out or cancelled: stop the command so it can be reaped
         try:
-            process.kill()
+            os.killpg(process.pid, signal.SIGKILL)
         except ProcessLookupError:
             pass
-        raise TimeoutError(
-            f"Command '{cmd}' timed out after {timeout} seconds"
-        ) from exc
+        if isinstance(exc, asyncio.TimeoutError):
+            raise TimeoutError(
+                f"Command '{cmd}' timed out after {timeout} seconds"
+            ) from exc
+        raise
+    finally:
+        for transport in transports:
+            transport.close()
+        # not sampled again: once reaped, the pid may belong to another process
+        max_rss = await sampler.stop(final_sample=False)
+        _, status, rusage = await exited
+        process.returncode = os.waitstatus_to_exitcode(status)
+
+    return CommandResult(
+        returncode=process.returncode or 0,
+        stdout=_capped_text(stdout),
+        stderr=_capped_text(stderr),
+        stdout_size=stdout.size,
+        stderr_size=stderr.size,
+        usage=ResourceUsage.from_rusage(
+            rusage,
+            wall_time=time.perf_counter() - start,
+            max_rss=max_rss,
+            output_bytes=stdout.size + stderr.size,
+        ),
+    )
+
+
+async def _reap(pid: int) -> tuple[int, int, resource.struct_rusage]:
+    """
+    Wait for a child to exit and reap it with `os.wait4`. The wait happens on the
+    event loop, so a long command does not hold one of the default executor's
+    threads, which screen capture and encoding need.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        pidfd = os.pidfd_open(pid)
+    except (AttributeError, OSError):
+        # no pidfd support: poll, backing off to a tenth of a second
+        delay = 0.001
+        while True:
+            reaped = os.wait4(pid, os.WNOHANG)  # noqa: ASYNC222
+            if reaped[0]:
+                return reaped
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.1)
+    try:
+        exited = loop.create_future()
+        # the pidfd becomes readable once the child has exited
+        loop.add_reader(pidfd, lambda: exited.done() or exited.set_result(None))
+        try:
+            await exited
+        finally:
+            loop.remove_reader(pidfd)
+        return os.wait4(pid, os.WNOHANG)  # noqa: ASYNC222
+    finally:
+        os.close(pidfd)
+
+
+async def _drain(stream: asyncio.StreamReader, capture: OutputCapture):
+    while chunk := await stream.read(READ_SIZE):
+        capture.write(chunk)
+
+
+def _capped_text(capture: OutputCapture) -> str:
+    if not capture.clipped:
+        return capture.text()
+    # drop a character cut in half by the cap
+    kept = codecs.getincrementaldecoder("utf-8")(errors="replace").decode(
+        bytes(capture.head)
+    )
+    return kept + TRUNCATED_MESSAGE
+
+
+async def run(
+    cmd: str,
+    timeout: float | None = 120.0,  # seconds
+    truncate_after: int | None = MAX_RESPONSE_LEN,
+):
+    """
+    Run a shell command asynchronously with a timeout, and return its return code,
+    stdout and stderr. See `run_capped` for the size and timing of the run.
+    """
+    result = await run_capped(cmd, timeout=timeout, max_bytes=truncate_after)
+    return result.returncode, result.stdout, result.stderr
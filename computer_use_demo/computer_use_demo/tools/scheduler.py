@@ -0,0 +1,93 @@
+"""Concurrent execution of the tool calls the model makes in one turn."""
+
+import asyncio
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass, replace
+from functools import partial
+from typing import Any
+
+from .base import ResourceClaim, ToolResult
+from .collection import ToolCollection
+
+
+@dataclass(frozen=True)
+class ToolCall:
+    id: str
+    name: str
+    tool_input: dict[str, Any]
+    take_screenshot: bool = True
+
+
+def defer_screenshots(
+    calls: list[ToolCall], screen_tool: str = "computer"
+) -> list[ToolCall]:
+    """
+    Ask only the last call to the screen tool in a turn for a screenshot. The model
+    sees none of the earlier ones before the next action runs, so capturing them
+    only adds delay. Actions like screenshot and zoom return their image regardless.
+    """
+    screen_calls = [
+        index for index, call in enumerate(calls) if call.name == screen_tool
+    ]
+    return [
+        replace(call, take_screenshot=False) if index in screen_calls[:-1] else call
+        for index, call in enumerate(calls)
+    ]
+
+
+def conflicts(first: list[ResourceClaim], second: list[ResourceClaim]) -> bool:
+    """Whether two calls with these claims must not run at the same time."""
+    return any(a.conflicts_with(b) for a in first for b in second)
+
+
+async def run_tool_calls(
+    collection: ToolCollection,
+    calls: list[ToolCall],
+    on_output: Callable[[str, str, str], None] | None = None,
+) -> AsyncIterator[tuple[ToolCall, ToolResult]]:
+    """
+    Run tool calls concurrently where their resources allow, and yield each call
+    with its result in the order the calls were made.
+    A call starts once every earlier call it conflicts with has finished, so
+    conflicting calls still run in order. Calls that are still running are
+    cancelled if a call raises or the caller stops iterating.
+    `on_output` receives (call id, stream, text) for output produced while a call
+    runs, ahead of its result.
+    """
+    claims = [
+        collection.resources(name=call.name, tool_input=call.tool_input)
+        for call in calls
+    ]
+    tasks: list[asyncio.Task[ToolResult]] = []
+    for index, call in enumerate(calls):
+        earlier = [
+            task
+            for task, task_claims in zip(tasks, claims)
+            if conflicts(claims[index], task_claims)
+        ]
+        tasks.append(
+            asyncio.create_task(_run_after(earlier, collection, call, on_output))
+        )
+    try:
+        for call, task in zip(calls, tasks):
+            yield call, await task
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _run_after(
+    earlier: list[asyncio.Task[ToolResult]],
+    collection: ToolCollection,
+    call: ToolCall,
+    on_output: Callable[[str, str, str], None] | None,
+) -> ToolResult:
+    if earlier:
+        await asyncio.wait(earlier)
+    return await collection.run(
+        name=call.name,
+        tool_input=call.tool_input,
+        take_screenshot=call.take_screenshot,
+        on_output=partial(on_output, call.id) if on_output else None,
+    )
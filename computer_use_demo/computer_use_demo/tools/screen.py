@@ -0,0 +1,362 @@
+"""In-process screen capture from the X display over a persistent connection."""
+
+import asyncio
+import ctypes
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Protocol
+
+import numpy as np
+
+from . import xlib
+
+IPC_PRIVATE = 0
+IPC_CREAT = 0o1000
+IPC_RMID = 0
+
+# how long to wait before retrying a display that could not be opened
+RETRY_INTERVAL = 30.0  # seconds
+
+UNCHANGED_SCREEN_NOTE = "The screen has not changed since the previous screenshot."
+
+# frames are compared in square blocks of this many pixels to find changed regions
+CHANGE_BLOCK_SIZE = 16
+
+
+@dataclass(frozen=True)
+class Frame:
+    """A captured frame as an RGB array of shape (height, width, 3)."""
+
+    pixels: np.ndarray
+    timestamp: float
+
+    @property
+    def width(self) -> int:
+        return self.pixels.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.pixels.shape[0]
+
+
+class FrameSource(Protocol):
+    def capture(self) -> Frame: ...
+
+
+class FrameCache:
+    """
+    Remembers recently encoded frames by a digest of their pixels, so a screen
+    that has not changed since the last screenshot can be reported instead of
+    being encoded and sent again.
+    """
+
+    def __init__(self, size: int = 8):
+        self._size = size
+        self._encoded: OrderedDict[bytes, str] = OrderedDict()
+        self.latest: bytes | None = None
+
+    @staticmethod
+    def digest(pixels: np.ndarray) -> bytes:
+        return hashlib.blake2b(np.ascontiguousarray(pixels), digest_size=16).digest()
+
+    def get(self, digest: bytes) -> str | None:
+        """Return the encoded image for a digest if it is still cached."""
+        encoded = self._encoded.get(digest)
+        if encoded is not None:
+            self._encoded.move_to_end(digest)
+        return encoded
+
+    def remember(self, digest: bytes, encoded: str):
+        """Record an encoded frame as the latest one sent."""
+        self.latest = digest
+        self._encoded[digest] = encoded
+        self._encoded.move_to_end(digest)
+        while len(self._encoded) > self._size:
+            self._encoded.popitem(last=False)
+
+
+class X11Screen:
+    """
+    Captures the root window of an X display.
+    Uses the MIT-SHM extension when the server supports it, so pixels are copied
+    straight out of a shared memory segment, and falls back to XGetImage otherwise.
+    """
+
+    def __init__(self, display_num: int | None):
+        self._x11 = xlib.library("x11")
+        self._display = xlib.open_display(display_num)
+        self._lock = threading.Lock()
+        screen = self._x11.XDefaultScreen(self._display)
+        self._root = self._x11.XRootWindow(self._display, screen)
+        self.width = self._x11.XDisplayWidth(self._display, screen)
+        self.height = self._x11.XDisplayHeight(self._display, screen)
+        self._shm_image = None
+        self._shm_info = None
+        try:
+            self._attach_shm(screen)
+        except xlib.XError:
+            self._shm_image = None
+
+    @property
+    def uses_shm(self) -> bool:
+        return self._shm_image is not None
+
+    def _attach_shm(self, screen: int):
+        xext = xlib.library("xext")
+        libc = xlib.library("c")
+        if not xext.XShmQueryExtension(self._display):
+            raise xlib.XError("MIT-SHM extension is not available")
+
+        info = xlib.XShmSegmentInfo()
+        image = xext.XShmCreateImage(
+            self._display,
+            self._x11.XDefaultVisual(self._display, screen),
+            self._x11.XDefaultDepth(self._display, screen),
+            xlib.Z_PIXMAP,
+            None,
+            ctypes.byref(info),
+            self.width,
+            self.height,
+        )
+        if not image:
+            raise xlib.XError("XShmCreateImage failed")
+        size = image.contents.bytes_per_line * image.contents.height
+        info.shmid = libc.shmget(IPC_PRIVATE, size, IPC_CREAT | 0o600)
+        if info.shmid < 0:
+            self._x11.XDestroyImage(image)
+            raise xlib.XError("shmget failed")
+        address = libc.shmat(info.shmid, None, 0)
+        if address in (None, ctypes.c_void_p(-1).value):
+            libc.shmctl(info.shmid, IPC_RMID, None)
+            self._x11.XDestroyImage(image)
+            raise xlib.XError("shmat failed")
+        info.shmaddr = address
+        image.contents.data = address
+        info.readOnly = 0
+
+        attached = xext.XShmAttach(self._display, ctypes.byref(info))
+        self._x11.XSync(self._display, 0)
+        # the segment is freed once both sides detach
+        libc.shmctl(info.shmid, IPC_RMID, None)
+        if not attached or xlib.pop_error(self._display) is not None:
+            # XDestroyImage would free() the shm address, so clear it first
+            image.contents.data = None
+            self._x11.XDestroyImage(image)
+            libc.shmdt(address)
+            raise xlib.XError("XShmAttach failed")
+
+        self._shm_image = image
+        self._shm_info = info
+
+    def capture(self, out: np.ndarray | None = None) -> Frame:
+        """
+        Capture the full screen.
+        Pixels are written into `out` when given, so a caller that keeps its own
+        buffers does not allocate a new array per frame.
+        """
+        with self._lock:
+            if self._display is None:
+                raise xlib.XError("display connection is closed")
+            if self._shm_image is not None:
+                ok = xlib.library("xext").XShmGetImage(
+                    self._display, self._root, self._shm_image, 0, 0, xlib.ALL_PLANES
+                )
+                if ok:
+                    return Frame(
+                        pixels=_to_rgb(self._shm_image.contents, out),
+                        timestamp=time.time(),
+                    )
+            return self._get_image(0, 0, self.width, self.height, out)
+
+    def capture_region(self, x: int, y: int, width: int, height: int) -> Frame:
+        """Capture a rectangle of the screen at native resolution."""
+        with self._lock:
+            if self._display is None:
+                raise xlib.XError("display connection is closed")
+            return self._get_image(x, y, width, height)
+
+    def _get_image(
+        self, x: int, y: int, width: int, height: int, out: np.ndarray | None = None
+    ) -> Frame:
+        image = self._x11.XGetImage(
+            self._display,
+            self._root,
+            x,
+            y,
+            width,
+            height,
+            xlib.ALL_PLANES,
+            xlib.Z_PIXMAP,
+        )
+        if not image:
+            xlib.pop_error(self._display)
+            raise xlib.XError("XGetImage failed")
+        try:
+            return Frame(pixels=_to_rgb(image.contents, out), timestamp=time.time())
+        finally:
+            self._x11.XDestroyImage(image)
+
+    def close(self):
+        with self._lock:
+            if self._display is None:
+                return
+            if self._shm_image is not None and self._shm_info is not None:
+                xlib.library("xext").XShmDetach(
+                    self._display, ctypes.byref(self._shm_info)
+                )
+                address = self._shm_info.shmaddr
+                self._shm_image.contents.data = None
+                self._x11.XDestroyImage(self._shm_image)
+                xlib.library("c").shmdt(address)
+                self._shm_image = None
+            self._x11.XCloseDisplay(self._display)
+            self._display = None
+
+
+def _to_rgb(image: xlib.XImage, out: np.ndarray | None = None) -> np.ndarray:
+    """Copy a 32 bits-per-pixel BGRX ZPixmap into `out` or a new RGB array."""
+    if image.bits_per_pixel != 32:
+        raise xlib.XError(f"unsupported pixel format: {image.bits_per_pixel} bpp")
+    buffer = (ctypes.c_ubyte * (image.bytes_per_line * image.height)).from_address(
+        image.data
+    )
+    bgrx = np.frombuffer(buffer, dtype=np.uint8).reshape(
+        image.height, image.bytes_per_line // 4, 4
+    )
+    rgb = bgrx[:, : image.width, 2::-1]
+    if out is None:
+        return np.ascontiguousarray(rgb)
+    np.copyto(out, rgb)
+    return out
+
+
+_screens: dict[int | None, X11Screen] = {}
+_failures: dict[int | None, float] = {}
+_screens_lock = threading.Lock()
+
+
+def get_screen(display_num: int | None) -> X11Screen | None:
+    """
+    Return the shared capture connection for a display, or None if in-process
+    capture is unavailable (no libX11, display not reachable, ...).
+    """
+    with _screens_lock:
+        if display_num in _screens:
+            return _screens[display_num]
+        failed_at = _failures.get(display_num)
+        if failed_at is not None and time.monotonic() - failed_at < RETRY_INTERVAL:
+            return None
+        try:
+            screen = X11Screen(display_num)
+        except xlib.XError:
+            _failures[display_num] = time.monotonic()
+            return None
+        _screens[display_num] = screen
+        return screen
+
+
+def discard_screen(display_num: int | None, retry_later: bool = True):
+    """
+    Close and forget the shared connection for a display after a capture failure.
+    Without `retry_later`, the next request reconnects at once, e.g. after the
+    display was restarted on purpose.
+    """
+    with _screens_lock:
+        screen = _screens.pop(display_num, None)
+        if retry_later:
+            _failures[display_num] = time.monotonic()
+        else:
+            _failures.pop(display_num, None)
+    if screen is not None:
+        screen.close()
+
+
+def changed_regions(
+    previous: np.ndarray, current: np.ndarray, block: int = CHANGE_BLOCK_SIZE
+) -> list[tuple[int, int, int, int]]:
+    """
+    Bounding boxes (left, top, right, bottom) of the areas that differ between two
+    frames of the same size, largest first.
+    Frames are compared in blocks of `block` pixels, and touching changed blocks
+    are merged, so boxes follow the block grid.
+    """
+    height, width, channels = current.shape
+    rows, columns = -(-height // block), -(-width // block)
+    # channels stay interleaved along each row, so a block spans block * channels values
+    changed = np.zeros((rows * block, columns * block * channels), dtype=bool)
+    np.not_equal(
+        previous.reshape(height, -1),
+        current.reshape(height, -1),
+        out=changed[:height, : width * channels],
+    )
+    grid = changed.reshape(rows, block, columns, block * channels).any(axis=(1, 3))
+
+    boxes = []
+    for top, left, bottom, right in _components(grid):
+        boxes.append(
+            (
+                left * block,
+                top * block,
+                min((right + 1) * block, width),
+                min((bottom + 1) * block, height),
+            )
+        )
+    boxes.sort(key=lambda box: (box[2] - box[0]) * (box[3] - box[1]), reverse=True)
+    return boxes
+
+
+def _components(grid: np.ndarray) -> list[tuple[int, int, int, int]]:
+    """The (top, left, bottom, right) cell extents of each 8-connected group of set cells."""
+    remaining = {(int(row), int(column)) for row, column in np.argwhere(grid)}
+    extents = []
+    while remaining:
+        stack = [remaining.pop()]
+        top, left = stack[0]
+        bottom, right = top, left
+        while stack:
+            row, column = stack.pop()
+            top, bottom = min(top, row), max(bottom, row)
+            left, right = min(left, column), max(right, column)
+            for neighbour in (
+                (row + dr, column + dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1)
+            ):
+                if neighbour in remaining:
+                    remaining.remove(neighbour)
+                    stack.append(neighbour)
+        extents.append((top, left, bottom, right))
+    return extents
+
+
+async def wait_until_stable(
+    screen: FrameSource,
+    *,
+    min_delay: float,
+    max_delay: float,
+    quiet_period: float,
+    interval: float,
+    stride: int = 4,
+) -> Frame:
+    """
+    Sample the screen until it has not changed for `quiet_period` seconds and
+    return the last frame. Waits at least `min_delay` and at most `max_delay`.
+    Frames are compared on a strided grid of pixels, which is enough to notice
+    redraws while keeping each comparison cheap.
+    """
+    start = time.monotonic()
+    await asyncio.sleep(min_delay)
+    frame = await asyncio.to_thread(screen.capture)
+    sample = frame.pixels[::stride, ::stride]
+    stable_since = time.monotonic()
+    while time.monotonic() - start < max_delay:
+        if time.monotonic() - stable_since >= quiet_period:
+            break
+        await asyncio.sleep(interval)
+        frame = await asyncio.to_thread(screen.capture)
+        next_sample = frame.pixels[::stride, ::stride]
+        if not np.array_equal(sample, next_sample):
+            sample = next_sample
+            stable_since = time.monotonic()
+    return frame
@@ -0,0 +1,206 @@
+"""Accounting of the time, CPU and memory the commands run by tools use."""
+
+import asyncio
+import os
+import resource
+import time
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass
+
+# how often the process tree of a long-lived shell is sampled for its memory use
+RSS_SAMPLE_INTERVAL = 0.1  # seconds
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+@dataclass(frozen=True)
+class ResourceUsage:
+    """What a command, or a set of commands, used."""
+
+    wall_time: float = 0.0  # seconds
+    user_time: float = 0.0  # CPU seconds
+    system_time: float = 0.0  # CPU seconds
+    max_rss: int = 0  # bytes, peak resident memory of the command's processes
+    output_bytes: int = 0
+
+    def __add__(self, other: "ResourceUsage") -> "ResourceUsage":
+        return ResourceUsage(
+            wall_time=self.wall_time + other.wall_time,
+            user_time=self.user_time + other.user_time,
+            system_time=self.system_time + other.system_time,
+            max_rss=max(self.max_rss, other.max_rss),
+            output_bytes=self.output_bytes + other.output_bytes,
+        )
+
+    @classmethod
+    def from_rusage(
+        cls,
+        rusage: resource.struct_rusage,
+        wall_time: float,
+        max_rss: int,
+        output_bytes: int,
+    ) -> "ResourceUsage":
+        """
+        The CPU time `os.wait4` reports for a child and the descendants it waited for.
+        Its ru_maxrss is not used: a child starts as a copy of its parent, and the
+        kernel records the parent's resident size as the child's peak when it execs,
+        so peak memory has to be sampled separately.
+        """
+        return cls(
+            wall_time=wall_time,
+            user_time=rusage.ru_utime,
+            system_time=rusage.ru_stime,
+            max_rss=max_rss,
+            output_bytes=output_bytes,
+        )
+
+    def to_dict(self) -> dict[str, float | int]:
+        return asdict(self)
+
+
+def sum_usage(usages: Iterable[ResourceUsage | None]) -> ResourceUsage | None:
+    """The total of the usages that were measured, or None if none was."""
+    measured = [usage for usage in usages if usage is not None]
+    return sum(measured[1:], measured[0]) if measured else None
+
+
+class RssSampler:
+    """
+    Keeps the peak total resident size of a process's descendants, and of the
+    process itself with `include_root`, sampled every `interval` seconds between
+    `start` and `stop`. Very short spikes can be missed.
+    """
+
+    def __init__(
+        self,
+        pid: int,
+        interval: float = RSS_SAMPLE_INTERVAL,
+        include_root: bool = False,
+    ):
+        self._pid = pid
+        self._interval = interval
+        self._include_root = include_root
+        self._max_rss = 0
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        self._max_rss = 0
+        self._task = asyncio.create_task(self._sample())
+
+    def _rss(self) -> int:
+        rss = descendants_rss(self._pid)
+        if self._include_root:
+            rss += process_rss(self._pid)
+        return rss
+
+    async def _sample(self):
+        while True:
+            self._max_rss = max(self._max_rss, self._rss())
+            await asyncio.sleep(self._interval)
+
+    async def stop(self, final_sample: bool = True) -> int:
+        """Stop sampling and return the peak, after one last sample if asked."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if final_sample:
+            self._max_rss = max(self._max_rss, self._rss())
+        return self._max_rss
+
+
+class ProcessTreeMonitor:
+    """
+    Measures what a long-lived process, such as a shell, and everything it starts
+    use between `start` and `stop`, from /proc.
+    CPU time is the difference in the tree's own time plus that of the children
+    it reaped. Peak memory is the largest total resident size of the descendants,
+    sampled every `interval` seconds, so very short spikes can be missed.
+    Where /proc is not available, only wall time is measured.
+    """
+
+    def __init__(self, pid: int, interval: float = RSS_SAMPLE_INTERVAL):
+        self._pid = pid
+        self._start = 0.0
+        self._start_times = (0.0, 0.0)
+        self._sampler = RssSampler(pid, interval)
+
+    def start(self):
+        self._start = time.perf_counter()
+        self._start_times = tree_times(self._pid)
+        self._sampler.start()
+
+    async def stop(self, output_bytes: int = 0) -> ResourceUsage:
+        max_rss = await self._sampler.stop()
+        wall_time = time.perf_counter() - self._start
+        user, system = tree_times(self._pid)
+        return ResourceUsage(
+            wall_time=wall_time,
+            # a job started earlier and reaped later is counted when it is reaped
+            user_time=max(0.0, user - self._start_times[0]),
+            system_time=max(0.0, system - self._start_times[1]),
+            max_rss=max_rss,
+            output_bytes=output_bytes,
+        )
+
+
+def _stat_fields(pid: int | str) -> list[str]:
+    """The fields of /proc/<pid>/stat from the state on, or [] if it cannot be read."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # the command name may contain spaces and parentheses, so split after it
+            return f.read().rsplit(")", 1)[1].split()
+    except (OSError, IndexError):
+        return []
+
+
+def descendants(pid: int) -> list[int]:
+    """The processes a process has started, and those they started, and so on."""
+    children: dict[int, list[int]] = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return []
+    for entry in entries:
+        if entry.isdigit() and (fields := _stat_fields(entry)):
+            children.setdefault(int(fields[1]), []).append(int(entry))
+    found, stack = [], list(children.get(pid, []))
+    while stack:
+        child = stack.pop()
+        found.append(child)
+        stack.extend(children.get(child, []))
+    return found
+
+
+def _times(pid: int) -> tuple[float, float]:
+    """User and system CPU seconds of a process and the children it has reaped."""
+    fields = _stat_fields(pid)
+    if not fields:
+        return 0.0, 0.0
+    utime, stime, cutime, cstime = (int(value) for value in fields[11:15])
+    return (utime + cutime) / CLOCK_TICKS, (stime + cstime) / CLOCK_TICKS
+
+
+def tree_times(pid: int) -> tuple[float, float]:
+    """User and system CPU seconds used by a process tree so far."""
+    user, system = 0.0, 0.0
+    for member in (pid, *descendants(pid)):
+        member_user, member_system = _times(member)
+        user += member_user
+        system += member_system
+    return user, system
+
+
+def process_rss(pid: int) -> int:
+    """Resident bytes of a process, or 0 if it cannot be read."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def descendants_rss(pid: int) -> int:
+    """Total resident bytes of the processes a process has started, not counting itself."""
+    return sum(process_rss(child) for child in descendants(pid))
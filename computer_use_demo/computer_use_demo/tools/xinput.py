@@ -0,0 +1,424 @@
+"""In-process input injection through the XTEST extension over a persistent connection."""
+
+import ctypes
+import shlex
+import threading
+import time
+from dataclasses import dataclass
+
+from . import xlib
+
+# how long to wait before retrying a display that could not be opened
+RETRY_INTERVAL = 30.0  # seconds
+
+NO_SYMBOL = 0
+CURRENT_TIME = 0
+
+XDOTOOL_COMMANDS = {
+    "mousemove",
+    "click",
+    "mousedown",
+    "mouseup",
+    "key",
+    "keydown",
+    "keyup",
+    "type",
+    "sleep",
+    "getmouselocation",
+}
+
+# key names accepted by xdotool that are not X keysym names
+KEY_ALIASES = {
+    "ctrl": "Control_L",
+    "control": "Control_L",
+    "alt": "Alt_L",
+    "shift": "Shift_L",
+    "super": "Super_L",
+    "win": "Super_L",
+    "cmd": "Super_L",
+    "meta": "Meta_L",
+    "enter": "Return",
+    "return": "Return",
+    "esc": "Escape",
+    "escape": "Escape",
+    "del": "Delete",
+    "delete": "Delete",
+    "backspace": "BackSpace",
+    "tab": "Tab",
+    "space": "space",
+    "pgup": "Prior",
+    "pageup": "Prior",
+    "page_up": "Prior",
+    "pgdn": "Next",
+    "pagedown": "Next",
+    "page_down": "Next",
+    "up": "Up",
+    "down": "Down",
+    "left": "Left",
+    "right": "Right",
+    "home": "Home",
+    "end": "End",
+    "insert": "Insert",
+}
+
+# characters typed with a dedicated key rather than their code point keysym
+CHARACTER_KEYSYMS = {
+    "\n": "Return",
+    "\r": "Return",
+    "\t": "Tab",
+}
+
+
+@dataclass(frozen=True)
+class InputStep:
+    """
+    One xdotool command, e.g. ("click", (1, 2, 10)) for `click --repeat 2 --delay 10 1`.
+    Arguments are already converted to the types the command needs.
+    """
+
+    command: str
+    args: tuple = ()
+
+
+def parse_xdotool(args: str) -> list[InputStep]:
+    """
+    Parse the arguments of an xdotool command line into steps.
+    Only the chained commands and options the computer tool generates are supported;
+    anything else raises ValueError so the caller can run xdotool itself.
+    """
+    try:
+        return _parse_tokens(shlex.split(args))
+    except IndexError:
+        raise ValueError(f"incomplete xdotool command: {args}") from None
+
+
+def _parse_tokens(tokens: list[str]) -> list[InputStep]:
+    steps: list[InputStep] = []
+    position = 0
+
+    def options(allowed: set[str]) -> dict[str, str]:
+        nonlocal position
+        values = {}
+        while position < len(tokens) and tokens[position].startswith("--"):
+            option = tokens[position]
+            position += 1
+            if option == "--":
+                break
+            if option not in allowed:
+                raise ValueError(f"unsupported xdotool option: {option}")
+            if option in ("--repeat", "--delay"):
+                values[option] = tokens[position]
+                position += 1
+            else:
+                values[option] = ""
+        return values
+
+    def operands() -> list[str]:
+        nonlocal position
+        values = []
+        while position < len(tokens) and tokens[position] not in XDOTOOL_COMMANDS:
+            values.append(tokens[position])
+            position += 1
+        return values
+
+    while position < len(tokens):
+        command = tokens[position]
+        position += 1
+        if command not in XDOTOOL_COMMANDS:
+            raise ValueError(f"unsupported xdotool command: {command}")
+        if command == "mousemove":
+            options({"--sync"})
+            x, y = tokens[position : position + 2]
+            position += 2
+            steps.append(InputStep(command, (int(x), int(y))))
+        elif command == "click":
+            values = options({"--repeat", "--delay"})
+            button = int(tokens[position])
+            position += 1
+            steps.append(
+                InputStep(
+                    command,
+                    (
+                        button,
+                        int(values.get("--repeat", 1)),
+                        int(values.get("--delay", 100)),
+                    ),
+                )
+            )
+        elif command in ("mousedown", "mouseup"):
+            steps.append(InputStep(command, (int(tokens[position]),)))
+            position += 1
+        elif command in ("key", "keydown", "keyup"):
+            options(set())
+            keys = operands()
+            if not keys:
+                raise ValueError(f"{command} needs at least one key")
+            steps.append(InputStep(command, tuple(keys)))
+        elif command == "type":
+            values = options({"--delay"})
+            text = " ".join(tokens[position:])
+            position = len(tokens)
+            steps.append(InputStep(command, (text, int(values.get("--delay", 12)))))
+        elif command == "sleep":
+            steps.append(InputStep(command, (float(tokens[position]),)))
+            position += 1
+        elif command == "getmouselocation":
+            if options({"--shell"}) != {"--shell": ""}:
+                raise ValueError("getmouselocation is only supported with --shell")
+            steps.append(InputStep(command))
+    return steps
+
+
+class XTestInput:
+    """
+    Injects pointer and keyboard events into an X display with the XTEST extension.
+    Characters without a key in the current layout are typed by temporarily binding
+    them to a spare keycode, as xdotool does.
+    """
+
+    def __init__(self, display_num: int | None):
+        self._x11 = xlib.library("x11")
+        self._xtst = xlib.library("xtst")
+        self._display = xlib.open_display(display_num)
+        self._lock = threading.Lock()
+        ignored = ctypes.c_int()
+        if not self._xtst.XTestQueryExtension(
+            self._display,
+            ctypes.byref(ignored),
+            ctypes.byref(ignored),
+            ctypes.byref(ignored),
+            ctypes.byref(ignored),
+        ):
+            self._x11.XCloseDisplay(self._display)
+            raise xlib.XError("XTEST extension is not available")
+        self._screen = self._x11.XDefaultScreen(self._display)
+        self._root = self._x11.XRootWindow(self._display, self._screen)
+        self._shift = self._x11.XKeysymToKeycode(
+            self._display, self._x11.XStringToKeysym(b"Shift_L")
+        )
+        self._spare_keycode = self._find_spare_keycode()
+
+    def _find_spare_keycode(self) -> int | None:
+        low, high = ctypes.c_int(), ctypes.c_int()
+        self._x11.XDisplayKeycodes(self._display, ctypes.byref(low), ctypes.byref(high))
+        per_keycode = ctypes.c_int()
+        count = high.value - low.value + 1
+        mapping = self._x11.XGetKeyboardMapping(
+            self._display, low.value, count, ctypes.byref(per_keycode)
+        )
+        if not mapping:
+            return None
+        try:
+            for index in range(count - 1, -1, -1):
+                row = index * per_keycode.value
+                if not any(mapping[row + i] for i in range(per_keycode.value)):
+                    return low.value + index
+        finally:
+            self._x11.XFree(mapping)
+        return None
+
+    def run(self, steps: list[InputStep]) -> str:
+        """
+        Inject the steps in order and return what xdotool would have printed.
+        Raises ValueError before injecting anything if a key name can't be resolved.
+        """
+        output = []
+        with self._lock:
+            if self._display is None:
+                raise xlib.XError("display connection is closed")
+            for step in steps:
+                if step.command in ("key", "keydown", "keyup"):
+                    for combo in step.args:
+                        self._resolve_combo(combo)
+            try:
+                for step in steps:
+                    output.append(getattr(self, f"_{step.command}")(*step.args))
+            finally:
+                self._x11.XSync(self._display, 0)
+        error = xlib.pop_error(self._display)
+        if error is not None:
+            raise xlib.XError(f"input injection failed with X error {error}")
+        return "".join(text for text in output if text)
+
+    def _mousemove(self, x: int, y: int):
+        self._xtst.XTestFakeMotionEvent(self._display, self._screen, x, y, CURRENT_TIME)
+        self._x11.XSync(self._display, 0)
+
+    def _click(self, button: int, repeat: int, delay_ms: int):
+        for index in range(repeat):
+            if index:
+                time.sleep(delay_ms / 1000)
+            self._button(button, True)
+            self._button(button, False)
+
+    def _mousedown(self, button: int):
+        self._button(button, True)
+
+    def _mouseup(self, button: int):
+        self._button(button, False)
+
+    def _button(self, button: int, press: bool):
+        self._xtst.XTestFakeButtonEvent(self._display, button, press, CURRENT_TIME)
+        self._x11.XFlush(self._display)
+
+    def _key(self, *combos: str):
+        for combo in combos:
+            keys = self._resolve_combo(combo)
+            for keycode in keys:
+                self._keycode(keycode, True)
+            for keycode in reversed(keys):
+                self._keycode(keycode, False)
+
+    def _keydown(self, *combos: str):
+        for combo in combos:
+            for keycode in self._resolve_combo(combo):
+                self._keycode(keycode, True)
+
+    def _keyup(self, *combos: str):
+        for combo in combos:
+            for keycode in reversed(self._resolve_combo(combo)):
+                self._keycode(keycode, False)
+
+    def _type(self, text: str, delay_ms: int):
+        for character in text:
+            name = CHARACTER_KEYSYMS.get(character)
+            keysym = (
+                self._x11.XStringToKeysym(name.encode())
+                if name
+                else _character_keysym(character)
+            )
+            self._press_keysym(keysym, delay_ms / 2000)
+
+    def _sleep(self, seconds: float):
+        self._x11.XSync(self._display, 0)
+        time.sleep(seconds)
+
+    def _getmouselocation(self) -> str:
+        root, child = ctypes.c_ulong(), ctypes.c_ulong()
+        x, y, window_x, window_y = (ctypes.c_int() for _ in range(4))
+        mask = ctypes.c_uint()
+        self._x11.XQueryPointer(
+            self._display,
+            self._root,
+            ctypes.byref(root),
+            ctypes.byref(child),
+            ctypes.byref(x),
+            ctypes.byref(y),
+            ctypes.byref(window_x),
+            ctypes.byref(window_y),
+            ctypes.byref(mask),
+        )
+        return (
+            f"X={x.value}\nY={y.value}\nSCREEN={self._screen}\nWINDOW={child.value}\n"
+        )
+
+    def _keycode(self, keycode: int, press: bool):
+        self._xtst.XTestFakeKeyEvent(self._display, keycode, press, CURRENT_TIME)
+        self._x11.XFlush(self._display)
+
+    def _resolve_combo(self, combo: str) -> list[int]:
+        """Keycodes for a combination like `ctrl+shift+t`, in press order."""
+        keycodes = []
+        for name in combo.split("+"):
+            keysym = self._x11.XStringToKeysym(name.encode())
+            if keysym == NO_SYMBOL and name.lower() in KEY_ALIASES:
+                keysym = self._x11.XStringToKeysym(KEY_ALIASES[name.lower()].encode())
+            if keysym == NO_SYMBOL and len(name) == 1:
+                keysym = _character_keysym(name)
+            if keysym == NO_SYMBOL:
+                raise ValueError(f"unknown key name: {name}")
+            keycode = self._x11.XKeysymToKeycode(self._display, keysym)
+            if keycode == 0:
+                raise ValueError(f"no key for {name} in the current layout")
+            keycodes.append(keycode)
+        return keycodes
+
+    def _press_keysym(self, keysym: int, pause: float):
+        """Press and release the key that produces a keysym, with Shift if needed."""
+        keycode = self._x11.XKeysymToKeycode(self._display, keysym)
+        shifted = False
+        if keycode:
+            if self._x11.XkbKeycodeToKeysym(self._display, keycode, 0, 0) != keysym:
+                shifted = (
+                    self._x11.XkbKeycodeToKeysym(self._display, keycode, 0, 1) == keysym
+                )
+                if not shifted:
+                    keycode = 0
+        remapped = not keycode
+        if remapped:
+            if self._spare_keycode is None:
+                raise xlib.XError(f"cannot type keysym {keysym:#x}")
+            keycode = self._spare_keycode
+            self._remap(keycode, keysym)
+
+        if shifted:
+            self._keycode(self._shift, True)
+        self._keycode(keycode, True)
+        time.sleep(pause)
+        self._keycode(keycode, False)
+        if shifted:
+            self._keycode(self._shift, False)
+        time.sleep(pause)
+
+        if remapped:
+            self._remap(keycode, NO_SYMBOL)
+
+    def _remap(self, keycode: int, keysym: int):
+        keysyms = (ctypes.c_ulong * 1)(keysym)
+        self._x11.XChangeKeyboardMapping(self._display, keycode, 1, keysyms, 1)
+        self._x11.XSync(self._display, 0)
+
+    def close(self):
+        with self._lock:
+            if self._display is not None:
+                self._x11.XCloseDisplay(self._display)
+                self._display = None
+
+
+def _character_keysym(character: str) -> int:
+    """The keysym for a character: Latin-1 maps directly, other code points are offset."""
+    code = ord(character)
+    if 0x20 <= code <= 0x7E or 0xA0 <= code <= 0xFF:
+        return code
+    return 0x01000000 + code
+
+
+_injectors: dict[int | None, XTestInput] = {}
+_failures: dict[int | None, float] = {}
+_injectors_lock = threading.Lock()
+
+
+def get_injector(display_num: int | None) -> XTestInput | None:
+    """
+    Return the shared XTEST connection for a display, or None if in-process
+    injection is unavailable (no libXtst, no XTEST extension, ...).
+    """
+    with _injectors_lock:
+        if display_num in _injectors:
+            return _injectors[display_num]
+        failed_at = _failures.get(display_num)
+        if failed_at is not None and time.monotonic() - failed_at < RETRY_INTERVAL:
+            return None
+        try:
+            injector = XTestInput(display_num)
+        except xlib.XError:
+            _failures[display_num] = time.monotonic()
+            return None
+        _injectors[display_num] = injector
+        return injector
+
+
+def discard_injector(display_num: int | None, retry_later: bool = True):
+    """
+    Close and forget the shared connection for a display after an injection failure.
+    Without `retry_later`, the next request reconnects at once, e.g. after the
+    display was restarted on purpose.
+    """
+    with _injectors_lock:
+        injector = _injectors.pop(display_num, None)
+        if retry_later:
+            _failures[display_num] = time.monotonic()
+        else:
+            _failures.pop(display_num, None)
+    if injector is not None:
+        injector.close()
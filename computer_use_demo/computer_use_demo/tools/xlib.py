@@ -0,0 +1,280 @@
+"""Minimal ctypes bindings to Xlib used for in-process access to the X display."""
+
+import ctypes
+import ctypes.util
+import threading
+from ctypes import (
+    POINTER,
+    c_char_p,
+    c_int,
+    c_uint,
+    c_ulong,
+    c_void_p,
+)
+
+ALL_PLANES = 0xFFFFFFFF
+Z_PIXMAP = 2
+
+
+class XError(Exception):
+    """Raised when the X display or a required extension is unavailable."""
+
+
+class XImage(ctypes.Structure):
+    _fields_ = [
+        ("width", c_int),
+        ("height", c_int),
+        ("xoffset", c_int),
+        ("format", c_int),
+        ("data", c_void_p),
+        ("byte_order", c_int),
+        ("bitmap_unit", c_int),
+        ("bitmap_bit_order", c_int),
+        ("bitmap_pad", c_int),
+        ("depth", c_int),
+        ("bytes_per_line", c_int),
+        ("bits_per_pixel", c_int),
+        ("red_mask", c_ulong),
+        ("green_mask", c_ulong),
+        ("blue_mask", c_ulong),
+    ]
+
+
+class XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ("shmseg", c_ulong),
+        ("shmid", c_int),
+        ("shmaddr", c_void_p),
+        ("readOnly", c_int),
+    ]
+
+
+class XErrorEvent(ctypes.Structure):
+    _fields_ = [
+        ("type", c_int),
+        ("display", c_void_p),
+        ("resourceid", c_ulong),
+        ("serial", c_ulong),
+        ("error_code", ctypes.c_ubyte),
+        ("request_code", ctypes.c_ubyte),
+        ("minor_code", ctypes.c_ubyte),
+    ]
+
+
+class XSelectionRequestEvent(ctypes.Structure):
+    _fields_ = [
+        ("type", c_int),
+        ("serial", c_ulong),
+        ("send_event", c_int),
+        ("display", c_void_p),
+        ("owner", c_ulong),
+        ("requestor", c_ulong),
+        ("selection", c_ulong),
+        ("target", c_ulong),
+        ("property", c_ulong),
+        ("time", c_ulong),
+    ]
+
+
+class XSelectionEvent(ctypes.Structure):
+    _fields_ = [
+        ("type", c_int),
+        ("serial", c_ulong),
+        ("send_event", c_int),
+        ("display", c_void_p),
+        ("requestor", c_ulong),
+        ("selection", c_ulong),
+        ("target", c_ulong),
+        ("property", c_ulong),
+        ("time", c_ulong),
+    ]
+
+
+class XEvent(ctypes.Union):
+    _fields_ = [
+        ("type", c_int),
+        ("xselectionrequest", XSelectionRequestEvent),
+        ("xselection", XSelectionEvent),
+        ("pad", ctypes.c_long * 24),
+    ]
+
+
+class XClassHint(ctypes.Structure):
+    _fields_ = [("res_name", c_void_p), ("res_class", c_void_p)]
+
+
+_ERROR_HANDLER = ctypes.CFUNCTYPE(c_int, c_void_p, POINTER(XErrorEvent))
+
+_SIGNATURES = {
+    "x11": {
+        "XInitThreads": (c_int, []),
+        "XOpenDisplay": (c_void_p, [c_char_p]),
+        "XCloseDisplay": (c_int, [c_void_p]),
+        "XDefaultScreen": (c_int, [c_void_p]),
+        "XRootWindow": (c_ulong, [c_void_p, c_int]),
+        "XDefaultVisual": (c_void_p, [c_void_p, c_int]),
+        "XDefaultDepth": (c_int, [c_void_p, c_int]),
+        "XDisplayWidth": (c_int, [c_void_p, c_int]),
+        "XDisplayHeight": (c_int, [c_void_p, c_int]),
+        "XGetImage": (
+            POINTER(XImage),
+            [c_void_p, c_ulong, c_int, c_int, c_uint, c_uint, c_ulong, c_int],
+        ),
+        "XDestroyImage": (c_int, [POINTER(XImage)]),
+        "XSync": (c_int, [c_void_p, c_int]),
+        "XFlush": (c_int, [c_void_p]),
+        "XSetErrorHandler": (c_void_p, [_ERROR_HANDLER]),
+        "XFree": (c_int, [c_void_p]),
+        "XQueryPointer": (
+            c_int,
+            [
+                c_void_p,
+                c_ulong,
+                POINTER(c_ulong),
+                POINTER(c_ulong),
+                POINTER(c_int),
+                POINTER(c_int),
+                POINTER(c_int),
+                POINTER(c_int),
+                POINTER(c_uint),
+            ],
+        ),
+        "XStringToKeysym": (c_ulong, [c_char_p]),
+        "XKeysymToKeycode": (ctypes.c_ubyte, [c_void_p, c_ulong]),
+        "XkbKeycodeToKeysym": (c_ulong, [c_void_p, ctypes.c_ubyte, c_int, c_int]),
+        "XDisplayKeycodes": (c_int, [c_void_p, POINTER(c_int), POINTER(c_int)]),
+        "XGetKeyboardMapping": (
+            POINTER(c_ulong),
+            [c_void_p, ctypes.c_ubyte, c_int, POINTER(c_int)],
+        ),
+        "XChangeKeyboardMapping": (
+            c_int,
+            [c_void_p, c_int, c_int, POINTER(c_ulong), c_int],
+        ),
+        "XInternAtom": (c_ulong, [c_void_p, c_char_p, c_int]),
+        "XCreateSimpleWindow": (
+            c_ulong,
+            [c_void_p, c_ulong, c_int, c_int, c_uint, c_uint, c_uint, c_ulong, c_ulong],
+        ),
+        "XDestroyWindow": (c_int, [c_void_p, c_ulong]),
+        "XSetSelectionOwner": (c_int, [c_void_p, c_ulong, c_ulong, c_ulong]),
+        "XGetSelectionOwner": (c_ulong, [c_void_p, c_ulong]),
+        "XConnectionNumber": (c_int, [c_void_p]),
+        "XPending": (c_int, [c_void_p]),
+        "XNextEvent": (c_int, [c_void_p, POINTER(XEvent)]),
+        "XSendEvent": (
+            c_int,
+            [c_void_p, c_ulong, c_int, ctypes.c_long, POINTER(XEvent)],
+        ),
+        "XChangeProperty": (
+            c_int,
+            [c_void_p, c_ulong, c_ulong, c_ulong, c_int, c_int, c_void_p, c_int],
+        ),
+        "XGetInputFocus": (c_int, [c_void_p, POINTER(c_ulong), POINTER(c_int)]),
+        "XQueryTree": (
+            c_int,
+            [
+                c_void_p,
+                c_ulong,
+                POINTER(c_ulong),
+                POINTER(c_ulong),
+                POINTER(POINTER(c_ulong)),
+                POINTER(c_uint),
+            ],
+        ),
+        "XGetClassHint": (c_int, [c_void_p, c_ulong, POINTER(XClassHint)]),
+        "XMaxRequestSize": (ctypes.c_long, [c_void_p]),
+    },
+    "xext": {
+        "XShmQueryExtension": (c_int, [c_void_p]),
+        "XShmCreateImage": (
+            POINTER(XImage),
+            [
+                c_void_p,
+                c_void_p,
+                c_uint,
+                c_int,
+                c_void_p,
+                POINTER(XShmSegmentInfo),
+                c_uint,
+                c_uint,
+            ],
+        ),
+        "XShmAttach": (c_int, [c_void_p, POINTER(XShmSegmentInfo)]),
+        "XShmDetach": (c_int, [c_void_p, POINTER(XShmSegmentInfo)]),
+        "XShmGetImage": (
+            c_int,
+            [c_void_p, c_ulong, POINTER(XImage), c_int, c_int, c_ulong],
+        ),
+    },
+    "xtst": {
+        "XTestQueryExtension": (
+            c_int,
+            [c_void_p, POINTER(c_int), POINTER(c_int), POINTER(c_int), POINTER(c_int)],
+        ),
+        "XTestFakeMotionEvent": (c_int, [c_void_p, c_int, c_int, c_int, c_ulong]),
+        "XTestFakeButtonEvent": (c_int, [c_void_p, c_uint, c_int, c_ulong]),
+        "XTestFakeKeyEvent": (c_int, [c_void_p, c_uint, c_int, c_ulong]),
+    },
+    "c": {
+        "shmget": (c_int, [c_int, ctypes.c_size_t, c_int]),
+        "shmat": (c_void_p, [c_int, c_void_p, c_int]),
+        "shmdt": (c_int, [c_void_p]),
+        "shmctl": (c_int, [c_int, c_int, c_void_p]),
+    },
+}
+
+_SONAMES = {"x11": "X11", "xext": "Xext", "xtst": "Xtst", "c": "c"}
+
+_libraries: dict[str, ctypes.CDLL] = {}
+_load_lock = threading.Lock()
+
+# errors reported asynchronously by the X server, keyed by display pointer
+_errors: dict[int, int] = {}
+
+
+@_ERROR_HANDLER
+def _on_error(display, event):
+    # the default Xlib handler exits the process; record the error instead
+    _errors[display or 0] = event.contents.error_code
+    return 0
+
+
+def _load(name: str, soname: str) -> ctypes.CDLL:
+    path = ctypes.util.find_library(soname)
+    if path is None:
+        raise XError(f"lib{soname} is not available")
+    lib = ctypes.CDLL(path)
+    for func_name, (restype, argtypes) in _SIGNATURES[name].items():
+        func = getattr(lib, func_name)
+        func.restype = restype
+        func.argtypes = argtypes
+    return lib
+
+
+def library(name: str) -> ctypes.CDLL:
+    """Return one of the bound libraries ("x11", "xext", "xtst", "c"), loading it on first use."""
+    with _load_lock:
+        if name not in _libraries:
+            lib = _load(name, _SONAMES[name])
+            if name == "x11":
+                # must precede any other Xlib call so connections can be shared by threads
+                lib.XInitThreads()
+                lib.XSetErrorHandler(_on_error)
+            _libraries[name] = lib
+        return _libraries[name]
+
+
+def pop_error(display: int) -> int | None:
+    """Return and clear the last X error code reported for the display."""
+    return _errors.pop(display, None)
+
+
+def open_display(display_num: int | None) -> int:
+    """Open a connection to the given display number, or to $DISPLAY if None."""
+    x11 = library("x11")
+    name = f":{display_num}".encode() if display_num is not None else None
+    display = x11.XOpenDisplay(name)
+    if not display:
+        raise XError(f"cannot open display {name.decode() if name else '$DISPLAY'}")
+    return display
@@ -23,6 +23,7 @@ async def test_loop():
     ]
 
     tool_collection = mock.AsyncMock()
+    tool_collection.resources = mock.Mock(return_value=[])
     tool_collection.run.return_value = mock.Mock(
         output="Tool output", error=None, base64_image=None
     )
@@ -57,7 +58,10 @@ async def test_loop():
 
         assert client.beta.messages.with_raw_response.create.call_count == 2
         tool_collection.run.assert_called_once_with(
-            name="computer", tool_input={"action": "test"}
+            name="computer",
+            tool_input={"action": "test"},
+            take_screenshot=True,
+            on_output=None,
         )
         output_callback.assert_called_with(
             BetaTextBlockParam(text="Done!", type="text", citations=None)
@@ -65,3 +69,44 @@ async def test_loop():
         assert output_callback.call_count == 3
         assert tool_output_callback.call_count == 1
         assert api_response_callback.call_count == 2
+
+
+async def test_loop_awaits_async_tool_output_callback():
+    client = mock.Mock()
+    client.beta.messages.with_raw_response.create.return_value = mock.Mock()
+    client.beta.messages.with_raw_response.create.return_value.parse.side_effect = [
+        mock.Mock(
+            spec=BetaMessage,
+            content=[
+                ToolUseBlock(
+                    type="tool_use", id="1", name="computer", input={"action": "test"}
+                ),
+            ],
+        ),
+        mock.Mock(spec=BetaMessage, content=[TextBlock(type="text", text="Done!")]),
+    ]
+
+    tool_collection = mock.AsyncMock()
+    tool_collection.resources = mock.Mock(return_value=[])
+    tool_result = mock.Mock(output="Tool output", error=None, base64_image=None)
+    tool_collection.run.return_value = tool_result
+    tool_output_callback = mock.AsyncMock()
+
+    with mock.patch(
+        "computer_use_demo.loop.Anthropic", return_value=client
+    ), mock.patch(
+        "computer_use_demo.loop.ToolCollection", return_value=tool_collection
+    ):
+        await sampling_loop(
+            model="test-model",
+            provider=APIProvider.ANTHROPIC,
+            system_prompt_suffix="",
+            messages=[{"role": "user", "content": "Test message"}],
+            output_callback=mock.Mock(),
+            tool_output_callback=tool_output_callback,
+            api_response_callback=mock.Mock(),
+            api_key="test-key",
+            tool_version="computer_use_20250124",
+        )
+
+    tool_output_callback.assert_awaited_once_with(tool_result, "1")
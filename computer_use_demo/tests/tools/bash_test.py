@@ -1,6 +1,19 @@
+import asyncio
+import os
+import time
+from unittest import mock
+
 import pytest
 
-from computer_use_demo.tools.bash import BashTool20241022, BashTool20250124, ToolError
+from computer_use_demo.tools.bash import (
+    STREAMED_OUTPUT_TRUNCATED,
+    BashSessionPool,
+    BashTool20241022,
+    BashTool20250124,
+    ToolError,
+    _BashSession,
+    get_session_pool,
+)
 
 
 @pytest.fixture(params=[BashTool20241022, BashTool20250124])
@@ -69,3 +82,228 @@ async def test_bash_tool_timeout(bash_tool):
         match="timed out: bash has not returned in 0.1 seconds and must be restarted",
     ):
         await bash_tool(command="sleep 1")
+
+
+@pytest.mark.asyncio
+async def test_bash_tool_returns_as_soon_as_command_completes(bash_tool):
+    await bash_tool(command="true")
+    start = time.monotonic()
+    for _ in range(5):
+        await bash_tool(command="echo hi")
+    assert time.monotonic() - start < 0.5
+
+
+@pytest.mark.asyncio
+async def test_bash_tool_large_output(bash_tool):
+    result = await bash_tool(command="seq 1 200000; seq 1 3 >&2")
+    full = "".join(f"{n}\n" for n in range(1, 200001))
+    assert result.output_size == len(full)
+    assert len(result.output) < 17000
+    assert result.output.startswith("1\n2\n3\n")
+    assert result.output.endswith("199999\n200000")
+    assert "<response clipped:" in result.output
+    assert result.output_file in result.output
+    with open(result.output_file) as f:
+        assert f.read() == full
+    assert result.error == "1\n2\n3"
+    assert result.error_file is None
+
+    # the saved output can be searched from the session
+    found = await bash_tool(command=f"grep -c . {result.output_file}")
+    assert found.output == "200000"
+
+
+@pytest.mark.asyncio
+async def test_bash_tool_survives_redirected_stderr(bash_tool):
+    # without "&", which would run the command in a subshell
+    await bash_tool(command="exec 3>/proc/self/fd/2 2>/dev/null")
+    start = time.monotonic()
+    result = await bash_tool(command="echo still here; echo hidden >&2")
+    assert time.monotonic() - start < 2
+    assert result.output == "still here"
+    assert result.error == ""
+
+    await bash_tool(command="exec 2>/proc/self/fd/3")
+    result = await bash_tool(command="echo back >&2")
+    assert result.error == "back"
+
+
+@pytest.mark.asyncio
+async def test_bash_tool_drops_late_stderr_of_earlier_command(bash_tool):
+    # stderr, including the sentinel after it, now arrives well after stdout
+    await bash_tool(
+        command="exec 2> >(sleep 0.4; cat >/proc/self/fd/2); echo late >/proc/self/fd/2"
+    )
+    result = await bash_tool(command="true")
+    assert result.error == ""
+    result = await bash_tool(command="echo next >/proc/self/fd/2")
+    assert result.error == "next"
+
+
+@pytest.mark.asyncio
+async def test_bash_tool_exit(bash_tool):
+    await bash_tool(command="true")
+    result = await bash_tool(command="echo bye; exit 3")
+    assert result.output == "bye"
+    assert result.system == "tool must be restarted"
+    assert result.error == "bash has exited with returncode 3"
+
+
+@pytest.mark.asyncio
+async def test_bash_tool_reports_exit_code_and_cwd(bash_tool, tmp_path):
+    result = await bash_tool(command="echo hi")
+    assert result.output == "hi"
+    assert result.exit_code == 0
+    assert result.cwd == os.getcwd()
+    assert result.system is None
+
+    result = await bash_tool(command="false")
+    assert result.exit_code == 1
+    assert result.system == "exit code 1"
+
+    result = await bash_tool(command=f"cd {tmp_path}; printf partial; (exit 2)")
+    assert result.output == "partial"
+    assert result.exit_code == 2
+    assert result.cwd == str(tmp_path)
+    assert result.system == f"exit code 2; working directory is now {tmp_path}"
+
+    # the change is only noted once
+    result = await bash_tool(command="true")
+    assert result.cwd == str(tmp_path)
+    assert result.system is None
+
+
+@pytest.mark.asyncio
+async def test_bash_tool_streams_output(bash_tool):
+    chunks: list[tuple[str, str]] = []
+
+    def on_output(stream: str, text: str):
+        chunks.append((stream, text))
+
+    result = await bash_tool(
+        command="echo first; sleep 0.3; echo second; echo oops >&2",
+        on_output=on_output,
+    )
+
+    assert result.output == "first\nsecond"
+    assert result.error == "oops"
+    stdout = [text for stream, text in chunks if stream == "stdout"]
+    assert stdout[0] == "first\n"
+    assert "".join(stdout) == "first\nsecond\n"
+    assert "".join(text for stream, text in chunks if stream == "stderr") == "oops\n"
+
+
+@pytest.mark.asyncio
+async def test_bash_tool_caps_streamed_output(bash_tool):
+    chunks: list[str] = []
+    with mock.patch.object(_BashSession, "_streamed_output_limit", 1000):
+        result = await bash_tool(
+            command="head -c 300000 /dev/zero | tr '\\0' x",
+            on_output=lambda stream, text: chunks.append(text),
+        )
+
+    assert result.output_size == 300000
+    assert "".join(chunks) == "x" * 1000 + STREAMED_OUTPUT_TRUNCATED
+    assert chunks.count(STREAMED_OUTPUT_TRUNCATED) == 1
+
+
+@pytest.mark.asyncio
+async def test_bash_tool_streams_split_characters(bash_tool):
+    chunks: list[str] = []
+    # "é" is written one byte at a time
+    result = await bash_tool(
+        command="printf '\\303'; sleep 0.1; printf '\\251\\n'",
+        on_output=lambda stream, text: chunks.append(text),
+    )
+
+    assert result.output == "é"
+    assert "".join(chunks) == "é\n"
+
+
+@pytest.mark.asyncio
+async def test_session_pool_sources_warmup_scripts(tmp_path):
+    script = tmp_path / "warmup.sh"
+    script.write_text("export WARMED_UP=yes\ncd /tmp\n")
+    pool = BashSessionPool(size=1, warmup_scripts=[str(script)])
+    try:
+        session = await pool.acquire()
+        assert not session.used
+        result = await session.run("echo $WARMED_UP; pwd")
+        assert result.output == "yes\n/tmp"
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_session_pool_hands_out_warm_sessions():
+    pool = BashSessionPool(size=2)
+    try:
+        first = await pool.acquire()
+        # acquiring refills the pool in the background
+        for _ in range(50):
+            if len(pool._ready) == 2:
+                break
+            await asyncio.sleep(0.05)
+        assert len(pool._ready) == 2
+        warm = pool._ready[0]
+        second = await pool.acquire()
+        assert second is warm
+        assert second is not first
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_session_pool_recycles_only_clean_sessions():
+    pool = BashSessionPool(size=2)
+    try:
+        clean = await pool.acquire()
+        used = await pool.acquire()
+        if pool._filling:
+            await pool._filling
+        pool._ready.clear()
+        await used.run("cd /tmp")
+
+        pool.release(clean)
+        pool.release(used)
+
+        assert pool._ready == [clean]
+        await used._process.wait()
+        assert not used.alive
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_bash_tool_returns_session_to_pool_on_close():
+    tool = BashTool20250124()
+    with mock.patch.dict(os.environ, {"BASH_POOL_SIZE": "1"}):
+        await tool(restart=True)
+        pool = get_session_pool(None)
+    try:
+        assert pool.size == 1
+        session = tool._session
+        assert session is not None
+        await tool.close()
+        assert tool._session is None
+        assert session in pool._ready
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_bash_tool_reports_command_usage(bash_tool):
+    await bash_tool(command="true")
+    result = await bash_tool(
+        command="python3 -c 'import time; x = bytearray(50_000_000); time.sleep(0.3)'"
+        "; echo done"
+    )
+    assert result.output == "done"
+    assert result.usage is not None
+    assert result.usage.wall_time >= 0.3
+    assert result.usage.max_rss >= 50_000_000
+    assert result.usage.output_bytes == len("done\n")
+
+    # an idle shell does not count towards the next command
+    result = await bash_tool(command="echo quick")
+    assert result.usage.max_rss < 50_000_000
@@ -1,7 +1,13 @@
-from unittest.mock import AsyncMock, patch
+import base64
+import io
+from pathlib import Path
+from unittest.mock import AsyncMock, Mock, patch
 
+import numpy as np
 import pytest
+from PIL import Image
 
+from computer_use_demo.tools.collection import ToolCollection
 from computer_use_demo.tools.computer import (
     ComputerTool20241022,
     ComputerTool20250124,
@@ -9,6 +15,9 @@ from computer_use_demo.tools.computer import (
     ToolError,
     ToolResult,
 )
+from computer_use_demo.tools.run import CommandResult
+from computer_use_demo.tools.screen import UNCHANGED_SCREEN_NOTE, Frame
+from computer_use_demo.tools.usage import ResourceUsage
 
 
 @pytest.fixture(params=[ComputerTool20241022, ComputerTool20250124])
@@ -16,6 +25,17 @@ def computer_tool(request):
     return request.param()
 
 
+def command_result(stdout: str = "") -> CommandResult:
+    return CommandResult(
+        returncode=0,
+        stdout=stdout,
+        stderr="",
+        stdout_size=len(stdout),
+        stderr_size=0,
+        usage=ResourceUsage(wall_time=0.5, output_bytes=len(stdout)),
+    )
+
+
 @pytest.mark.asyncio
 async def test_computer_tool_mouse_move(computer_tool):
     with patch.object(computer_tool, "shell", new_callable=AsyncMock) as mock_shell:
@@ -44,6 +64,108 @@ async def test_computer_tool_type(computer_tool):
         assert result.base64_image == "base64_screenshot"
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("window_class", "paste_key"), [("XTerm", "shift+Insert"), ("Firefox", "ctrl+v")]
+)
+async def test_computer_tool_type_pastes_long_text(window_class, paste_key):
+    computer_tool = ComputerTool20250124()
+    clipboard = Mock()
+    clipboard.focused_window_class.return_value = window_class
+    clipboard.wait_served.return_value = True
+    text = "x" * 40000
+    with (
+        patch("computer_use_demo.tools.computer.get_clipboard", return_value=clipboard),
+        patch.object(
+            computer_tool, "_run_command", new_callable=AsyncMock
+        ) as mock_command,
+        patch.object(
+            computer_tool, "screenshot", new_callable=AsyncMock
+        ) as mock_screenshot,
+        patch.object(computer_tool, "_wait_for_settle", return_value=None),
+    ):
+        mock_command.return_value = ToolResult(output="", error="")
+        mock_screenshot.return_value = ToolResult(base64_image="base64")
+        result = await computer_tool(action="type", text=text)
+    assert "".join(call.args[0] for call in clipboard.set_text.call_args_list) == text
+    assert clipboard.set_text.call_count == 3
+    assert all(
+        call.args[0].endswith(f"key -- {paste_key}")
+        for call in mock_command.call_args_list
+    )
+    assert result.base64_image == "base64"
+
+
+@pytest.mark.asyncio
+async def test_computer_tool_type_presses_return_after_pasting():
+    computer_tool = ComputerTool20250124()
+    clipboard = Mock()
+    clipboard.focused_window_class.return_value = "XTerm"
+    clipboard.wait_served.return_value = True
+    command = "echo " + "x" * 200
+    with (
+        patch("computer_use_demo.tools.computer.get_clipboard", return_value=clipboard),
+        patch.object(
+            computer_tool, "_run_command", new_callable=AsyncMock
+        ) as mock_command,
+        patch.object(
+            computer_tool, "screenshot", new_callable=AsyncMock
+        ) as mock_screenshot,
+        patch.object(computer_tool, "_wait_for_settle", return_value=None),
+    ):
+        mock_command.return_value = ToolResult(output="", error="")
+        mock_screenshot.return_value = ToolResult(base64_image="base64")
+        await computer_tool(action="type", text=command + "\n\n")
+    # a shell with bracketed paste would not run a pasted newline
+    clipboard.set_text.assert_called_once_with(command)
+    commands = [call.args[0] for call in mock_command.call_args_list]
+    assert commands[0].endswith("key -- shift+Insert")
+    assert commands[1].endswith("key -- Return Return")
+
+
+@pytest.mark.asyncio
+async def test_computer_tool_type_falls_back_when_paste_is_ignored():
+    computer_tool = ComputerTool20250124()
+    clipboard = Mock()
+    clipboard.focused_window_class.return_value = "Firefox"
+    clipboard.wait_served.return_value = False
+    with (
+        patch("computer_use_demo.tools.computer.get_clipboard", return_value=clipboard),
+        patch.object(
+            computer_tool, "_run_command", new_callable=AsyncMock
+        ) as mock_command,
+        patch.object(
+            computer_tool, "screenshot", new_callable=AsyncMock
+        ) as mock_screenshot,
+        patch.object(computer_tool, "_wait_for_settle", return_value=None),
+    ):
+        mock_command.return_value = ToolResult(output="", error="")
+        mock_screenshot.return_value = ToolResult(base64_image="base64")
+        await computer_tool(action="type", text="y" * 120)
+    commands = [call.args[0] for call in mock_command.call_args_list]
+    assert commands[0].endswith("key -- ctrl+v")
+    assert all("type --delay 12 -- " in command for command in commands[1:])
+    assert len(commands) == 4
+
+
+@pytest.mark.asyncio
+async def test_computer_tool_type_keys_mode_never_pastes(monkeypatch):
+    monkeypatch.setenv("COMPUTER_TYPING_MODE", "keys")
+    computer_tool = ComputerTool20250124()
+    with (
+        patch("computer_use_demo.tools.computer.get_clipboard") as mock_clipboard,
+        patch.object(computer_tool, "shell", new_callable=AsyncMock) as mock_shell,
+        patch.object(
+            computer_tool, "screenshot", new_callable=AsyncMock
+        ) as mock_screenshot,
+    ):
+        mock_shell.return_value = ToolResult(output="")
+        mock_screenshot.return_value = ToolResult(base64_image="base64")
+        await computer_tool(action="type", text="z" * 500)
+    mock_clipboard.assert_not_called()
+    assert mock_shell.call_count == 10
+
+
 @pytest.mark.asyncio
 async def test_computer_tool_screenshot(computer_tool):
     with patch.object(
@@ -55,6 +177,449 @@ async def test_computer_tool_screenshot(computer_tool):
         assert result.base64_image == "base64_screenshot"
 
 
+@pytest.mark.asyncio
+async def test_computer_tool_screenshot_in_process(computer_tool):
+    computer_tool.width = 1920
+    computer_tool.height = 1080
+    frame = Frame(pixels=np.zeros((1080, 1920, 3), dtype=np.uint8), timestamp=0.0)
+    with (
+        patch.object(computer_tool, "_capture_frame", return_value=frame),
+        patch.object(
+            computer_tool, "_shell_capture", new_callable=AsyncMock
+        ) as mock_shell_capture,
+    ):
+        result = await computer_tool.screenshot()
+        mock_shell_capture.assert_not_called()
+    image = Image.open(io.BytesIO(base64.b64decode(result.base64_image)))
+    assert image.format == "PNG"
+    assert image.size == (1366, 768)
+    assert result.media_type == "image/png"
+
+
+@pytest.mark.asyncio
+async def test_computer_tool_screenshot_encoding_profile(monkeypatch):
+    monkeypatch.setenv("SCREENSHOT_ENCODING", "jpeg:70")
+    computer_tool = ComputerTool20250124()
+    frame = Frame(pixels=np.zeros((768, 1024, 3), dtype=np.uint8), timestamp=0.0)
+
+    result = await computer_tool.screenshot(frame)
+
+    image = Image.open(io.BytesIO(base64.b64decode(result.base64_image)))
+    assert image.format == "JPEG"
+    assert result.media_type == "image/jpeg"
+
+
+@pytest.mark.asyncio
+async def test_computer_tool_screenshot_uses_grabber_frame(computer_tool):
+    computer_tool._grabber_fps = 5
+    frame = Frame(pixels=np.zeros((768, 1024, 3), dtype=np.uint8), timestamp=1.0)
+    grabber = Mock()
+    grabber.latest.return_value = frame
+    with (
+        patch("computer_use_demo.tools.computer.get_grabber", return_value=grabber),
+        patch("computer_use_demo.tools.computer.get_screen") as mock_get_screen,
+    ):
+        result = await computer_tool.screenshot()
+    mock_get_screen.assert_not_called()
+    assert result.base64_image
+
+
+@pytest.mark.asyncio
+async def test_computer_tool_screenshot_skips_grabber_frame_from_before_input():
+    computer_tool = ComputerTool20250124()
+    computer_tool._grabber_fps = 1
+    stale = Frame(pixels=np.zeros((768, 1024, 3), dtype=np.uint8), timestamp=1.0)
+    fresh = Frame(pixels=np.ones((768, 1024, 3), dtype=np.uint8), timestamp=2.0)
+    grabber = Mock()
+    grabber.latest.return_value = stale
+    screen = Mock()
+    screen.capture.return_value = fresh
+    computer_tool._last_input_at = 1.5
+    with (
+        patch("computer_use_demo.tools.computer.get_grabber", return_value=grabber),
+        patch("computer_use_demo.tools.computer.get_screen", return_value=screen),
+    ):
+        assert await computer_tool._capture_frame() is fresh
+
+
+@pytest.mark.asyncio
+async def test_computer_tool_ignores_grabber_it_did_not_opt_into(computer_tool):
+    grabber = Mock()
+    with patch("computer_use_demo.tools.computer.get_grabber", return_value=grabber):
+        assert computer_tool._grabber() is None
+
+
+@pytest.mark.asyncio
+async def test_computer_tool_screenshot_skips_unchanged_screen(computer_tool):
+    blank = Frame(pixels=np.zeros((768, 1024, 3), dtype=np.uint8), timestamp=0.0)
+    changed = Frame(pixels=np.ones((768, 1024, 3), dtype=np.uint8), timestamp=1.0)
+    with patch.object(
+        computer_tool, "_encode_frame", wraps=computer_tool._encode_frame
+    ) as mock_encode:
+        first = await computer_tool.screenshot(blank)
+        second = await computer_tool.screenshot(blank)
+        third = await computer_tool.screenshot(changed)
+        fourth = await computer_tool.screenshot(blank)
+    assert first.base64_image
+    assert second.base64_image is None
+    assert second.output == UNCHANGED_SCREEN_NOTE
+    assert third.base64_image and third.base64_image != first.base64_image
+    # returning to a recent frame reuses its encoding
+    assert fourth.base64_image == first.base64_image
+    assert mock_encode.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_computer_tool_screenshot_action_always_returns_image(computer_tool):
+    blank = Frame(pixels=np.zeros((768, 1024, 3), dtype=np.uint8), timestamp=0.0)
+    with patch.object(computer_tool, "_capture_frame", return_value=blank):
+        first = await computer_tool(action="screenshot")
+        # earlier images may have been dropped from the model's context
+        second = await computer_tool(action="screenshot")
+        after_action = await computer_tool.screenshot(blank)
+    assert first.base64_image
+    assert second.base64_image == first.base64_image
+    assert after_action.output == UNCHANGED_SCREEN_NOTE
+
+
+@pytest.mark.asyncio
+async def test_computer_tool_shell_reports_unchanged_screen(computer_tool):
+    with (
+        patch(
+            "computer_use_demo.tools.computer.run_capped",
+            return_value=command_result("done"),
+        ),
+        patch.object(computer_tool, "_wait_for_settle", return_value=None),
+        patch.object(
+            computer_tool, "screenshot", new_callable=AsyncMock
+        ) as mock_screenshot,
+    ):
+        mock_screenshot.return_value = ToolResult(output=UNCHANGED_SCREEN_NOTE)
+        result = await computer_tool.shell("xdotool click 1")
+    assert result.output == f"done\n{UNCHANGED_SCREEN_NOTE}"
+    assert result.base64_image is None
+    assert result.usage == ResourceUsage(wall_time=0.5, output_bytes=4)
+
+
+@pytest.mark.asyncio
+async def test_computer_tool_shell_reports_changed_regions():
+    computer_tool = ComputerTool20250124()
+    computer_tool.width = 2048
+    computer_tool.height = 1536
+    before = np.zeros((1536, 2048, 3), dtype=np.uint8)
+    after = before.copy()
+    after[100:164, 200:300] = 255
+    frames = [
+        Frame(pixels=before, timestamp=0.0),
+        Frame(pixels=after, timestamp=1.0),
+    ]
+    with (
+        patch(
+            "computer_use_demo.tools.computer.run_capped",
+            return_value=command_result(),
+        ),
+        patch.object(computer_tool, "_wait_for_settle", return_value=None),
+        patch.object(computer_tool, "_capture_frame", side_effect=frames),
+    ):
+        await computer_tool.screenshot()
+        result = await computer_tool.shell("xdotool click 1")
+    assert result.output == (
+        "Changed regions since the previous screenshot [x0, y0, x1, y1]:"
+        " [96, 48, 152, 88]"
+    )
+    assert result.base64_image is not None
+
+
+@pytest.mark.asyncio
+async def test_computer_tool_screenshot_falls_back_to_shell(computer_tool, tmp_path):
+    png = io.BytesIO()
+    Image.new("RGB", (1024, 768), "white").save(png, format="PNG")
+
+    async def fake_run(cmd):
+        Path(cmd.split()[-1]).write_bytes(png.getvalue())
+        return 0, "", ""
+
+    with (
+        patch.object(computer_tool, "_capture_frame", return_value=None),
+        patch("computer_use_demo.tools.computer.OUTPUT_DIR", str(tmp_path)),
+        patch("computer_use_demo.tools.computer.shutil.which", return_value=None),
+        patch("computer_use_demo.tools.computer.run", side_effect=fake_run) as mock_run,
+    ):
+        result = await computer_tool.screenshot()
+        mock_run.assert_called_once()
+        assert "scrot" in mock_run.call_args[0][0]
+    image = Image.open(io.BytesIO(base64.b64decode(result.base64_image)))
+    assert image.size == (1024, 768)
+    # the capture file is read into memory and removed
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_computer_tool_shell_screenshots_settled_frame(computer_tool):
+    frame = Frame(pixels=np.zeros((768, 1024, 3), dtype=np.uint8), timestamp=0.0)
+    with (
+        patch(
+            "computer_use_demo.tools.computer.run_capped",
+            return_value=command_result(),
+        ),
+        patch("computer_use_demo.tools.computer.get_screen", return_value=object()),
+        patch(
+            "computer_use_demo.tools.computer.wait_until_stable", return_value=frame
+        ) as mock_settle,
+        patch.object(
+            computer_tool, "screenshot", new_callable=AsyncMock
+        ) as mock_screenshot,
+        patch("asyncio.sleep") as mock_sleep,
+    ):
+        mock_screenshot.return_value = ToolResult(base64_image="base64")
+        result = await computer_tool.shell("xdotool click 1")
+        mock_settle.assert_called_once()
+        mock_screenshot.assert_called_once_with(frame)
+        mock_sleep.assert_not_called()
+        assert result.base64_image == "base64"
+
+
+@pytest.mark.asyncio
+async def test_computer_tool_zoom_captures_native_region():
+    computer_tool = ComputerTool20250124()
+    computer_tool.width = 1920
+    computer_tool.height = 1080
+    region = Frame(pixels=np.zeros((270, 480, 3), dtype=np.uint8), timestamp=0.0)
+    with patch.object(
+        computer_tool, "_capture_region", return_value=region
+    ) as mock_capture_region:
+        result = await computer_tool(action="zoom", region=[683, 384, 1366, 768])
+    mock_capture_region.assert_called_once_with(960, 540, 960, 540)
+    image = Image.open(io.BytesIO(base64.b64decode(result.base64_image)))
+    assert image.size == (480, 270)
+
+
+@pytest.mark.asyncio
+async def test_computer_tool_zoom_crops_full_frame_without_x11():
+    computer_tool = ComputerTool20250124()
+    pixels = np.zeros((768, 1024, 3), dtype=np.uint8)
+    pixels[100:200, 50:150] = 255
+    frame = Frame(pixels=pixels, timestamp=0.0)
+    with (
+        patch.object(computer_tool, "_capture_region", return_value=None),
+        patch.object(computer_tool, "_capture_frame", return_value=frame),
+    ):
+        result = await computer_tool(action="zoom", region=[50, 100, 150, 200])
+    image = Image.open(io.BytesIO(base64.b64decode(result.base64_image)))
+    assert image.size == (100, 100)
+    assert np.asarray(image).min() == 255
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("region", [None, [0, 0, 10], [10, 10, 5, 20], [0, 0, -1, 5]])
+async def test_computer_tool_zoom_invalid_region(region):
+    computer_tool = ComputerTool20250124()
+    with pytest.raises(ToolError, match="region="):
+        await computer_tool(action="zoom", region=region)
+
+
+def frames_of(*values: int) -> list[Frame]:
+    return [
+        Frame(pixels=np.full((768, 1024, 3), value, dtype=np.uint8), timestamp=0.0)
+        for value in values
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("condition", "values", "final"),
+    [("change", (0, 0, 1, 2), 1), ("stable", (0, 1, 2), 2)],
+)
+async def test_computer_tool_wait_for_returns_when_condition_holds(
+    condition, values, final
+):
+    computer_tool = ComputerTool20250124()
+    computer_tool._settle_quiet_period = 0.15
+    frames = frames_of(*values)
+    with (
+        patch.object(
+            computer_tool, "_sample_frame", new_callable=AsyncMock
+        ) as mock_sample,
+        patch.object(
+            computer_tool, "screenshot", new_callable=AsyncMock
+        ) as mock_screenshot,
+        patch("computer_use_demo.tools.computer.WAIT_FOR_INTERVAL", 0.05),
+    ):
+        mock_sample.side_effect = frames + frames[-1:] * 20
+        mock_screenshot.return_value = ToolResult(base64_image="base64")
+        result = await computer_tool(action="wait_for", condition=condition)
+    assert mock_screenshot.call_args.args[0].pixels[0, 0, 0] == final
+    assert result.output.startswith(f"Condition '{condition}' met")
+    assert result.base64_image == "base64"
+
+
+@pytest.mark.asyncio
+async def test_computer_tool_wait_for_times_out():
+    computer_tool = ComputerTool20250124()
+    with (
+        patch.object(
+            computer_tool, "_sample_frame", return_value=frames_of(0)[0]
+        ) as mock_sample,
+        patch.object(
+            computer_tool, "screenshot", new_callable=AsyncMock
+        ) as mock_screenshot,
+        patch("computer_use_demo.tools.computer.WAIT_FOR_INTERVAL", 0.05),
+    ):
+        mock_screenshot.return_value = ToolResult(base64_image="base64")
+        result = await computer_tool(
+            action="wait_for", condition="change", region=[0, 0, 10, 10], duration=0.2
+        )
+    assert result.output.startswith("Timed out after")
+    assert 3 <= mock_sample.call_count <= 6
+    mock_screenshot.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_computer_tool_wait_for_text_reads_only_changed_frames():
+    computer_tool = ComputerTool20250124()
+    frames = frames_of(0, 0, 1)
+    with (
+        patch.object(
+            computer_tool, "_sample_frame", new_callable=AsyncMock
+        ) as mock_sample,
+        patch.object(
+            computer_tool, "screenshot", new_callable=AsyncMock
+        ) as mock_screenshot,
+        patch("computer_use_demo.tools.computer.ocr_available", return_value=True),
+        patch(
+            "computer_use_demo.tools.computer.contains_text", new_callable=AsyncMock
+        ) as mock_contains_text,
+        patch("computer_use_demo.tools.computer.WAIT_FOR_TEXT_INTERVAL", 0.01),
+    ):
+        mock_sample.side_effect = frames
+        mock_screenshot.return_value = ToolResult(base64_image="base64")
+        mock_contains_text.side_effect = [False, True]
+        result = await computer_tool(action="wait_for", condition="text", text="Done")
+    assert mock_contains_text.call_count == 2
+    assert mock_contains_text.call_args.args[1] == "Done"
+    assert result.output.startswith("Condition 'text' met")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {},
+        {"condition": "appear"},
+        {"condition": "text"},
+        {"condition": "change", "text": "hi"},
+        {"condition": "change", "duration": 120},
+    ],
+)
+async def test_computer_tool_wait_for_invalid_parameters(kwargs):
+    computer_tool = ComputerTool20250124()
+    with pytest.raises(ToolError):
+        await computer_tool(action="wait_for", **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_computer_tool_batch_takes_one_screenshot():
+    computer_tool = ComputerTool20250124()
+    with (
+        patch.object(
+            computer_tool, "_run_command", new_callable=AsyncMock
+        ) as mock_command,
+        patch.object(
+            computer_tool, "screenshot", new_callable=AsyncMock
+        ) as mock_screenshot,
+        patch.object(computer_tool, "_wait_for_settle", return_value=None),
+        patch("asyncio.sleep") as mock_sleep,
+    ):
+        mock_command.return_value = ToolResult(output="", error="")
+        mock_screenshot.return_value = ToolResult(base64_image="base64")
+        result = await computer_tool(
+            action="batch",
+            actions=[
+                {"action": "left_click", "coordinate": [10, 20]},
+                {"action": "type", "text": "hello", "pause": 0.5},
+                {"action": "key", "text": "Return"},
+            ],
+        )
+    commands = [call.args[0] for call in mock_command.call_args_list]
+    assert "mousemove --sync 10 20" in commands[0]
+    assert "type --delay 12 -- hello" in commands[1]
+    assert "key -- Return" in commands[2]
+    mock_sleep.assert_called_once_with(0.5)
+    mock_screenshot.assert_called_once()
+    assert result.base64_image == "base64"
+    assert result.error is None
+
+
+@pytest.mark.asyncio
+async def test_computer_tool_batch_stops_at_first_error():
+    computer_tool = ComputerTool20250124()
+    with (
+        patch.object(
+            computer_tool, "_run_command", new_callable=AsyncMock
+        ) as mock_command,
+        patch.object(
+            computer_tool, "screenshot", new_callable=AsyncMock
+        ) as mock_screenshot,
+        patch.object(computer_tool, "_wait_for_settle", return_value=None),
+    ):
+        mock_command.return_value = ToolResult(output="", error="")
+        mock_screenshot.return_value = ToolResult(base64_image="base64")
+        result = await computer_tool(
+            action="batch",
+            actions=[
+                {"action": "left_click"},
+                {"action": "mouse_move"},
+                {"action": "key", "text": "Return"},
+            ],
+        )
+    assert mock_command.call_count == 1
+    assert result.error == (
+        "Action 2 (mouse_move) failed: coordinate is required for mouse_move"
+    )
+    assert result.base64_image == "base64"
+
+
+@pytest.mark.asyncio
+async def test_collection_runs_computer_action_without_screenshot(computer_tool):
+    collection = ToolCollection(computer_tool)
+    with (
+        patch.object(
+            computer_tool, "_run_command", new_callable=AsyncMock
+        ) as mock_command,
+        patch.object(
+            computer_tool, "screenshot", new_callable=AsyncMock
+        ) as mock_screenshot,
+        patch.object(computer_tool, "_wait_for_settle") as mock_settle,
+    ):
+        mock_command.return_value = ToolResult(output="", error="")
+        mock_screenshot.return_value = ToolResult(base64_image="base64")
+        result = await collection.run(
+            name="computer",
+            tool_input={"action": "mouse_move", "coordinate": [10, 20]},
+            take_screenshot=False,
+        )
+        mock_screenshot.assert_not_called()
+        mock_settle.assert_not_called()
+        assert result.base64_image is None
+        assert not computer_tool._screenshots_deferred
+
+        result = await collection.run(
+            name="computer", tool_input={"action": "screenshot"}, take_screenshot=False
+        )
+        assert result.base64_image == "base64"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "actions",
+    [None, [], [{"action": "screenshot"}], [{"action": "key", "pause": 60}]],
+)
+async def test_computer_tool_batch_invalid_actions(actions):
+    computer_tool = ComputerTool20250124()
+    with pytest.raises(ToolError):
+        await computer_tool(action="batch", actions=actions)
+
+
 @pytest.mark.asyncio
 async def test_computer_tool_scaling(computer_tool):
     computer_tool._scaling_enabled = True
@@ -5,6 +5,8 @@ import pytest
 
 from computer_use_demo.tools.base import CLIResult, ToolError, ToolResult
 from computer_use_demo.tools.edit import EditTool20241022, EditTool20250124
+from computer_use_demo.tools.run import CommandResult
+from computer_use_demo.tools.usage import ResourceUsage
 
 
 @pytest.fixture(params=[EditTool20241022, EditTool20250124])
@@ -27,13 +29,21 @@ async def test_view_command(edit_tool):
     # Test viewing a directory
     with patch("pathlib.Path.exists", return_value=True), patch(
         "pathlib.Path.is_dir", return_value=True
-    ), patch("computer_use_demo.tools.edit.run") as mock_run:
-        mock_run.return_value = (None, "file1.txt\nfile2.txt", None)
+    ), patch("computer_use_demo.tools.edit.run_capped") as mock_run:
+        mock_run.return_value = CommandResult(
+            returncode=0,
+            stdout="file1.txt\nfile2.txt",
+            stderr="",
+            stdout_size=19,
+            stderr_size=0,
+            usage=ResourceUsage(wall_time=0.1, output_bytes=19),
+        )
         result = await edit_tool(command="view", path="/test/dir")
         assert isinstance(result, CLIResult)
         assert result.output
         assert "file1.txt" in result.output
         assert "file2.txt" in result.output
+        assert result.usage == mock_run.return_value.usage
 
     # Test viewing a file with a specific range
     with patch("pathlib.Path.exists", return_value=True), patch(
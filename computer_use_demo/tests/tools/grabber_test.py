@@ -0,0 +1,134 @@
+import time
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+
+from computer_use_demo.tools.grabber import (
+    FrameGrabber,
+    FreshFrames,
+    get_grabber,
+    stop_grabber,
+    unwatch_grabber,
+    watch_grabber,
+)
+from computer_use_demo.tools.screen import Frame, wait_until_stable
+from computer_use_demo.tools.xlib import XError
+
+
+class CountingScreen:
+    width = 4
+    height = 2
+
+    def __init__(self, fail_after: int | None = None):
+        self.captures = 0
+        self.fail_after = fail_after
+        self.buffers: set[int] = set()
+
+    def capture(self, out: np.ndarray | None = None) -> Frame:
+        assert out is not None
+        if self.fail_after is not None and self.captures >= self.fail_after:
+            raise XError("display went away")
+        self.buffers.add(out.__array_interface__["data"][0])
+        self.captures += 1
+        out[:] = self.captures
+        return Frame(pixels=out, timestamp=time.time())
+
+
+def wait_for(condition, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_frame_grabber_reuses_ring_buffer_slots():
+    screen = CountingScreen()
+    grabber = FrameGrabber(screen, fps=500, capacity=3)
+    assert grabber.latest() is None
+    grabber.start()
+    try:
+        wait_for(lambda: screen.captures >= 10)
+    finally:
+        grabber.stop()
+
+    frame = grabber.latest()
+    assert frame is not None
+    assert frame.pixels.shape == (2, 4, 3)
+    assert frame.pixels[0, 0, 0] == screen.captures
+    assert len(screen.buffers) == 3
+    # readers get a copy that later captures can't overwrite
+    assert not np.shares_memory(frame.pixels, grabber._frames)
+
+
+def test_frame_grabber_stops_when_capture_fails():
+    grabber = FrameGrabber(CountingScreen(fail_after=2), fps=500)
+    grabber.start()
+    wait_for(lambda: not grabber.running)
+    assert grabber.latest() is not None
+
+
+@pytest.mark.asyncio
+async def test_frame_grabber_feeds_wait_until_stable():
+    screen = CountingScreen(fail_after=3)
+    grabber = FrameGrabber(screen, fps=500)
+    grabber.start()
+    wait_for(lambda: not grabber.running)
+
+    frame = await wait_until_stable(
+        grabber, min_delay=0, max_delay=1, quiet_period=0.02, interval=0.005
+    )
+
+    assert frame.pixels[0, 0, 0] == 3
+
+
+def test_fresh_frames_never_repeat_or_predate_the_action():
+    grabber = FrameGrabber(CountingScreen(fail_after=2), fps=500)
+    grabber.start()
+    wait_for(lambda: not grabber.running)
+    grabbed = grabber.latest()
+    screen = Mock()
+    screen.capture.side_effect = lambda: Frame(
+        pixels=np.zeros((2, 4, 3), dtype=np.uint8), timestamp=time.time()
+    )
+
+    # the grabber's frames are all older than the action
+    frames = FreshFrames(grabber, screen, after=time.time())
+    frames.capture()
+    assert screen.capture.call_count == 1
+
+    frames = FreshFrames(grabber, screen, after=0.0)
+    assert frames.capture().timestamp == grabbed.timestamp
+    # the grabber has nothing newer, so the next frame is captured directly
+    assert frames.capture().timestamp > grabbed.timestamp
+    assert screen.capture.call_count == 2
+
+
+def test_watched_grabber_stops_with_its_last_viewer():
+    with patch(
+        "computer_use_demo.tools.grabber.get_screen", return_value=CountingScreen()
+    ):
+        first = watch_grabber(99, fps=500)
+        second = watch_grabber(99, fps=500)
+    assert first is second and first is not None
+    try:
+        unwatch_grabber(99)
+        assert first.running
+        unwatch_grabber(99)
+        assert not first.running
+        assert get_grabber(99) is None
+    finally:
+        stop_grabber(99)
+
+
+def test_viewers_leave_a_grabber_they_did_not_start_running():
+    with patch(
+        "computer_use_demo.tools.grabber.get_screen", return_value=CountingScreen()
+    ):
+        grabber = get_grabber(99, fps=500)
+        assert watch_grabber(99, fps=500) is grabber
+    try:
+        unwatch_grabber(99)
+        assert grabber is not None and grabber.running
+    finally:
+        stop_grabber(99)
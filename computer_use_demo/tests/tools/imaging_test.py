@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from computer_use_demo.tools.imaging import (
+    EncodingProfile,
+    decode,
+    encode,
+    resize,
+)
+
+
+def test_resize_averages_covered_area():
+    pixels = (np.arange(16, dtype=np.uint8).reshape(4, 4, 1) * 10).repeat(3, axis=2)
+
+    resized = resize(pixels, 2, 2)
+
+    assert resized.shape == (2, 2, 3)
+    assert resized[..., 0].tolist() == [[25, 45], [105, 125]]
+
+
+def test_resize_fractional_scale_matches_exact_area_mean():
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, (30, 50, 3), dtype=np.uint8)
+
+    resized = resize(pixels, 37, 21)
+
+    def coverage(length, size):
+        scale = length / size
+        return np.array(
+            [
+                [
+                    max(0.0, min(i + 1, (j + 1) * scale) - max(i, j * scale)) / scale
+                    for i in range(length)
+                ]
+                for j in range(size)
+            ]
+        )
+
+    expected = np.einsum(
+        "yi,ixc,wx->ywc", coverage(30, 21), pixels.astype(float), coverage(50, 37)
+    )
+    assert resized.shape == (21, 37, 3)
+    assert np.abs(resized - np.rint(expected)).max() <= 1
+
+
+def test_resize_same_size_is_a_no_op():
+    pixels = np.zeros((768, 1024, 3), dtype=np.uint8)
+    assert resize(pixels, 1024, 768) is pixels
+
+
+@pytest.mark.parametrize(
+    "spec, media_type, lossless",
+    [
+        ("png:1", "image/png", True),
+        ("webp-lossless", "image/webp", True),
+        ("webp:80", "image/webp", False),
+        ("jpeg:80", "image/jpeg", False),
+    ],
+)
+def test_encode_profiles(spec, media_type, lossless):
+    pixels = np.random.default_rng(2).integers(0, 256, (16, 16, 3), dtype=np.uint8)
+    profile = EncodingProfile.parse(spec)
+
+    decoded = decode(encode(pixels, profile))
+
+    assert profile.media_type == media_type
+    assert profile.name == spec
+    assert decoded.shape == pixels.shape
+    assert np.array_equal(decoded, pixels) == lossless
+
+
+@pytest.mark.parametrize("spec", ["gif", "png:12", "jpeg:0", "webp-lossless:5"])
+def test_encoding_profile_rejects_unknown_specs(spec):
+    with pytest.raises(ValueError, match="Unknown screenshot encoding profile"):
+        EncodingProfile.parse(spec)
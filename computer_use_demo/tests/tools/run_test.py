@@ -0,0 +1,123 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from computer_use_demo.tools.run import (
+    TRUNCATED_MESSAGE,
+    OutputCapture,
+    run,
+    run_capped,
+)
+
+
+def test_output_capture_keeps_short_output_whole():
+    capture = OutputCapture(head=4, tail=4)
+    capture.write(b"abc")
+    capture.write(b"defgh")
+    assert not capture.clipped
+    assert capture.text() == "abcdefgh"
+    assert capture.size == 8
+
+
+def test_output_capture_keeps_head_and_tail_in_memory(tmp_path):
+    capture = OutputCapture(head=4, tail=4, spill_dir=str(tmp_path / "spill"))
+    for chunk in (b"0123", b"4567", b"89ab", b"cdef"):
+        capture.write(chunk)
+    capture.close()
+
+    assert capture.clipped
+    assert capture.size == 16
+    assert bytes(capture.head) == b"0123"
+    assert bytes(capture.tail) == b"cdef"
+    text = capture.text()
+    assert text.startswith("0123\n<response clipped: 8 of 16 bytes")
+    assert text.endswith(">\ncdef")
+    assert capture.spill_path is not None and capture.spill_path in text
+    with open(capture.spill_path, "rb") as f:
+        assert f.read() == b"0123456789abcdef"
+
+
+def test_output_capture_without_spill_dir():
+    capture = OutputCapture(head=2, tail=2)
+    capture.write(b"0123456789")
+    assert capture.spill_path is None
+    assert (
+        capture.text()
+        == "01\n<response clipped: 6 of 10 bytes in the middle are not shown.>\n89"
+    )
+
+
+def test_output_capture_drops_characters_split_by_the_gap():
+    capture = OutputCapture(head=2, tail=2)
+    capture.write("aé".encode() + b"-" * 10 + "éb".encode())
+    text = capture.text()
+    # both edges of the gap fall inside an "é", which is dropped instead of garbled
+    assert text.startswith("a\n")
+    assert text.endswith(">\nb")
+
+
+@pytest.mark.asyncio
+async def test_run_capped_reports_sizes_and_duration():
+    result = await run_capped("printf hello; printf oops >&2; exit 3")
+    assert result.returncode == 3
+    assert (result.stdout, result.stderr) == ("hello", "oops")
+    assert (result.stdout_size, result.stderr_size) == (5, 4)
+    assert result.duration > 0
+    assert result.usage.output_bytes == 9
+
+
+@pytest.mark.asyncio
+async def test_run_capped_measures_the_command_and_its_children():
+    result = await run_capped(
+        "python3 -c 'import time; x = bytearray(50_000_000); t = time.process_time()\n"
+        "while time.process_time() - t < 0.2: pass'"
+    )
+    assert result.returncode == 0
+    assert result.usage.max_rss >= 50_000_000
+    assert result.usage.user_time + result.usage.system_time >= 0.2
+    assert result.usage.wall_time >= 0.2
+
+
+@pytest.mark.asyncio
+async def test_run_capped_does_not_count_the_parents_memory():
+    # resident in this process, which the command's process starts as a copy of
+    ballast = b"x" * 200_000_000
+    result = await run_capped("sleep 0.3")
+    assert result.usage.max_rss < 100_000_000
+    del ballast
+
+
+@pytest.mark.asyncio
+async def test_run_capped_does_not_hold_executor_threads():
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        loop.set_default_executor(executor)
+        commands = [asyncio.create_task(run_capped("sleep 0.5")) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        start = time.monotonic()
+        await asyncio.to_thread(time.sleep, 0)
+        assert time.monotonic() - start < 0.2
+        results = await asyncio.gather(*commands)
+    assert all(result.usage.wall_time >= 0.5 for result in results)
+
+
+@pytest.mark.asyncio
+async def test_run_capped_keeps_only_the_cap_but_drains_the_rest():
+    # far more than a pipe buffer holds, so the command blocks unless it is drained
+    result = await run_capped("head -c 1000000 /dev/zero | tr '\\0' x", max_bytes=10)
+    assert result.returncode == 0
+    assert result.stdout == "x" * 10 + TRUNCATED_MESSAGE
+    assert result.stdout_size == 1000000
+
+
+@pytest.mark.asyncio
+async def test_run_capped_times_out():
+    with pytest.raises(TimeoutError, match="timed out after 0.1 seconds"):
+        await run_capped("sleep 5", timeout=0.1)
+
+
+@pytest.mark.asyncio
+async def test_run_returns_a_tuple():
+    assert await run("echo hi") == (0, "hi\n", "")
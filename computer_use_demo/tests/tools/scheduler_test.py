@@ -0,0 +1,189 @@
+import asyncio
+
+import pytest
+
+from computer_use_demo.tools.base import (
+    FILES_RESOURCE,
+    BaseAnthropicTool,
+    ResourceClaim,
+    ToolResult,
+)
+from computer_use_demo.tools.bash import BashTool20250124
+from computer_use_demo.tools.collection import ToolCollection
+from computer_use_demo.tools.computer import ComputerTool20250124
+from computer_use_demo.tools.edit import EditTool20250429
+from computer_use_demo.tools.scheduler import (
+    ToolCall,
+    conflicts,
+    defer_screenshots,
+    run_tool_calls,
+)
+
+
+class RecordingTool(BaseAnthropicTool):
+    """Sleeps for the requested time and records when each call starts and ends."""
+
+    def __init__(self, name: str, claims: list[ResourceClaim], log: list[str]):
+        self.name = name
+        self.claims = claims
+        self.log = log
+
+    def to_params(self):
+        return {"name": self.name, "type": "custom"}
+
+    def resources(self, tool_input):
+        return self.claims
+
+    async def __call__(self, *, label: str, delay: float = 0.05, fail=False):
+        self.log.append(f"start {label}")
+        await asyncio.sleep(delay)
+        self.log.append(f"end {label}")
+        if fail:
+            raise InterruptedError(label)
+        return ToolResult(output=label)
+
+
+async def collect(collection: ToolCollection, calls: list[ToolCall]) -> list[str]:
+    return [
+        f"{call.id}={result.output}"
+        async for call, result in run_tool_calls(collection, calls)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_run_tool_calls_runs_independent_calls_concurrently():
+    log: list[str] = []
+    collection = ToolCollection(
+        RecordingTool("shell", [ResourceClaim("shell")], log),
+        RecordingTool("viewer", [ResourceClaim("path:/a", exclusive=False)], log),
+    )
+    results = await collect(
+        collection,
+        [
+            ToolCall("1", "shell", {"label": "a", "delay": 0.1}),
+            ToolCall("2", "viewer", {"label": "b"}),
+        ],
+    )
+    assert results == ["1=a", "2=b"]
+    assert log == ["start a", "start b", "end b", "end a"]
+
+
+@pytest.mark.asyncio
+async def test_run_tool_calls_serializes_conflicting_calls_in_order():
+    log: list[str] = []
+    collection = ToolCollection(
+        RecordingTool("screen", [ResourceClaim("display:1")], log),
+        RecordingTool("viewer", [], log),
+    )
+    results = await collect(
+        collection,
+        [
+            ToolCall("1", "screen", {"label": "a", "delay": 0.1}),
+            ToolCall("2", "viewer", {"label": "b"}),
+            ToolCall("3", "screen", {"label": "c"}),
+        ],
+    )
+    assert results == ["1=a", "2=b", "3=c"]
+    assert log.index("end a") < log.index("start c")
+    assert log.index("start b") < log.index("end a")
+
+
+@pytest.mark.asyncio
+async def test_run_tool_calls_cancels_running_calls_when_one_raises():
+    log: list[str] = []
+    collection = ToolCollection(
+        RecordingTool("first", [], log), RecordingTool("second", [], log)
+    )
+    with pytest.raises(InterruptedError):
+        await collect(
+            collection,
+            [
+                ToolCall("1", "first", {"label": "a", "fail": True}),
+                ToolCall("2", "second", {"label": "b", "delay": 1}),
+            ],
+        )
+    assert "end b" not in log
+
+
+@pytest.mark.asyncio
+async def test_run_tool_calls_reports_invalid_tools():
+    collection = ToolCollection()
+    results = [
+        result.error
+        async for _, result in run_tool_calls(collection, [ToolCall("1", "nope", {})])
+    ]
+    assert results == ["Tool nope is invalid"]
+
+
+@pytest.mark.asyncio
+async def test_run_tool_calls_streams_bash_output_by_call_id():
+    bash = BashTool20250124()
+    deltas: list[tuple[str, str, str]] = []
+    calls = [
+        ToolCall("a", "bash", {"command": "echo one"}),
+        ToolCall("b", "bash", {"command": "echo two >&2"}),
+    ]
+    results = [
+        result
+        async for _, result in run_tool_calls(
+            ToolCollection(bash),
+            calls,
+            lambda call_id, stream, text: deltas.append((call_id, stream, text)),
+        )
+    ]
+
+    assert [result.output for result in results] == ["one", ""]
+    assert deltas == [("a", "stdout", "one\n"), ("b", "stderr", "two\n")]
+
+
+def test_bash_and_edit_conflicts():
+    bash = BashTool20250124().resources({"command": "ls"})
+    edit = EditTool20250429()
+    view = edit.resources({"command": "view", "path": "/tmp/a"})
+    write = edit.resources({"command": "create", "path": "/tmp/a"})
+    other_write = edit.resources({"command": "create", "path": "/tmp/b"})
+
+    assert not conflicts(bash, view)
+    assert conflicts(bash, write)
+    assert conflicts(bash, bash)
+    assert not conflicts(view, view)
+    assert conflicts(view, write)
+    assert not conflicts(write, other_write)
+    assert ResourceClaim(FILES_RESOURCE) in bash
+
+
+def test_bash_and_computer_conflict(monkeypatch):
+    monkeypatch.setenv("WIDTH", "1024")
+    monkeypatch.setenv("HEIGHT", "768")
+    bash = BashTool20250124(display_num=1).resources({"command": "ls"})
+    screenshot = ComputerTool20250124(display_num=1).resources({"action": "screenshot"})
+    other_display = ComputerTool20250124(display_num=2).resources(
+        {"action": "screenshot"}
+    )
+    view = EditTool20250429().resources({"command": "view", "path": "/tmp/a"})
+
+    assert conflicts(bash, screenshot)
+    assert not conflicts(bash, other_display)
+    assert not conflicts(screenshot, view)
+
+    # both default to $DISPLAY_NUM
+    monkeypatch.setenv("DISPLAY_NUM", "3")
+    assert conflicts(
+        BashTool20250124().resources({"command": "ls"}),
+        ComputerTool20250124().resources({"action": "screenshot"}),
+    )
+
+
+def test_defer_screenshots_keeps_only_last_computer_action():
+    calls = [
+        ToolCall("1", "computer", {"action": "left_click"}),
+        ToolCall("2", "bash", {"command": "ls"}),
+        ToolCall("3", "computer", {"action": "type", "text": "hi"}),
+        ToolCall("4", "computer", {"action": "key", "text": "Return"}),
+    ]
+    assert [call.take_screenshot for call in defer_screenshots(calls)] == [
+        False,
+        True,
+        False,
+        True,
+    ]
@@ -0,0 +1,127 @@
+import ctypes
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from computer_use_demo.tools import screen
+from computer_use_demo.tools.screen import (
+    Frame,
+    FrameCache,
+    _to_rgb,
+    changed_regions,
+    get_screen,
+    wait_until_stable,
+)
+from computer_use_demo.tools.xlib import XError, XImage
+
+
+def make_ximage(bgrx: np.ndarray, width: int) -> tuple[XImage, ctypes.Array]:
+    data = (ctypes.c_ubyte * bgrx.size).from_buffer_copy(bgrx.tobytes())
+    image = XImage(
+        width=width,
+        height=bgrx.shape[0],
+        data=ctypes.addressof(data),
+        bytes_per_line=bgrx.shape[1] * 4,
+        bits_per_pixel=32,
+    )
+    return image, data
+
+
+def test_to_rgb_converts_bgrx_and_drops_padding():
+    bgrx = np.zeros((2, 4, 4), dtype=np.uint8)
+    bgrx[0, 0] = [10, 20, 30, 0]  # blue, green, red, padding
+    bgrx[1, 2] = [1, 2, 3, 0]
+    bgrx[:, 3] = 255  # bytes past the image width
+    image, _buffer = make_ximage(bgrx, width=3)
+
+    pixels = _to_rgb(image)
+
+    assert pixels.shape == (2, 3, 3)
+    assert pixels[0, 0].tolist() == [30, 20, 10]
+    assert pixels[1, 2].tolist() == [3, 2, 1]
+    assert pixels.flags["C_CONTIGUOUS"]
+
+
+def test_get_screen_caches_failures():
+    screen._screens.clear()
+    screen._failures.clear()
+    with patch.object(
+        screen, "X11Screen", side_effect=XError("cannot open display :1")
+    ) as mock_screen:
+        assert get_screen(1) is None
+        assert get_screen(1) is None
+        mock_screen.assert_called_once_with(1)
+    screen._failures.clear()
+
+
+class FakeScreen:
+    def __init__(self, frames: list[np.ndarray]):
+        self.frames = frames
+        self.captures = 0
+
+    def capture(self) -> Frame:
+        pixels = self.frames[min(self.captures, len(self.frames) - 1)]
+        self.captures += 1
+        return Frame(pixels=pixels, timestamp=0.0)
+
+
+@pytest.mark.asyncio
+async def test_wait_until_stable_returns_once_screen_is_quiet():
+    frames = [np.full((8, 8, 3), value, dtype=np.uint8) for value in (0, 1, 2, 2)]
+    fake = FakeScreen(frames)
+
+    frame = await wait_until_stable(
+        fake, min_delay=0, max_delay=5, quiet_period=0.03, interval=0.01
+    )
+
+    assert frame.pixels[0, 0, 0] == 2
+    assert fake.captures < 20
+
+
+@pytest.mark.asyncio
+async def test_wait_until_stable_gives_up_at_max_delay():
+    fake = FakeScreen([])
+    fake.capture = lambda: Frame(
+        pixels=np.random.default_rng().integers(0, 256, (8, 8, 3), dtype=np.uint8),
+        timestamp=0.0,
+    )
+    start = time.monotonic()
+
+    await wait_until_stable(
+        fake, min_delay=0, max_delay=0.1, quiet_period=1, interval=0.01
+    )
+
+    assert time.monotonic() - start < 0.5
+
+
+def test_frame_cache_evicts_least_recently_used():
+    cache = FrameCache(size=2)
+    digests = [
+        FrameCache.digest(np.full((4, 4, 3), value, dtype=np.uint8))
+        for value in range(3)
+    ]
+    cache.remember(digests[0], "a")
+    cache.remember(digests[1], "b")
+    assert cache.get(digests[0]) == "a"
+    cache.remember(digests[2], "c")
+    assert cache.get(digests[1]) is None
+    assert cache.get(digests[0]) == "a"
+    assert cache.latest == digests[2]
+
+
+def test_changed_regions_merges_touching_blocks_and_sorts_by_area():
+    previous = np.zeros((100, 70, 3), dtype=np.uint8)
+    current = previous.copy()
+    current[5, 60, 2] = 1
+    current[20:40, 20:30] = 9
+    current[40:45, 30:40] = 9  # touches the box above diagonally
+    current[99, 69] = 1  # in a block cut short by the frame edge
+
+    assert changed_regions(previous, current) == [
+        (16, 16, 48, 48),
+        (48, 0, 64, 16),
+        (64, 96, 70, 100),
+    ]
+    assert changed_regions(previous, previous.copy()) == []
@@ -0,0 +1,36 @@
+import os
+import subprocess
+import time
+
+from computer_use_demo.tools.usage import (
+    ResourceUsage,
+    descendants,
+    descendants_rss,
+    tree_times,
+)
+
+
+def test_resource_usage_adds_up():
+    total = ResourceUsage(1.0, 0.5, 0.25, 100, 10) + ResourceUsage(
+        2.0, 0.5, 0.25, 50, 5
+    )
+    assert total == ResourceUsage(
+        wall_time=3.0, user_time=1.0, system_time=0.5, max_rss=100, output_bytes=15
+    )
+    assert total.to_dict()["max_rss"] == 100
+
+
+def test_process_tree_is_read_from_proc():
+    process = subprocess.Popen(["sh", "-c", "sleep 5 & wait"])
+    try:
+        deadline = time.monotonic() + 2
+        while len(descendants(os.getpid())) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        tree = descendants(os.getpid())
+        assert process.pid in tree
+        assert len(tree) >= 2
+        assert descendants_rss(os.getpid()) > 0
+        assert tree_times(os.getpid())[0] > 0
+    finally:
+        process.kill()
+        process.wait()
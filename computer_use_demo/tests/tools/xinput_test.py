@@ -0,0 +1,103 @@
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from computer_use_demo.tools.computer import ComputerTool20250124
+from computer_use_demo.tools.run import CommandResult
+from computer_use_demo.tools.usage import ResourceUsage
+from computer_use_demo.tools.xinput import InputStep, parse_xdotool
+from computer_use_demo.tools.xlib import XError
+
+
+def test_parse_xdotool_chained_commands():
+    steps = parse_xdotool(
+        "mousemove --sync 10 20 keydown shift click --repeat 3 --delay 10 5 keyup shift"
+    )
+    assert steps == [
+        InputStep("mousemove", (10, 20)),
+        InputStep("keydown", ("shift",)),
+        InputStep("click", (5, 3, 10)),
+        InputStep("keyup", ("shift",)),
+    ]
+
+
+def test_parse_xdotool_type_and_keys():
+    assert parse_xdotool("type --delay 12 -- 'Hello, World!'") == [
+        InputStep("type", ("Hello, World!", 12))
+    ]
+    assert parse_xdotool("key -- ctrl+a BackSpace") == [
+        InputStep("key", ("ctrl+a", "BackSpace"))
+    ]
+    assert parse_xdotool("keydown a sleep 0.5 keyup a") == [
+        InputStep("keydown", ("a",)),
+        InputStep("sleep", (0.5,)),
+        InputStep("keyup", ("a",)),
+    ]
+
+
+@pytest.mark.parametrize(
+    "args",
+    ["search --name firefox", "getmouselocation", "click", "mousemove --window 1 2 3"],
+)
+def test_parse_xdotool_rejects_unsupported_commands(args):
+    with pytest.raises(ValueError):
+        parse_xdotool(args)
+
+
+@pytest.mark.asyncio
+async def test_computer_tool_injects_input_in_process():
+    computer_tool = ComputerTool20250124()
+    injector = Mock()
+    injector.run.return_value = ""
+    with (
+        patch("computer_use_demo.tools.computer.get_injector", return_value=injector),
+        patch("computer_use_demo.tools.computer.run_capped") as mock_run,
+    ):
+        await computer_tool.shell(
+            f"{computer_tool.xdotool} mousemove --sync 1 2", take_screenshot=False
+        )
+    mock_run.assert_not_called()
+    injector.run.assert_called_once_with([InputStep("mousemove", (1, 2))])
+
+
+@pytest.mark.asyncio
+async def test_computer_tool_falls_back_to_xdotool():
+    computer_tool = ComputerTool20250124()
+    command = f"{computer_tool.xdotool} key -- NotAKey"
+    injector = Mock()
+    injector.run.side_effect = ValueError("unknown key name: NotAKey")
+    with (
+        patch("computer_use_demo.tools.computer.get_injector", return_value=injector),
+        patch(
+            "computer_use_demo.tools.computer.run_capped",
+            new_callable=AsyncMock,
+            return_value=CommandResult(
+                returncode=0,
+                stdout="",
+                stderr="",
+                stdout_size=0,
+                stderr_size=0,
+                usage=ResourceUsage(),
+            ),
+        ) as mock_run,
+    ):
+        await computer_tool.shell(command, take_screenshot=False)
+    mock_run.assert_called_once_with(command)
+
+
+@pytest.mark.asyncio
+async def test_computer_tool_reports_injection_failures():
+    computer_tool = ComputerTool20250124()
+    injector = Mock()
+    injector.run.side_effect = XError("connection lost")
+    with (
+        patch("computer_use_demo.tools.computer.get_injector", return_value=injector),
+        patch("computer_use_demo.tools.computer.discard_injector") as mock_discard,
+        patch("computer_use_demo.tools.computer.run_capped") as mock_run,
+    ):
+        result = await computer_tool.shell(
+            f"{computer_tool.xdotool} click 1", take_screenshot=False
+        )
+    mock_discard.assert_called_once_with(computer_tool.display_num)
+    mock_run.assert_not_called()
+    assert result.error == "Input injection failed: connection lost"
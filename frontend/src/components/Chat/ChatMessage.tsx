@@ -701,12 +701,19 @@ export const ChatMessage: React.FC<ChatMessageProps> = ({ message }) => {
                     {message.timestamp}
                   </span>
                 </div>
-                <img
-                  src={`${config.apiUrl}${message.url}`}
-                  alt="Screenshot"
-                  className="mt-2 max-w-full h-auto rounded border"
-                  style={{ maxHeight: "200px" }}
-                />
+                <a
+                  href={`${config.apiUrl}${message.previewUrl ?? message.url}`}
+                  target="_blank"
+                  rel="noopener noreferrer"
+                >
+                  <img
+                    src={`${config.apiUrl}${message.thumbnailUrl ?? message.url}`}
+                    alt="Screenshot"
+                    loading="lazy"
+                    className="mt-2 max-w-full h-auto rounded border"
+                    style={{ maxHeight: "200px" }}
+                  />
+                </a>
               </div>
             ) : (
               <div className="break-words leading-relaxed text-base">
@@ -196,7 +196,12 @@ export const useChat = (taskId?: string) => {
           kind: event.kind,
           payload: event.payload,
         };
-        setMessages(prev => [...prev, eventMessage]);
+        // Every tool call ends with its event, but only calls with text output get a
+        // tool_result, so the live output is dropped here
+        setMessages(prev => [
+          ...prev.filter(m => m.id !== `output-${event.payload?.tool_use_id}`),
+          eventMessage,
+        ]);
         setAgentRunning(true);
         break;
 
@@ -211,12 +216,38 @@ export const useChat = (taskId?: string) => {
           }),
           ordering: event.ordering,
           url: event.url,
+          thumbnailUrl: event.thumbnail_url ?? undefined,
+          previewUrl: event.preview_url ?? undefined,
           sha256: event.sha256,
         };
         setMessages(prev => [...prev, screenshotMessage]);
         setAgentRunning(true);
         break;
 
+      case 'tool_output_delta':
+        // Live output of a running command, shown until its result arrives
+        const liveOutputId = `output-${event.tool_use_id}`;
+        setMessages(prev => {
+          const live = prev.find(m => m.id === liveOutputId);
+          if (live) {
+            return prev.map(m =>
+              m.id === liveOutputId ? { ...m, content: m.content + event.content } : m
+            );
+          }
+          const liveOutputMessage: ChatMessage = {
+            id: liveOutputId,
+            type: 'function_result',
+            content: event.content,
+            timestamp: new Date().toLocaleTimeString([], { 
+              hour: '2-digit', 
+              minute: '2-digit' 
+            }),
+          };
+          return [...prev, liveOutputMessage];
+        });
+        setAgentRunning(true);
+        break;
+
       case 'tool_result':
         const toolResultMessage: ChatMessage = {
           id: Date.now().toString(),
@@ -228,7 +259,10 @@ export const useChat = (taskId?: string) => {
           }),
           ordering: event.ordering,
         };
-        setMessages(prev => [...prev, toolResultMessage]);
+        setMessages(prev => [
+          ...prev.filter(m => m.id !== `output-${event.tool_use_id}`),
+          toolResultMessage,
+        ]);
         setAgentRunning(true);
         break;
 
@@ -243,13 +277,18 @@ export const useChat = (taskId?: string) => {
           }),
           ordering: event.ordering,
         };
-        setMessages(prev => [...prev, errorMessage]);
+        // A stopped or failed task leaves no result for its running commands
+        setMessages(prev => [
+          ...prev.filter(m => !m.id.startsWith('output-')),
+          errorMessage,
+        ]);
         setError(extractTextContent(event.content));
         setAgentRunning(false);
         break;
 
       case 'completion':
         // Agent has completed successfully
+        setMessages(prev => prev.filter(m => !m.id.startsWith('output-')));
         setAgentRunning(false);
         break;
 
@@ -39,8 +39,10 @@ export interface BackendEvent {
 
 export interface BackendScreenshot {
   id: string;
-  event_id: string;
+  event_id: string | null;
   url: string;
+  thumbnail_url: string | null;
+  preview_url: string | null;
   sha256: string;
 }
 
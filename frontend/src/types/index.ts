@@ -26,8 +26,10 @@ export interface BackendEvent {
 
 export interface BackendScreenshot {
   id: string;
-  event_id: string;
+  event_id: string | null;
   url: string;
+  thumbnail_url: string | null;
+  preview_url: string | null;
   sha256: string;
 }
 
@@ -59,6 +61,8 @@ export interface ChatMessage {
   functionName?: string;
   ordering?: number;
   url?: string;
+  thumbnailUrl?: string;
+  previewUrl?: string;
   sha256?: string;
   kind?: string;
   payload?: any;
@@ -80,14 +84,18 @@ export interface VNCConnectionProps {
 
 // Real-time Event Types
 export interface RealTimeEvent {
-  type: 'message' | 'event' | 'screenshot' | 'tool_result' | 'error' | 'completion';
+  type: 'message' | 'event' | 'screenshot' | 'tool_result' | 'tool_output_delta' | 'error' | 'completion';
   role?: string;
   content?: any;
   ordering?: number;
   url?: string;
+  thumbnail_url?: string | null;
+  preview_url?: string | null;
   sha256?: string;
   kind?: string;
   payload?: any;
+  tool_use_id?: string;
+  stream?: 'stdout' | 'stderr';
 }
 
 export interface WebSocketMessage {
@@ -0,0 +1,20 @@
+#!/bin/bash
+# Stop the desktop on display :$1. Its X clients exit once the server is gone.
+
+DISPLAY_NUM=$1
+LOCK_FILE=/tmp/.X${DISPLAY_NUM}-lock
+
+if [ ! -e "$LOCK_FILE" ]; then
+    exit 0
+fi
+
+kill $(cat "$LOCK_FILE") 2>/dev/null || true
+
+# Wait for Xvfb to exit and remove its lock file
+timeout=50
+while [ -e "$LOCK_FILE" ] && [ $timeout -gt 0 ]; do
+    sleep 0.1
+    ((timeout--))
+done
+rm -f "$LOCK_FILE"
+echo "Display :${DISPLAY_NUM} stopped"
@@ -0,0 +1,11 @@
+#!/bin/bash
+# Start a desktop (Xvfb, tint2 and mutter) on display :$1 for a pooled agent task
+set -e
+
+export DISPLAY_NUM=$1
+export DISPLAY=:${DISPLAY_NUM}
+cd "$(dirname "$0")"
+
+./xvfb_startup.sh "$DISPLAY_NUM"
+./tint2_startup.sh
+./mutter_startup.sh
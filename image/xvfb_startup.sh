@@ -1,6 +1,10 @@
 #!/bin/bash
 set -e  # Exit on error
 
+# An optional argument starts the server on that display number instead of $DISPLAY_NUM
+DISPLAY_NUM=${1:-$DISPLAY_NUM}
+export DISPLAY=:${DISPLAY_NUM}
+
 DPI=96
 RES_AND_DEPTH=${WIDTH}x${HEIGHT}x24
 